@@ -0,0 +1,69 @@
+# alembic/env.py - Migraciones del esquema de Templo
+#
+# Uso (desde Backend/, con DATABASE_URL configurada como para la API):
+#   alembic upgrade head
+#   alembic revision --autogenerate --rev-id 0005 -m "descripcion"
+#
+# Bases de datos creadas antes de Alembic: marcar primero el esquema inicial y luego actualizar
+#   alembic stamp 0001
+#   alembic upgrade head
+
+import os
+from logging.config import fileConfig
+
+from dotenv import load_dotenv
+from sqlalchemy import engine_from_config
+from sqlalchemy import pool
+
+from alembic import context
+
+from app.database import Base
+# Importar todos los modelos para que queden registrados en Base.metadata (autogenerate)
+from app.models import equipos, horarios, metricas_usuario, reservas, rutina, rutina_ia, users  # noqa: F401
+
+load_dotenv()
+
+config = context.config
+config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL", "").replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Generar el SQL sin conectarse (alembic upgrade head --sql)"""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Aplicar las migraciones sobre la base de datos"""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,154 @@
+"""esquema inicial
+
+Esquema tal como existía antes de usar Alembic. En bases ya creadas no se ejecuta:
+se marca con `alembic stamp 0001` y después se corre `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 16:49:40.778380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('usuario',
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('rol', sa.Enum('administrador', 'entrenador', 'cliente', name='rol_usuario'), nullable=False),
+    sa.Column('nombre', sa.String(length=50), nullable=False),
+    sa.Column('apellido_p', sa.String(length=50), nullable=False),
+    sa.Column('apellido_m', sa.String(length=50), nullable=True),
+    sa.Column('correo', sa.String(length=100), nullable=False),
+    sa.Column('contrasena', sa.String(length=255), nullable=False),
+    sa.Column('peso', sa.Float(), nullable=True),
+    sa.Column('altura', sa.Float(), nullable=True),
+    sa.Column('edad', sa.Integer(), nullable=True),
+    sa.Column('genero', sa.String(length=10), nullable=False),
+    sa.Column('objetivo', sa.String(length=20), nullable=False),
+    sa.Column('nivel', sa.String(length=20), nullable=True),
+    sa.Column('categoria', sa.Enum('calistenia', 'powerplate', name='categoria_usuario'), nullable=True),
+    sa.Column('fecha_registro', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id_usuario'),
+    sa.UniqueConstraint('correo')
+    )
+    op.create_index(op.f('ix_usuario_id_usuario'), 'usuario', ['id_usuario'], unique=False)
+    op.create_table('equipopowerplate',
+    sa.Column('id_equipo', sa.Integer(), nullable=False),
+    sa.Column('nombre_equipo', sa.String(length=100), nullable=False),
+    sa.Column('estado', sa.Enum('activo', 'mantenimiento', name='estadoequipo'), server_default='activo', nullable=False),
+    sa.Column('ultimo_mantenimiento', sa.Date(), nullable=True),
+    sa.Column('proximo_mantenimiento', sa.Date(), server_default=sa.text("(ultimo_mantenimiento + INTERVAL '3 months')"), nullable=True),
+    sa.Column('especificaciones_tecnicas', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id_equipo')
+    )
+    op.create_index(op.f('ix_equipopowerplate_id_equipo'), 'equipopowerplate', ['id_equipo'], unique=False)
+    op.create_table('metrica_usuario',
+    sa.Column('id_metrica', sa.Integer(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('tmb', sa.Numeric(precision=6, scale=2), nullable=True),
+    sa.Column('imc', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('rango_imc', sa.String(length=20), nullable=True),
+    sa.Column('grasa_corporal_estimada', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.Column('peso_ideal', sa.Numeric(precision=5, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_metrica')
+    )
+    op.create_index(op.f('ix_metrica_usuario_id_metrica'), 'metrica_usuario', ['id_metrica'], unique=False)
+    op.create_table('rutina',
+    sa.Column('id_rutina', sa.Integer(), nullable=False),
+    sa.Column('nombre_ejercicio', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('partes_musculo', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('repeticiones', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('series', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ),
+    sa.PrimaryKeyConstraint('id_rutina')
+    )
+    op.create_index(op.f('ix_rutina_id_rutina'), 'rutina', ['id_rutina'], unique=False)
+    op.create_table('rutina_ia',
+    sa.Column('id_rutina_ia', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('modelo_usado', sa.String(length=50), nullable=False),
+    sa.Column('precision_modelo', sa.DECIMAL(precision=5, scale=3), nullable=True),
+    sa.Column('fecha_generacion', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('plan_semanal', sa.JSON(), nullable=False),
+    sa.Column('nivel_usuario', sa.String(length=20), nullable=True),
+    sa.Column('edad_usuario', sa.Integer(), nullable=True),
+    sa.Column('peso_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('altura_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('objetivo_usuario', sa.String(length=50), nullable=True),
+    sa.Column('genero_usuario', sa.String(length=20), nullable=True),
+    sa.Column('tmb_usuario', sa.DECIMAL(precision=7, scale=2), nullable=True),
+    sa.Column('imc_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('activa', sa.Boolean(), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuario.id_usuario'], ),
+    sa.PrimaryKeyConstraint('id_rutina_ia')
+    )
+    op.create_index(op.f('ix_rutina_ia_id_rutina_ia'), 'rutina_ia', ['id_rutina_ia'], unique=False)
+    op.create_table('horario',
+    sa.Column('id_horario', sa.Integer(), nullable=False),
+    sa.Column('nombre_horario', sa.String(length=100), nullable=False),
+    sa.Column('id_entrenador', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.Enum('powerplate', 'calistenia', name='tipohorario'), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('estado', sa.Enum('activo', 'desactivado', name='estadohorario'), server_default='activo', nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('id_rutina', sa.Integer(), nullable=True),
+    sa.Column('nivel', sa.Enum('principiante', 'intermedio', 'avanzado', name='nivelhorario'), server_default='principiante', nullable=False),
+    sa.ForeignKeyConstraint(['id_entrenador'], ['usuario.id_usuario'], ),
+    sa.ForeignKeyConstraint(['id_rutina'], ['rutina.id_rutina'], ),
+    sa.PrimaryKeyConstraint('id_horario')
+    )
+    op.create_index(op.f('ix_horario_id_horario'), 'horario', ['id_horario'], unique=False)
+    op.create_table('reserva',
+    sa.Column('id_reserva', sa.Integer(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=False),
+    sa.Column('id_horario', sa.Integer(), nullable=False),
+    sa.Column('id_equipo', sa.Integer(), nullable=True),
+    sa.Column('id_rutina', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.Enum('confirmada', 'cancelada', name='estado_reserva'), nullable=False),
+    sa.Column('fecha_reserva', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('asistencia', sa.Integer(), nullable=True),
+    sa.Column('comentarios', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['id_equipo'], ['equipopowerplate.id_equipo'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_horario'], ['horario.id_horario'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_rutina'], ['rutina.id_rutina'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuario.id_usuario'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_reserva')
+    )
+    op.create_index(op.f('ix_reserva_id_reserva'), 'reserva', ['id_reserva'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_reserva_id_reserva'), table_name='reserva')
+    op.drop_table('reserva')
+    op.drop_index(op.f('ix_horario_id_horario'), table_name='horario')
+    op.drop_table('horario')
+    op.drop_index(op.f('ix_rutina_ia_id_rutina_ia'), table_name='rutina_ia')
+    op.drop_table('rutina_ia')
+    op.drop_index(op.f('ix_rutina_id_rutina'), table_name='rutina')
+    op.drop_table('rutina')
+    op.drop_index(op.f('ix_metrica_usuario_id_metrica'), table_name='metrica_usuario')
+    op.drop_table('metrica_usuario')
+    op.drop_index(op.f('ix_equipopowerplate_id_equipo'), table_name='equipopowerplate')
+    op.drop_table('equipopowerplate')
+    op.drop_index(op.f('ix_usuario_id_usuario'), table_name='usuario')
+    op.drop_table('usuario')
+    for tipo in ('estado_reserva', 'nivelhorario', 'estadohorario', 'tipohorario',
+                 'estadoequipo', 'categoria_usuario', 'rol_usuario'):
+        sa.Enum(name=tipo).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,42 @@
+"""planes de rutina_ia compartidos por hash
+
+Los datos existentes se pasan a plan_rutina_ia con `python -m app.migrar_planes_rutina_ia`.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 17:05:12.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('plan_rutina_ia',
+    sa.Column('hash_plan', sa.String(length=64), nullable=False),
+    sa.Column('contenido', sa.JSON(), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('hash_plan')
+    )
+    op.add_column('rutina_ia', sa.Column('plan_hash', sa.String(length=64), nullable=True))
+    op.add_column('rutina_ia', sa.Column('semilla', sa.DECIMAL(precision=20, scale=0), nullable=True))
+    op.alter_column('rutina_ia', 'plan_semanal', existing_type=sa.JSON(), nullable=True)
+    op.create_foreign_key('rutina_ia_plan_hash_fkey', 'rutina_ia', 'plan_rutina_ia', ['plan_hash'], ['hash_plan'])
+    op.create_index(op.f('ix_rutina_ia_plan_hash'), 'rutina_ia', ['plan_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rutina_ia_plan_hash'), table_name='rutina_ia')
+    op.drop_constraint('rutina_ia_plan_hash_fkey', 'rutina_ia', type_='foreignkey')
+    op.alter_column('rutina_ia', 'plan_semanal', existing_type=sa.JSON(), nullable=False)
+    op.drop_column('rutina_ia', 'semilla')
+    op.drop_column('rutina_ia', 'plan_hash')
+    op.drop_table('plan_rutina_ia')
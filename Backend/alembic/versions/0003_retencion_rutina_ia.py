@@ -0,0 +1,50 @@
+"""retención de rutina_ia: tabla de archivo e índice del historial por usuario
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 17:06:40.118529
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rutina_ia_archivo',
+    sa.Column('id_rutina_ia', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=False),
+    sa.Column('modelo_usado', sa.String(length=50), nullable=True),
+    sa.Column('precision_modelo', sa.DECIMAL(precision=5, scale=3), nullable=True),
+    sa.Column('fecha_generacion', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('plan_hash', sa.String(length=64), nullable=True),
+    sa.Column('semilla', sa.DECIMAL(precision=20, scale=0), nullable=True),
+    sa.Column('plan_semanal', sa.JSON(), nullable=True),
+    sa.Column('nivel_usuario', sa.String(length=20), nullable=True),
+    sa.Column('edad_usuario', sa.Integer(), nullable=True),
+    sa.Column('peso_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('altura_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('objetivo_usuario', sa.String(length=50), nullable=True),
+    sa.Column('genero_usuario', sa.String(length=20), nullable=True),
+    sa.Column('tmb_usuario', sa.DECIMAL(precision=7, scale=2), nullable=True),
+    sa.Column('imc_usuario', sa.DECIMAL(precision=5, scale=2), nullable=True),
+    sa.Column('fecha_actualizacion', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('fecha_archivado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id_rutina_ia')
+    )
+    op.create_index(op.f('ix_rutina_ia_archivo_usuario_id'), 'rutina_ia_archivo', ['usuario_id'], unique=False)
+    op.create_index('ix_rutina_ia_usuario_activa_fecha', 'rutina_ia',
+                    ['usuario_id', 'activa', sa.text('fecha_generacion DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rutina_ia_usuario_activa_fecha', table_name='rutina_ia')
+    op.drop_index(op.f('ix_rutina_ia_archivo_usuario_id'), table_name='rutina_ia_archivo')
+    op.drop_table('rutina_ia_archivo')
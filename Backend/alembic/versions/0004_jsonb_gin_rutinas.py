@@ -0,0 +1,64 @@
+"""columnas JSON de rutinas a JSONB con índices GIN
+
+Permite filtrar por contención (@>) en la base de datos, por ejemplo
+partes_musculo @> '["espalda"]', usando índices GIN jsonb_path_ops.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 17:12:03.551870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNAS_JSON = [
+    ('rutina', 'nombre_ejercicio', False),
+    ('rutina', 'partes_musculo', False),
+    ('rutina', 'repeticiones', False),
+    ('rutina', 'series', False),
+    ('rutina_ia', 'plan_semanal', True),
+    ('rutina_ia_archivo', 'plan_semanal', True),
+    ('plan_rutina_ia', 'contenido', False),
+]
+
+
+def upgrade() -> None:
+    for tabla, columna, nullable in COLUMNAS_JSON:
+        op.alter_column(tabla, columna,
+                        type_=postgresql.JSONB(astext_type=sa.Text()),
+                        existing_type=sa.JSON(),
+                        existing_nullable=nullable,
+                        postgresql_using=f'{columna}::jsonb')
+
+    op.create_index('ix_rutina_partes_musculo_gin', 'rutina', ['partes_musculo'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'partes_musculo': 'jsonb_path_ops'})
+    op.create_index('ix_rutina_nombre_ejercicio_gin', 'rutina', ['nombre_ejercicio'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'nombre_ejercicio': 'jsonb_path_ops'})
+    op.create_index('ix_plan_rutina_ia_contenido_gin', 'plan_rutina_ia', ['contenido'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'contenido': 'jsonb_path_ops'})
+    op.create_index('ix_rutina_ia_plan_semanal_gin', 'rutina_ia', ['plan_semanal'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'plan_semanal': 'jsonb_path_ops'},
+                    postgresql_where=sa.text('plan_semanal IS NOT NULL'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rutina_ia_plan_semanal_gin', table_name='rutina_ia')
+    op.drop_index('ix_plan_rutina_ia_contenido_gin', table_name='plan_rutina_ia')
+    op.drop_index('ix_rutina_nombre_ejercicio_gin', table_name='rutina')
+    op.drop_index('ix_rutina_partes_musculo_gin', table_name='rutina')
+
+    for tabla, columna, nullable in COLUMNAS_JSON:
+        op.alter_column(tabla, columna,
+                        type_=sa.JSON(),
+                        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                        existing_nullable=nullable,
+                        postgresql_using=f'{columna}::json')
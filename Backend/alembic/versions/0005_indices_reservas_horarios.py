@@ -0,0 +1,42 @@
+"""índices compuestos y parciales para reservas y horarios
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:31:27.904466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: no bloquear las reservas mientras se construyen (requiere ir fuera de la transacción)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_reserva_horario_usuario_confirmada', 'reserva', ['id_horario', 'id_usuario'], unique=False,
+                        postgresql_where=sa.text("estado = 'confirmada'"), postgresql_concurrently=True)
+        op.create_index('ix_reserva_usuario_estado_fecha', 'reserva',
+                        ['id_usuario', 'estado', sa.text('fecha_reserva DESC')], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_reserva_equipo_confirmada', 'reserva', ['id_equipo', 'id_horario'], unique=False,
+                        postgresql_where=sa.text("estado = 'confirmada' AND id_equipo IS NOT NULL"),
+                        postgresql_concurrently=True)
+        op.create_index('ix_horario_fecha_hora_inicio', 'horario', ['fecha', 'hora_inicio'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_horario_entrenador_fecha', 'horario', ['id_entrenador', 'fecha', 'hora_inicio'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_horario_entrenador_fecha', table_name='horario')
+    op.drop_index('ix_horario_fecha_hora_inicio', table_name='horario')
+    op.drop_index('ix_reserva_equipo_confirmada', table_name='reserva')
+    op.drop_index('ix_reserva_usuario_estado_fecha', table_name='reserva')
+    op.drop_index('ix_reserva_horario_usuario_confirmada', table_name='reserva')
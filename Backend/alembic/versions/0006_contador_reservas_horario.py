@@ -0,0 +1,39 @@
+"""contador de reservas confirmadas en horario
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 17:58:12.310254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('horario', sa.Column('reservas_confirmadas', sa.Integer(), server_default='0', nullable=False))
+    # Cargar el contador con las reservas confirmadas que ya existen
+    op.execute("""
+        UPDATE horario h
+        SET reservas_confirmadas = c.total
+        FROM (
+            SELECT id_horario, COUNT(*) AS total
+            FROM reserva
+            WHERE estado = 'confirmada'
+            GROUP BY id_horario
+        ) c
+        WHERE c.id_horario = h.id_horario
+    """)
+    op.create_check_constraint('ck_horario_reservas_confirmadas', 'horario', 'reservas_confirmadas >= 0')
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_horario_reservas_confirmadas', 'horario', type_='check')
+    op.drop_column('horario', 'reservas_confirmadas')
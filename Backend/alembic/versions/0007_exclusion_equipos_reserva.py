@@ -0,0 +1,53 @@
+"""rango de tiempo en reserva y exclusión GiST por equipo
+
+Si ya hay reservas confirmadas que se cruzan en el mismo equipo, la restricción no se puede crear
+y la migración falla. Para encontrarlas:
+
+    SELECT a.id_reserva, b.id_reserva, a.id_equipo
+    FROM reserva a JOIN reserva b
+      ON a.id_equipo = b.id_equipo AND a.id_reserva < b.id_reserva AND a.periodo && b.periodo
+    WHERE a.estado = 'confirmada' AND b.estado = 'confirmada'
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 18:21:47.095310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # btree_gist: permite "id_equipo WITH =" dentro de un índice GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column('reserva', sa.Column('periodo', postgresql.TSRANGE(), nullable=True))
+    op.execute("""
+        UPDATE reserva r
+        SET periodo = tsrange(h.fecha + h.hora_inicio, h.fecha + h.hora_fin, '[)')
+        FROM horario h
+        WHERE h.id_horario = r.id_horario
+    """)
+    op.create_exclude_constraint(
+        'ex_reserva_equipo_periodo', 'reserva',
+        ('id_equipo', '='), ('periodo', '&&'),
+        using='gist',
+        where=sa.text("estado = 'confirmada' AND id_equipo IS NOT NULL"),
+    )
+    # La consulta de solapamiento que usaba este índice ya no existe
+    op.drop_index('ix_reserva_equipo_confirmada', table_name='reserva')
+
+
+def downgrade() -> None:
+    op.create_index('ix_reserva_equipo_confirmada', 'reserva', ['id_equipo', 'id_horario'], unique=False,
+                    postgresql_where=sa.text("estado = 'confirmada' AND id_equipo IS NOT NULL"))
+    op.drop_constraint('ex_reserva_equipo_periodo', 'reserva')
+    op.drop_column('reserva', 'periodo')
@@ -0,0 +1,33 @@
+"""índices para la paginación por cursor de reservas y horarios
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:47:03.582916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY, como en 0005: no bloquear reservas ni horarios mientras se construyen
+    with op.get_context().autocommit_block():
+        op.create_index('ix_reserva_fecha_id', 'reserva', ['fecha_reserva', 'id_reserva'], unique=False,
+                        postgresql_concurrently=True)
+        # (fecha, hora_inicio, id_horario) reemplaza a (fecha, hora_inicio): sirve a las mismas consultas
+        op.create_index('ix_horario_fecha_hora_id', 'horario', ['fecha', 'hora_inicio', 'id_horario'],
+                        unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_horario_fecha_hora_inicio', table_name='horario', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_horario_fecha_hora_inicio', 'horario', ['fecha', 'hora_inicio'], unique=False)
+    op.drop_index('ix_horario_fecha_hora_id', table_name='horario')
+    op.drop_index('ix_reserva_fecha_id', table_name='reserva')
@@ -0,0 +1,31 @@
+"""capacidad del horario no menor que sus reservas confirmadas
+
+Si algún horario ya tiene más reservas confirmadas que capacidad, la restricción no se puede crear
+y la migración falla. Para encontrarlos:
+
+    SELECT id_horario, capacidad, reservas_confirmadas
+    FROM horario
+    WHERE reservas_confirmadas > capacidad
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 19:32:15.418207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_check_constraint('ck_horario_capacidad_reservas', 'horario', 'reservas_confirmadas <= capacidad')
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_horario_capacidad_reservas', 'horario', type_='check')
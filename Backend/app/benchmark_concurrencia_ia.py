@@ -0,0 +1,114 @@
+# benchmark_concurrencia_ia.py - Tráfico mixto contra /ai: generación pesada + peticiones livianas
+#
+# Mide el throughput de /ai/predict-routine con varios clientes concurrentes y, a la vez, la latencia
+# de /ai/model-status (liviana). Con el modo "bloqueante" la generación corre dentro del event loop
+# (como antes del pool de IA) y las peticiones livianas quedan esperando detrás de ella.
+#
+# Uso (desde Backend/):
+#   python -m app.benchmark_concurrencia_ia
+#   python -m app.benchmark_concurrencia_ia --clientes 16 --peticiones 400 --modo ambos
+#   IA_MAX_CONCURRENCIA=8 python -m app.benchmark_concurrencia_ia --modo pool
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import statistics
+import time
+
+import httpx
+
+from app.utils.ejecutor_ia import ejecutor_ia
+
+PERFILES = [
+    {"genero": "Masculino", "edad": 25, "peso": 80, "altura": 1.80, "objetivo": "aumento de peso"},
+    {"genero": "Femenino", "edad": 40, "peso": 70, "altura": 1.60, "objetivo": "perdida de peso"},
+    {"genero": "Hombre", "edad": 55, "peso": 95, "altura": 1.75, "objetivo": "perdida de peso"},
+    {"genero": "Mujer", "edad": 20, "peso": 52, "altura": 1.65, "objetivo": "aumento de peso"},
+]
+
+
+def cargar_app(ruta: str):
+    """'modulo:atributo' -> objeto ASGI"""
+    modulo, _, atributo = ruta.partition(':')
+    return getattr(importlib.import_module(modulo), atributo or 'app')
+
+
+async def ejecutar_en_loop(funcion, *args, timeout_segundos=None, **kwargs):
+    """Reemplazo de ejecutor_ia.ejecutar para el modo bloqueante: corre en el event loop"""
+    return funcion(*args, **kwargs)
+
+
+async def medir(app, clientes: int, peticiones: int) -> dict:
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://benchmark") as cliente:
+        # Calentar: cargar el modelo y llenar el cache de rutinas
+        await cliente.get("/ai/model-status")
+        for perfil in PERFILES:
+            await cliente.post("/ai/predict-routine", params=perfil)
+
+        pendientes = iter(range(peticiones))
+        estados = []
+        latencias_livianas = []
+        terminado = asyncio.Event()
+
+        async def cliente_pesado():
+            for i in pendientes:
+                respuesta = await cliente.post("/ai/predict-routine", params=PERFILES[i % len(PERFILES)])
+                estados.append(respuesta.status_code)
+
+        async def cliente_liviano():
+            while not terminado.is_set():
+                inicio = time.perf_counter()
+                await cliente.get("/ai/model-status")
+                latencias_livianas.append((time.perf_counter() - inicio) * 1000)
+                await asyncio.sleep(0.005)
+
+        inicio = time.perf_counter()
+        liviano = asyncio.create_task(cliente_liviano())
+        await asyncio.gather(*(cliente_pesado() for _ in range(clientes)))
+        duracion = time.perf_counter() - inicio
+        terminado.set()
+        await liviano
+
+    latencias_livianas.sort()
+    return {
+        "rutinas_por_segundo": len(estados) / duracion,
+        "ok": sum(1 for estado in estados if estado == 200),
+        "total": len(estados),
+        "livianas": len(latencias_livianas),
+        "liviana_p50_ms": statistics.median(latencias_livianas) if latencias_livianas else 0.0,
+        "liviana_p95_ms": latencias_livianas[int(len(latencias_livianas) * 0.95) - 1] if latencias_livianas else 0.0,
+        "liviana_max_ms": latencias_livianas[-1] if latencias_livianas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de /ai con tráfico mixto")
+    parser.add_argument('--app', default='app.main:app', help="Aplicación ASGI (modulo:atributo)")
+    parser.add_argument('--clientes', type=int, default=8, help="Clientes concurrentes pidiendo rutinas")
+    parser.add_argument('--peticiones', type=int, default=200, help="Rutinas a pedir en total")
+    parser.add_argument('--modo', choices=['pool', 'bloqueante', 'ambos'], default='ambos')
+    args = parser.parse_args()
+
+    app = cargar_app(args.app)
+    ejecutar_pool = ejecutor_ia.ejecutar
+
+    modos = ['bloqueante', 'pool'] if args.modo == 'ambos' else [args.modo]
+    for modo in modos:
+        ejecutor_ia.ejecutar = ejecutar_en_loop if modo == 'bloqueante' else ejecutar_pool
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = asyncio.run(medir(app, args.clientes, args.peticiones))
+
+        print(f"\n📊 Modo {modo} ({args.clientes} clientes, {args.peticiones} rutinas)")
+        print(f"   Rutinas/s: {resultado['rutinas_por_segundo']:.1f} ({resultado['ok']}/{resultado['total']} OK)")
+        print(f"   /ai/model-status durante la carga: {resultado['livianas']} atendidas, p50 {resultado['liviana_p50_ms']:.1f} ms, "
+              f"p95 {resultado['liviana_p95_ms']:.1f} ms, máx {resultado['liviana_max_ms']:.1f} ms")
+
+    ejecutor_ia.ejecutar = ejecutar_pool
+    print(f"\n🧵 Pool de IA: {ejecutor_ia.estadisticas()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmark_importtime.py - Controlar el tiempo de importación de la API (arranque en frío)
+#
+# Usa `python -X importtime` en un proceso limpio y falla (exit 1) si se pasa del presupuesto
+# o si al importar la API se cargan librerías pesadas que deberían importarse de forma perezosa.
+#
+# Uso (desde Backend/):
+#   python -m app.benchmark_importtime
+#   python -m app.benchmark_importtime --modulo app.routers.ai_routines --presupuesto-ms 800
+
+import argparse
+import os
+import subprocess
+import sys
+
+# El motor de IA las importa al primer uso de /ai (ver app/models/modelo_activo.py)
+PROHIBIDOS = ['pandas', 'numpy', 'sklearn', 'scipy']
+
+
+def medir_importacion(modulo: str) -> dict:
+    """Importar `modulo` en un proceso nuevo con -X importtime y resumir el resultado"""
+    entorno = dict(os.environ)
+    # create_engine no se conecta al importar; solo necesita una URL válida
+    entorno.setdefault("DATABASE_URL", "sqlite://")
+
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, env=entorno
+    )
+
+    tiempos = {}  # modulo -> (propio_us, acumulado_us)
+    errores = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:"):
+            errores.append(linea)
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # cabecera
+        tiempos[partes[2].strip()] = (int(partes[0]), int(partes[1]))
+
+    if proceso.returncode != 0:
+        raise RuntimeError("\n".join(errores[-15:]))
+
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de importación de la API")
+    parser.add_argument('--modulo', default='app.main')
+    parser.add_argument('--presupuesto-ms', type=float, default=1500,
+                        help="Tiempo máximo de importación acumulado del módulo")
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    print(f"🧪 Midiendo importación de {args.modulo} ({args.repeticiones} repeticiones)...")
+    try:
+        mediciones = [medir_importacion(args.modulo) for _ in range(args.repeticiones)]
+    except RuntimeError as e:
+        print(f"❌ No se pudo importar {args.modulo}:\n{e}")
+        sys.exit(2)
+
+    # La mejor de las repeticiones: descarta el ruido de caché de disco
+    tiempos = min(mediciones, key=lambda t: t.get(args.modulo, (0, 0))[1])
+    total_ms = tiempos.get(args.modulo, (0, 0))[1] / 1000
+
+    print(f"\n⏱️ Top {args.top} módulos por tiempo propio:")
+    for nombre, (propio, acumulado) in sorted(tiempos.items(), key=lambda x: -x[1][0])[:args.top]:
+        print(f"   {propio / 1000:8.1f} ms  (acum. {acumulado / 1000:8.1f} ms)  {nombre}")
+
+    cargados = sorted({
+        prohibido for prohibido in PROHIBIDOS
+        for nombre in tiempos if nombre == prohibido or nombre.startswith(prohibido + '.')
+    })
+
+    print(f"\n📊 Importación de {args.modulo}: {total_ms:.1f} ms (presupuesto: {args.presupuesto_ms:.0f} ms)")
+
+    ok = True
+    if cargados:
+        print(f"❌ Se importaron librerías pesadas al arrancar: {cargados}")
+        ok = False
+    if total_ms > args.presupuesto_ms:
+        print("❌ Tiempo de importación por encima del presupuesto")
+        ok = False
+
+    if ok:
+        print("✅ Arranque dentro del presupuesto y sin librerías pesadas")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# benchmark_memoria_workers.py - Memoria por worker: modelo cargado en cada uno vs precargado y heredado
+#
+#   independiente -> cada worker arranca limpio y carga su propio modelo (uvicorn --workers / sin preload)
+#   preload       -> el padre carga el modelo, congela el heap y crea los workers con fork (gunicorn.conf.py)
+#
+# Cada worker genera rutinas y predice niveles antes de medirse, para que la medición incluya las
+# páginas que tocan las peticiones reales. Requiere Linux (/proc/<pid>/smaps_rollup).
+#
+# Uso (desde Backend/):
+#   python -m app.benchmark_memoria_workers
+#   python -m app.benchmark_memoria_workers --workers 8 --peticiones 500
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import random
+
+from app.utils.memoria import memoria_proceso, preparar_fork
+
+PERFILES = [
+    ('Masculino', 'aumento de peso', 25, 80, 1.80),
+    ('Femenino', 'perdida de peso', 40, 70, 1.60),
+    ('Masculino', 'perdida de peso', 55, 95, 1.75),
+    ('Femenino', 'aumento de peso', 20, 52, 1.65),
+]
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes']
+
+
+def cargar_modelo(ruta: str):
+    from app.models.ai_routines import CalisthenicsAI
+
+    ai = CalisthenicsAI()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not ai.cargar_modelo(ruta):
+            raise RuntimeError(f"No se pudo cargar el modelo {ruta}")
+    return ai.congelar()
+
+
+def simular_peticiones(ai, peticiones: int, semilla: int):
+    """Lo que hace un worker al atender /ai/predict-routine: predecir nivel y generar días"""
+    rng = random.Random(semilla)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(peticiones):
+            genero, objetivo, edad, peso, altura = PERFILES[i % len(PERFILES)]
+            nivel, _, _ = ai.predecir_perfil(genero, edad, peso, altura, objetivo)
+            ai.generar_rutina_inteligente(genero, objetivo, nivel, rng.choice(DIAS), rng=rng)
+
+
+def worker(ruta: str, peticiones: int, numero: int, ai, resultados, terminar):
+    try:
+        if ai is None:
+            ai = cargar_modelo(ruta)
+        simular_peticiones(ai, peticiones, numero)
+    except Exception:
+        resultados.put((numero, None))  # Que el padre no se quede esperando
+        raise
+    resultados.put((numero, memoria_proceso()))
+    # Seguir vivo hasta que todos se midan: el PSS reparte las páginas entre procesos vivos
+    terminar.wait()
+
+
+def medir(modo: str, workers: int, ruta: str, peticiones: int) -> dict:
+    if modo == 'preload':
+        contexto = multiprocessing.get_context('fork')
+        ai = cargar_modelo(ruta)
+        preparar_fork()
+    else:
+        contexto = multiprocessing.get_context('spawn')
+        ai = None
+
+    resultados = contexto.Queue()
+    terminar = contexto.Event()
+    procesos = [
+        contexto.Process(target=worker, args=(ruta, peticiones, i, ai, resultados, terminar))
+        for i in range(workers)
+    ]
+    for proceso in procesos:
+        proceso.start()
+
+    por_worker = dict(resultados.get() for _ in procesos)
+    padre = memoria_proceso()
+
+    terminar.set()
+    for proceso in procesos:
+        proceso.join()
+
+    if None in por_worker.values():
+        raise RuntimeError(f"Falló algún worker en modo {modo} (ver traza arriba)")
+
+    return {'workers': [por_worker[i] for i in range(workers)], 'padre': padre}
+
+
+def imprimir(modo: str, medicion: dict):
+    print(f"\n📊 Modo {modo}")
+    print(f"{'worker':>8} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9}")
+    for i, datos in enumerate(medicion['workers']):
+        print(f"{i:>8} {datos['rss_mb']:>9.1f} {datos['pss_mb']:>9.1f} {datos['uss_mb']:>9.1f}")
+    totales = {c: sum(d[c] for d in medicion['workers']) for c in ('rss_mb', 'pss_mb', 'uss_mb')}
+    print(f"{'total':>8} {totales['rss_mb']:>9.1f} {totales['pss_mb']:>9.1f} {totales['uss_mb']:>9.1f}")
+    padre = medicion['padre']
+    print(f"{'padre':>8} {padre['rss_mb']:>9.1f} {padre['pss_mb']:>9.1f} {padre['uss_mb']:>9.1f}")
+    return totales['pss_mb'] + padre['pss_mb']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria por worker con y sin modelo precargado")
+    parser.add_argument('--modelo', default='modelo_calisthenics.pkl')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--peticiones', type=int, default=200, help="Peticiones simuladas por worker")
+    parser.add_argument('--modo', choices=['independiente', 'preload', 'ambos'], default='ambos')
+    args = parser.parse_args()
+
+    if not memoria_proceso():
+        print("❌ Este benchmark necesita /proc/<pid>/smaps_rollup (Linux)")
+        return
+
+    modos = ['independiente', 'preload'] if args.modo == 'ambos' else [args.modo]
+    totales = {}
+    for modo in modos:
+        print(f"🧪 {modo}: {args.workers} workers x {args.peticiones} peticiones...")
+        try:
+            totales[modo] = imprimir(modo, medir(modo, args.workers, args.modelo, args.peticiones))
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return
+
+    print("\n💾 Memoria total real (suma de PSS, padre incluido):")
+    for modo, total in totales.items():
+        print(f"   {modo:<14} {total:>9.1f} MB")
+    if len(totales) == 2:
+        ahorro = totales['independiente'] - totales['preload']
+        print(f"   ahorro con preload: {ahorro:.1f} MB ({ahorro / totales['independiente']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
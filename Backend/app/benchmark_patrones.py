@@ -0,0 +1,105 @@
+# benchmark_patrones.py - Medir la extracción de patrones sobre un dataset sintético grande
+#
+# Uso (desde Backend/):
+#   python -m app.benchmark_patrones                # 1.000.000 de registros
+#   python -m app.benchmark_patrones --filas 200000
+
+import argparse
+import ast
+import contextlib
+import io
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from app.models.ai_routines import CalisthenicsAI
+
+MUSCULOS = ['pecho', 'espalda', 'pierna', 'hombro', 'bicep_tricep']
+DIAS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado']
+EJERCICIOS = [f"Ejercicio {i}" for i in range(60)]
+
+
+def generar_dataset_sintetico(filas: int, semilla: int = 42) -> pd.DataFrame:
+    """Dataset con el mismo formato que el CSV real (listas guardadas como texto)"""
+    rng = np.random.default_rng(semilla)
+    largos = rng.integers(2, 6, size=filas)
+    total = int(largos.sum())
+
+    musculos = np.array(MUSCULOS)[rng.integers(0, len(MUSCULOS), size=total)]
+    ejercicios = np.array(EJERCICIOS)[rng.integers(0, len(EJERCICIOS), size=total)]
+    series = rng.integers(2, 6, size=total)
+    reps = rng.integers(8, 26, size=total)
+
+    cortes = np.cumsum(largos)[:-1]
+
+    def como_lista(valores, texto):
+        if texto:
+            return [str([str(v) for v in grupo]) for grupo in np.split(valores, cortes)]
+        return [str([int(v) for v in grupo]) for grupo in np.split(valores, cortes)]
+
+    return pd.DataFrame({
+        'genero': rng.choice(['Masculino', 'Femenino'], size=filas),
+        'objetivo': rng.choice(['aumento de peso', 'perdida de peso'], size=filas),
+        'dia': rng.choice(DIAS, size=filas),
+        'ejercicio': como_lista(ejercicios, True),
+        'series': como_lista(series, False),
+        'repeticiones': como_lista(reps, False),
+        'parte_musculo': como_lista(musculos, True),
+    })
+
+
+def patrones_iterrows(df: pd.DataFrame) -> dict:
+    """Implementación anterior: máscara por día + iterrows + ast.literal_eval"""
+    patrones = {}
+    for dia in df['dia'].unique():
+        musculos_dia = []
+        for _, row in df[df['dia'] == dia].iterrows():
+            musculos_dia.extend(ast.literal_eval(row['parte_musculo']))
+        patrones[dia] = [m for m, c in Counter(musculos_dia).most_common(4)]
+    return patrones
+
+
+def patrones_vectorizados(df: pd.DataFrame) -> tuple:
+    """Implementación actual: explode de la tabla + groupby"""
+    ai = CalisthenicsAI()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ai.dataset = df
+        ai.tabla_ejercicios = ai._explotar_dataset(df)
+        ai._extraer_patrones_inteligentes()
+    return ai.patrones_musculares, len(ai.tabla_ejercicios)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de _extraer_patrones_inteligentes")
+    parser.add_argument('--filas', type=int, default=1_000_000)
+    parser.add_argument('--muestra-anterior', type=int, default=20_000,
+                        help="Filas para medir la implementación anterior (se extrapola)")
+    args = parser.parse_args()
+
+    print(f"🧪 Generando dataset sintético de {args.filas:,} registros...")
+    df = generar_dataset_sintetico(args.filas)
+
+    inicio = time.perf_counter()
+    patrones, total_ejercicios = patrones_vectorizados(df)
+    tiempo_nuevo = time.perf_counter() - inicio
+    print(f"⚡ Vectorizado: {tiempo_nuevo:.2f}s para {args.filas:,} registros ({total_ejercicios:,} ejercicios)")
+
+    muestra = df.head(args.muestra_anterior)
+    inicio = time.perf_counter()
+    patrones_muestra_anterior = patrones_iterrows(muestra)
+    tiempo_muestra = time.perf_counter() - inicio
+    tiempo_anterior = tiempo_muestra * len(df) / len(muestra)
+    print(f"🐢 Anterior (iterrows): {tiempo_muestra:.2f}s para {len(muestra):,} registros "
+          f"-> ~{tiempo_anterior:.1f}s estimados para {args.filas:,}")
+
+    patrones_muestra_nuevo, _ = patrones_vectorizados(muestra)
+    iguales = patrones_muestra_nuevo == patrones_muestra_anterior
+    print(f"{'✅' if iguales else '❌'} Mismo top 4 por día en la muestra: {iguales}")
+    print(f"📊 Patrones: {patrones}")
+    print(f"🚀 Aceleración estimada: x{tiempo_anterior / tiempo_nuevo:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmark_predictores.py - Concordancia y latencia de los backends de predicción de nivel
+#
+# Uso (desde Backend/):
+#   python -m app.benchmark_predictores
+#   python -m app.benchmark_predictores --perfiles 50000 --llamadas 5000
+
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+from app.models.ai_routines import CalisthenicsAI
+from app.models.predictores_nivel import PredictorBosque, PredictorReglas, destilar_arbol
+
+
+def generar_perfiles(cantidad: int, semilla: int = 7) -> dict:
+    """Perfiles aleatorios dentro de los rangos que aceptan los endpoints"""
+    rng = np.random.default_rng(semilla)
+    generos = rng.choice(['Masculino', 'Femenino'], size=cantidad).astype(object)
+    objetivos = rng.choice(['aumento de peso', 'perdida de peso'], size=cantidad).astype(object)
+    edades = rng.integers(16, 81, size=cantidad).astype(float)
+    pesos = rng.uniform(30, 200, size=cantidad).round(1)
+    alturas = rng.uniform(1.2, 2.2, size=cantidad).round(2)
+
+    es_hombre = generos == 'Masculino'
+    tmb = np.where(
+        es_hombre,
+        66 + (13.7 * pesos) + (5 * alturas * 100) - (6.8 * edades),
+        655 + (9.6 * pesos) + (1.8 * alturas * 100) - (4.7 * edades)
+    ).round(2)
+    imc = pesos / (alturas ** 2)
+
+    return {
+        'generos': generos, 'objetivos': objetivos, 'edades': edades,
+        'pesos': pesos, 'alturas': alturas, 'tmb': tmb, 'imc': imc
+    }
+
+
+def medir_latencia(predictor, perfiles: dict, llamadas: int) -> float:
+    """Microsegundos por llamada a predecir() (un perfil por llamada, valores Python)"""
+    filas = list(zip(*(perfiles[c][:llamadas].tolist() for c in
+                       ['generos', 'objetivos', 'edades', 'pesos', 'alturas', 'tmb', 'imc'])))
+    inicio = time.perf_counter()
+    for fila in filas:
+        predictor.predecir(*fila)
+    return (time.perf_counter() - inicio) / len(filas) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los predictores de nivel")
+    parser.add_argument('--modelo', default='modelo_calisthenics.pkl')
+    parser.add_argument('--perfiles', type=int, default=20_000, help="Perfiles para medir concordancia")
+    parser.add_argument('--llamadas', type=int, default=2_000, help="Llamadas individuales para medir latencia")
+    args = parser.parse_args()
+
+    ai = CalisthenicsAI()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not ai.cargar_modelo(args.modelo):
+            print(f"❌ No se pudo cargar el modelo {args.modelo}")
+            return
+
+    inicio = time.perf_counter()
+    arbol = ai.arbol_destilado or destilar_arbol(ai.model, ai.label_encoders)
+    print(f"🌳 Árbol destilado: {arbol.fuente.count('return')} hojas "
+          f"({'guardado en el modelo' if ai.arbol_destilado else f'destilado en {time.perf_counter() - inicio:.2f}s'})")
+
+    predictores = {
+        'bosque': PredictorBosque(ai.model, ai.label_encoders),
+        'reglas': PredictorReglas(),
+        'arbol': arbol,
+    }
+
+    perfiles = generar_perfiles(args.perfiles)
+    columnas = ['generos', 'objetivos', 'edades', 'pesos', 'alturas', 'tmb', 'imc']
+
+    niveles = {}
+    tiempos_lote = {}
+    for nombre, predictor in predictores.items():
+        inicio = time.perf_counter()
+        niveles[nombre] = predictor.predecir_lote(*(perfiles[c] for c in columnas))
+        tiempos_lote[nombre] = (time.perf_counter() - inicio) / args.perfiles * 1e6
+
+    print(f"\n📊 {args.perfiles:,} perfiles sintéticos, {args.llamadas:,} llamadas individuales")
+    print(f"{'backend':<8} {'=reglas':>9} {'=bosque':>9} {'µs/llamada':>12} {'µs/perfil (lote)':>18}")
+    for nombre, predictor in predictores.items():
+        igual_reglas = (niveles[nombre] == niveles['reglas']).mean()
+        igual_bosque = (niveles[nombre] == niveles['bosque']).mean()
+        latencia = medir_latencia(predictor, perfiles, args.llamadas)
+        print(f"{nombre:<8} {igual_reglas:>9.2%} {igual_bosque:>9.2%} {latencia:>12.1f} {tiempos_lote[nombre]:>18.2f}")
+
+    print("\n'=reglas' es la concordancia con las etiquetas reales (crear_perfiles_usuario usa esas reglas).")
+
+
+if __name__ == "__main__":
+    main()
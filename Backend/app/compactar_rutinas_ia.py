@@ -0,0 +1,48 @@
+# compactar_rutinas_ia.py - Retención del historial de rutina_ia
+#
+# 1. Deja activas solo las N rutinas más recientes de cada usuario (un UPDATE basado en conjuntos).
+# 2. Mueve a rutina_ia_archivo las inactivas con más de D días (por lotes).
+# La tabla de archivo y el índice (usuario_id, activa, fecha_generacion DESC) vienen de
+# `alembic upgrade head`.
+#
+# Uso (desde Backend/, con DATABASE_URL configurada; pensado para cron, p. ej. una vez al día):
+#   python -m app.compactar_rutinas_ia
+#   python -m app.compactar_rutinas_ia --mantener 5 --dias 30
+#   RUTINAS_IA_MANTENER=20 RUTINAS_IA_DIAS_RETENCION=180 python -m app.compactar_rutinas_ia
+
+import argparse
+import os
+import time
+
+from app.crud.rutina_ia import archivar_rutinas_inactivas, desactivar_rutinas_antiguas
+from app.database import SessionLocal
+from app.models.rutina_ia import RutinaIA
+
+MANTENER_ACTIVAS = int(os.getenv("RUTINAS_IA_MANTENER", "10"))        # Rutinas activas por usuario
+DIAS_RETENCION = int(os.getenv("RUTINAS_IA_DIAS_RETENCION", "90"))    # Inactivas más viejas -> archivo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Desactivar y archivar rutinas de IA antiguas")
+    parser.add_argument('--mantener', type=int, default=MANTENER_ACTIVAS, help="Rutinas activas a conservar por usuario")
+    parser.add_argument('--dias', type=int, default=DIAS_RETENCION, help="Días antes de archivar una rutina inactiva")
+    parser.add_argument('--lote', type=int, default=1000, help="Filas archivadas por transacción")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        inicio = time.perf_counter()
+        desactivadas = desactivar_rutinas_antiguas(db, args.mantener)
+        print(f"🗂️ {desactivadas} rutinas desactivadas (se conservan {args.mantener} activas por usuario)")
+
+        archivadas = archivar_rutinas_inactivas(db, args.dias, args.lote)
+        print(f"📦 {archivadas} rutinas inactivas de más de {args.dias} días movidas a rutina_ia_archivo")
+
+        print(f"✅ Compactación terminada en {time.perf_counter() - inicio:.2f} s "
+              f"({db.query(RutinaIA).count()} filas en rutina_ia)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
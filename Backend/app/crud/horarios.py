@@ -2,7 +2,7 @@ from __future__ import annotations
 from fastapi import HTTPException, logger, status
 from sqlalchemy.orm import Session
 from sqlalchemy import String, or_, and_, extract
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import TYPE_CHECKING, List
 from app.utils.fechas import get_dia_semana
 from app.models.horarios import Horario
@@ -14,6 +14,9 @@ from typing import List, Dict, Optional
 from app.database import get_db 
 from sqlalchemy.orm import joinedload
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.crud.reservas import actualizar_periodo_reservas, es_equipo_ocupado
+from app.utils.paginacion import decodificar_cursor, despues_del_cursor
 from app.schemas.horarios import (
     HorarioCreate,
     HorarioUpdate,
@@ -227,11 +230,12 @@ def get_horarios(
     user_rol: str,
     user_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Obtiene horarios para administradores (todos) y entrenadores (solo los suyos)
-    Sin filtros de fecha
+    Sin filtros de fecha. Con cursor (fecha, hora_inicio, id_horario) se ignora skip
     """
     try:
         query = db.query(Horario).options(joinedload(Horario.entrenador),
@@ -241,13 +245,22 @@ def get_horarios(
             query = query.filter(Horario.id_entrenador == user_id)
         # Admin no necesita filtros
         
-        horarios = query.order_by(
+        query = query.order_by(
             Horario.fecha.asc(),
-            Horario.hora_inicio.asc()
-        ).offset(skip).limit(limit).all()
+            Horario.hora_inicio.asc(),
+            Horario.id_horario.asc()
+        )
+        if cursor:
+            query = despues_del_cursor(query, (Horario.fecha, Horario.hora_inicio, Horario.id_horario),
+                                       decodificar_cursor(cursor, date, time, int))
+        else:
+            query = query.offset(skip)
+        horarios = query.limit(limit).all()
 
         return _build_horario_response(horarios)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -606,7 +619,40 @@ def update_horario(
         # Validar consistencia de fechas/horas
         _validate_horario_times(horario)
 
-        db.commit()
+        # El cupo nuevo tiene que alcanzar para las reservas ya confirmadas
+        if ("capacidad" in update_data and horario.capacidad is not None
+                and horario.capacidad < horario.reservas_confirmadas):
+            confirmadas = horario.reservas_confirmadas
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La capacidad no puede ser menor que las reservas confirmadas ({confirmadas})"
+            )
+
+        # Las reservas guardan una copia del rango de la clase (exclusión de equipos powerplate)
+        if {"fecha", "hora_inicio", "hora_fin"} & update_data.keys():
+            db.flush()
+            try:
+                actualizar_periodo_reservas(db, horario_id)
+            except IntegrityError as e:
+                db.rollback()
+                if es_equipo_ocupado(e):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Con el nuevo horario un equipo powerplate quedaría reservado dos veces a la misma hora"
+                    )
+                if es_cupo_insuficiente(e):
+                    raise _error_cupo_insuficiente()
+                raise
+
+        try:
+            db.commit()
+        except IntegrityError as e:
+            # Una reserva confirmada entre la validación y el commit: la BD aplica el mismo límite
+            db.rollback()
+            if es_cupo_insuficiente(e):
+                raise _error_cupo_insuficiente()
+            raise
         db.refresh(horario)
         return horario
 
@@ -619,6 +665,17 @@ def update_horario(
             detail=f"Error al actualizar horario: {str(e)}"
         )
 
+def es_cupo_insuficiente(error: IntegrityError) -> bool:
+    """True si la BD rechazó el cambio porque la capacidad quedaba por debajo de las reservas confirmadas"""
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == "ck_horario_capacidad_reservas"
+
+def _error_cupo_insuficiente() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="La capacidad no puede ser menor que las reservas confirmadas"
+    )
+
 def _validate_horario_times(horario: ModelHorario):
     """Valida que las fechas y horas sean consistentes"""
     from datetime import datetime, date
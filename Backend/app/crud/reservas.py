@@ -4,194 +4,198 @@ from app.models.reservas import Reserva
 from app.schemas.reservas import ReservaCreate, ReservaUpdate, EstadoReserva
 from typing import List, Optional
 from datetime import datetime, timedelta
-from sqlalchemy import and_, or_
+from sqlalchemy import Date, Time, and_, func, or_, text
+from sqlalchemy.dialects.postgresql import Range
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, status
+from app.utils.paginacion import decodificar_cursor, despues_del_cursor
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
+# Todas las validaciones de una reserva en una sola consulta (una fila, siempre)
+CONSULTA_VALIDACION_RESERVA = text("""
+    WITH h AS (
+        SELECT id_horario, tipo, capacidad, reservas_confirmadas, estado, fecha, hora_inicio, hora_fin, id_rutina
+        FROM horario
+        WHERE id_horario = :id_horario
+    )
+    SELECT
+        u.id_usuario IS NOT NULL AS usuario_existe,
+        u.categoria AS usuario_categoria,
+        h.id_horario IS NOT NULL AS horario_existe,
+        h.tipo,
+        h.estado,
+        h.capacidad,
+        h.id_rutina AS horario_id_rutina,
+        h.fecha,
+        h.hora_inicio,
+        h.hora_fin,
+        EXISTS (
+            SELECT 1 FROM equipopowerplate e
+            WHERE e.id_equipo = :id_equipo AND e.estado = 'activo'
+        ) AS equipo_activo,
+        h.reservas_confirmadas,
+        EXISTS (
+            SELECT 1 FROM reserva r
+            WHERE r.id_usuario = :id_usuario AND r.id_horario = :id_horario AND r.estado = 'confirmada'
+        ) AS reserva_duplicada
+    FROM (SELECT 1) AS fila
+    LEFT JOIN h ON TRUE
+    LEFT JOIN usuario u ON u.id_usuario = :id_usuario
+""").columns(fecha=Date, hora_inicio=Time, hora_fin=Time)
+
+# Ocupar un lugar del horario: el UPDATE bloquea la fila, así que las reservas simultáneas
+# se atienden de a una y ninguna pasa del cupo (sin filas devueltas = horario lleno)
+OCUPAR_LUGAR_HORARIO = text("""
+    UPDATE horario
+    SET reservas_confirmadas = reservas_confirmadas + 1
+    WHERE id_horario = :id_horario AND reservas_confirmadas < capacidad
+    RETURNING reservas_confirmadas
+""")
+
+# Cancelar solo si sigue confirmada (dos cancelaciones simultáneas no liberan dos lugares)
+CANCELAR_RESERVA = text("""
+    UPDATE reserva
+    SET estado = 'cancelada'
+    WHERE id_reserva = :id_reserva AND estado = 'confirmada'
+    RETURNING id_horario
+""")
+
+LIBERAR_LUGAR_HORARIO = text("""
+    UPDATE horario
+    SET reservas_confirmadas = reservas_confirmadas - 1
+    WHERE id_horario = :id_horario AND reservas_confirmadas > 0
+""")
+
+# Volver a copiar el rango de la clase en sus reservas (cuando cambian fecha u horas del horario)
+ACTUALIZAR_PERIODO_RESERVAS = text("""
+    UPDATE reserva r
+    SET periodo = tsrange(h.fecha + h.hora_inicio, h.fecha + h.hora_fin, '[)')
+    FROM horario h
+    WHERE h.id_horario = r.id_horario AND r.id_horario = :id_horario
+""")
+
 def validar_reserva(db: Session, reserva_data: dict):
-    # Obtener el horario con su rutina asociada
-    horario = db.execute(
-        """SELECT h.tipo, h.capacidad, h.estado, h.fecha, h.hora_inicio, h.hora_fin, 
-           h.id_rutina as horario_id_rutina, h.nivel, h.nombre_horario
-           FROM horario h 
-           WHERE h.id_horario = :id_horario""",
-        {"id_horario": reserva_data["id_horario"]}
-    ).first()
+    """Validar una reserva con una sola consulta (usuario, horario, equipo, cupo y duplicado)"""
+    v = db.execute(CONSULTA_VALIDACION_RESERVA, {
+        "id_usuario": reserva_data["id_usuario"],
+        "id_horario": reserva_data["id_horario"],
+        "id_equipo": reserva_data.get("id_equipo")
+    }).one()
+    
+    if not v.usuario_existe:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Usuario no existe"
+        )
     
-    if not horario:
+    if not v.horario_existe:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El horario no existe"
         )
     
+    # Validar coincidencia categoría usuario - tipo horario
+    if v.usuario_categoria != v.tipo:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Usuario de categoría {v.usuario_categoria} no puede reservar horario de tipo {v.tipo}"
+        )
+    
     # Validar horario activo
-    if horario.estado != "activo":
+    if v.estado != "activo":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No se puede reservar en un horario inactivo"
         )
     
     # Validación tipo de reserva (powerplate vs calistenia)
-    if horario.tipo == "powerplate":
+    if v.tipo == "powerplate":
         if not reserva_data.get("id_equipo"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Las reservas de powerplate requieren un equipo"
             )
-            
-        # Validar que el equipo exista y esté activo
-        equipo_existe = db.execute(
-            "SELECT 1 FROM equipopowerplate WHERE id_equipo = :id_equipo AND estado = 'activo'",
-            {"id_equipo": reserva_data["id_equipo"]}
-        ).first()
         
-        if not equipo_existe:
+        if not v.equipo_activo:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El equipo especificado no existe o no está activo"
             )
+        # Que el equipo esté libre lo comprueba la BD al insertar (ex_reserva_equipo_periodo)
             
-        # Validar disponibilidad del equipo
-        equipo_reservado = db.execute(
-            """SELECT 1 FROM reserva r
-            JOIN horario h ON r.id_horario = h.id_horario
-            WHERE r.id_equipo = :id_equipo
-            AND r.estado = 'confirmada'
-            AND h.fecha = :fecha
-            AND (
-                (h.hora_inicio < :hora_fin AND h.hora_fin > :hora_inicio)
-            )""",
-            {
-                "id_equipo": reserva_data["id_equipo"],
-                "fecha": horario.fecha,
-                "hora_inicio": horario.hora_inicio,
-                "hora_fin": horario.hora_fin
-            }
-        ).first()
-        
-        if equipo_reservado:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El equipo ya está reservado en este horario"
-            )
-            
-    elif horario.tipo == "calistenia":
+    elif v.tipo == "calistenia":
         if reserva_data.get("id_equipo"):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Las reservas de calistenia no deben incluir equipo"
             )
     
-    # Validar capacidad del horario
-    reservas_count = db.execute(
-        "SELECT COUNT(*) FROM reserva WHERE id_horario = :id_horario AND estado = 'confirmada'",
-        {"id_horario": reserva_data["id_horario"]}
-    ).scalar()
-    
-    if reservas_count >= horario.capacidad:
+    # Validar capacidad del horario (el cupo se reserva de verdad en create_reserva)
+    if v.reservas_confirmadas >= v.capacidad:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El horario ha alcanzado su capacidad máxima"
         )
     
     # Validar que el usuario no tenga otra reserva en el mismo horario
-    reserva_duplicada = db.execute(
-        "SELECT 1 FROM reserva WHERE id_usuario = :id_usuario AND id_horario = :id_horario AND estado = 'confirmada'",
-        {
-            "id_usuario": reserva_data["id_usuario"],
-            "id_horario": reserva_data["id_horario"]
-        }
-    ).first()
-    
-    if reserva_duplicada:
+    if v.reserva_duplicada:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Ya tienes una reserva confirmada para este horario"
         )
     
     # Asignar la rutina del horario a la reserva
-    reserva_data["id_rutina"] = horario.horario_id_rutina
-
-def validar_disponibilidad_equipo(db: Session, id_equipo: int, id_horario: int):
-    # Obtener información del horario que se quiere reservar
-    horario_actual = db.execute(
-        """SELECT fecha, hora_inicio, hora_fin 
-        FROM horario 
-        WHERE id_horario = :id_horario""",
-        {"id_horario": id_horario}
-    ).first()
-
-    if not horario_actual:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El horario especificado no existe"
-        )
+    reserva_data["id_rutina"] = v.horario_id_rutina
+    # Rango de tiempo de la clase [inicio, fin) para la exclusión de equipos
+    reserva_data["periodo"] = Range(
+        datetime.combine(v.fecha, v.hora_inicio), datetime.combine(v.fecha, v.hora_fin), bounds="[)"
+    )
 
-    # Verificar si el equipo ya está reservado en horarios que se solapan
-    reserva_existente = db.execute(
-        """SELECT 1 FROM reserva r
-        JOIN horario h ON r.id_horario = h.id_horario
-        WHERE r.id_equipo = :id_equipo
-        AND r.estado = 'confirmada'
-        AND h.fecha = :fecha
-        AND (
-            (h.hora_inicio < :hora_fin AND h.hora_fin > :hora_inicio)
-        )""",
-        {
-            "id_equipo": id_equipo,
-            "fecha": horario_actual.fecha,
-            "hora_inicio": horario_actual.hora_inicio,
-            "hora_fin": horario_actual.hora_fin
-        }
-    ).first()
+def es_equipo_ocupado(error: IntegrityError) -> bool:
+    """True si la BD rechazó la fila por cruzarse con otra reserva del mismo equipo"""
+    diag = getattr(error.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) == "ex_reserva_equipo_periodo"
 
-    if reserva_existente:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El equipo ya está reservado en este horario"
-        )
+def actualizar_periodo_reservas(db: Session, id_horario: int):
+    """Sincronizar reserva.periodo con el horario; IntegrityError si un equipo queda con reservas cruzadas"""
+    db.execute(ACTUALIZAR_PERIODO_RESERVAS, {"id_horario": id_horario})
 
-def create_reserva(db: Session, reserva: dict, user_roles: list):
+def create_reserva(db: Session, reserva: dict) -> Dict[str, Any]:
+    """Validar (una consulta), ocupar un lugar del horario e insertar la reserva en la misma transacción"""
     try:
-        # Validaciones adicionales para clientes
-        if "cliente" in user_roles:
-            # Obtener categoría del cliente
-            cliente_categoria = db.execute(
-                "SELECT categoria FROM usuario WHERE id_usuario = :id_usuario",
-                {"id_usuario": reserva["id_usuario"]}
-            ).scalar()
-            
-            # Obtener tipo de horario
-            horario_tipo = db.execute(
-                "SELECT tipo FROM horario WHERE id_horario = :id_horario",
-                {"id_horario": reserva["id_horario"]}
-            ).scalar()
-            
-            # Validar coincidencia de categoría
-            if cliente_categoria != horario_tipo:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Tu categoría es {cliente_categoria} pero intentas reservar un horario de {horario_tipo}"
-                )
-            
-            # Validar disponibilidad del equipo (solo para powerplate)
-            if reserva.get("id_equipo"):
-                validar_disponibilidad_equipo(db, reserva["id_equipo"], reserva["id_horario"])
-        
         # Ejecutar todas las validaciones
         validar_reserva(db, reserva)
         
-        # Crear la reserva
+        # Ocupar el lugar antes de insertar: si otra transacción llenó el horario, no hay fila
+        if db.execute(OCUPAR_LUGAR_HORARIO, {"id_horario": reserva["id_horario"]}).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El horario ha alcanzado su capacidad máxima"
+            )
+        
+        # Crear la reserva: el INSERT devuelve id_reserva y fecha_reserva (RETURNING)
         db_reserva = Reserva(**reserva)
         db.add(db_reserva)
+        try:
+            db.flush()
+        except IntegrityError as e:
+            if es_equipo_ocupado(e):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El equipo ya está reservado en este horario"
+                )
+            raise
+        
+        # Armar la respuesta antes del commit (después los atributos expiran y costarían otro SELECT)
+        respuesta = {columna.name: getattr(db_reserva, columna.name) for columna in Reserva.__table__.columns}
         db.commit()
-        db.refresh(db_reserva)
-        return db_reserva
+        return respuesta
         
     except HTTPException as he:
+        db.rollback()
         raise he
     except Exception as e:
         db.rollback()
@@ -230,20 +234,43 @@ def get_rutina_nombre_from_ejercicios(ejercicios_json):
     return str(ejercicios_json)
 
 
-def get_reservas_detalladas(db: Session, usuario_id: Optional[int] = None):
+def paginar_reservas(query, skip: int = 0, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Orden (fecha_reserva, id_reserva) descendente; con cursor se sigue desde ahí y se ignora skip"""
+    query = query.order_by(Reserva.fecha_reserva.desc(), Reserva.id_reserva.desc())
+    if cursor:
+        query = despues_del_cursor(query, (Reserva.fecha_reserva, Reserva.id_reserva),
+                                   decodificar_cursor(cursor, datetime, int), descendente=True)
+    elif skip:
+        query = query.offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def contar_reservas(db: Session, usuario_id: Optional[int] = None) -> int:
+    query = db.query(func.count(Reserva.id_reserva))
+    if usuario_id:
+        query = query.filter(Reserva.id_usuario == usuario_id)
+    return query.scalar()
+
+def get_reservas_detalladas(
+    db: Session,
+    usuario_id: Optional[int] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
     query = db.query(Reserva)\
         .options(
             joinedload(Reserva.usuario),
             joinedload(Reserva.horario).joinedload(Horario.entrenador),
             joinedload(Reserva.horario).joinedload(Horario.rutina),
             joinedload(Reserva.equipo)
-        )\
-        .order_by(Reserva.fecha_reserva.desc())
+        )
 
     if usuario_id:
         query = query.filter(Reserva.id_usuario == usuario_id)
 
-    reservas = query.all()
+    reservas = paginar_reservas(query, skip, limit, cursor).all()
 
     return [
         {
@@ -298,20 +325,15 @@ def get_reservas_detalladas(db: Session, usuario_id: Optional[int] = None):
         for r in reservas
     ]
 
-def get_reservas_con_detalles(db: Session, skip: int = 0, limit: int = 100) -> List[Reserva]:
-    return (
-        db.query(Reserva)
-        .options(
-            joinedload(Reserva.usuario),
-            joinedload(Reserva.horario),
-            joinedload(Reserva.equipo),
-            joinedload(Reserva.rutina)
-        )
-        .order_by(Reserva.fecha_reserva.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+def get_reservas_con_detalles(db: Session, skip: int = 0, limit: int = 100,
+                              cursor: Optional[str] = None) -> List[Reserva]:
+    query = db.query(Reserva).options(
+        joinedload(Reserva.usuario),
+        joinedload(Reserva.horario),
+        joinedload(Reserva.equipo),
+        joinedload(Reserva.rutina)
     )
+    return paginar_reservas(query, skip, limit, cursor).all()
 
 def cancelar_reserva(db: Session, reserva_id: int, current_user_id: int, es_admin: bool):
     # Obtener reserva con todas las relaciones necesarias
@@ -352,8 +374,15 @@ def cancelar_reserva(db: Session, reserva_id: int, current_user_id: int, es_admi
     if reserva.horario.tipo == "powerplate" and reserva.id_equipo:
         resultado["equipo_liberado"] = True
 
-    # Actualizar estado de la reserva
-    reserva.estado = "cancelada"
+    # Actualizar estado de la reserva y devolver el lugar al horario en la misma transacción
+    cancelada = db.execute(CANCELAR_RESERVA, {"id_reserva": reserva_id}).first()
+    if cancelada is None:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La reserva ya está cancelada"
+        )
+    db.execute(LIBERAR_LUGAR_HORARIO, {"id_horario": cancelada.id_horario})
     
     db.commit()
     db.refresh(reserva)
@@ -416,7 +445,7 @@ def obtener_rutinas_realizadas_usuario(db: Session, user_id: int, dias_atras: in
     desde = datetime.now() - timedelta(days=dias_atras)
     
     # Consultar reservas con asistencia registrada
-    reservas_realizadas = db.execute("""
+    reservas_realizadas = db.execute(text("""
         SELECT 
             r.fecha_reserva,
             r.asistencia,
@@ -434,15 +463,15 @@ def obtener_rutinas_realizadas_usuario(db: Session, user_id: int, dias_atras: in
         AND r.fecha_reserva >= :desde
         AND r.estado = 'confirmada'
         ORDER BY r.fecha_reserva DESC
-    """, {
+    """), {
         "user_id": user_id,
         "desde": desde
     }).fetchall()
     
     historial_rutinas = []
     for reserva in reservas_realizadas:
-        # Calcular días desde el entrenamiento
-        dias_desde = (datetime.now() - reserva.fecha_reserva).days
+        # Calcular días desde el entrenamiento (fecha_reserva es timestamptz: comparar con la misma zona)
+        dias_desde = (datetime.now(reserva.fecha_reserva.tzinfo) - reserva.fecha_reserva).days
         
         # Generar nombre de rutina a partir de los ejercicios
         ejercicios_lista = parse_json_field(reserva.nombre_ejercicio) if reserva.nombre_ejercicio else []
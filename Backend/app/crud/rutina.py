@@ -119,11 +119,20 @@ def get_rutina_with_entrenador(db: Session, rutina_id: int) -> Optional[Dict[str
         } if entrenador else None
     }
 
+def filtro_musculo(musculo: str):
+    """Rutinas que trabajan `musculo`: contención JSONB (@>), resuelta con el índice GIN de partes_musculo"""
+    # partes_musculo puede ser ["espalda", ...] o, con varios músculos por ejercicio, [["espalda", ...], ...]
+    return or_(
+        Rutina.partes_musculo.contains([musculo]),
+        Rutina.partes_musculo.contains([[musculo]])
+    )
+
 def list_rutinas(
     db: Session, 
     current_user: Union[Dict[str, Any], User],
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    musculo: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Lista rutinas con diferentes privilegios - VERSIÓN ARRAYS JSON
@@ -144,6 +153,9 @@ def list_rutinas(
     if current_user_rol != "administrador":
         query = query.filter(Rutina.id_usuario == current_user_id)
     
+    if musculo:
+        query = query.filter(filtro_musculo(musculo))
+    
     rutinas = query.offset(skip).limit(limit).all()
     result = []
     
@@ -169,10 +181,15 @@ def search_rutinas(
     current_user: Union[Dict[str, Any], object],
     search_term: str,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    musculo: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     Busca rutinas - BÚSQUEDA EXACTA (DEBE CONTENER TODOS LOS TÉRMINOS)
+    
+    El filtro se arma en SQL y se ejecuta en la base de datos (antes se traían todas las
+    rutinas y se filtraban en Python). Los términos que son un músculo válido y el parámetro
+    `musculo` se resuelven por contención JSONB con el índice GIN.
     """
     def get_user_attr(user, attr):
         if isinstance(user, dict):
@@ -190,61 +207,33 @@ def search_rutinas(
     if current_user_rol != "administrador":
         query = query.filter(Rutina.id_usuario == current_user_id)
     
-    all_rutinas = query.all()
+    if musculo:
+        query = query.filter(filtro_musculo(musculo))
     
     # Dividir el término de búsqueda en palabras individuales
     palabras_busqueda = [palabra.lower() for palabra in search_term.split()]
+    musculos_validos = {parte.value for parte in ParteMusculo}
     
-    # Filtramos en memoria - DEBE CONTENER TODAS las palabras
-    rutinas_filtradas = []
-    
-    for rutina in all_rutinas:
-        # Verificar si la rutina contiene TODOS los términos buscados
-        contiene_todos = True
+    # DEBE CONTENER TODAS las palabras: un filtro por palabra (AND entre ellos)
+    for palabra in palabras_busqueda:
+        # Buscar en nombres de ejercicios (texto del array JSON)
+        condiciones = [func.lower(cast(Rutina.nombre_ejercicio, Text)).contains(palabra, autoescape=True)]
         
-        # Para cada palabra de búsqueda, verificar si existe en algún campo
-        for palabra in palabras_busqueda:
-            palabra_encontrada = False
-            
-            # Buscar en nombres de ejercicios
-            if rutina.nombre_ejercicio:
-                for ejercicio in rutina.nombre_ejercicio:
-                    if palabra in str(ejercicio).lower():
-                        palabra_encontrada = True
-                        break
-            
-            # Si no se encontró en ejercicios, buscar en músculos
-            if not palabra_encontrada and rutina.partes_musculo:
-                for musculo in rutina.partes_musculo:
-                    if palabra in str(musculo).lower():
-                        palabra_encontrada = True
-                        break
-            
-            # Si no se encontró en músculos, buscar en números (solo si la palabra es numérica)
-            if not palabra_encontrada and palabra.isdigit():
-                if rutina.repeticiones:
-                    for repeticion in rutina.repeticiones:
-                        if palabra == str(repeticion):
-                            palabra_encontrada = True
-                            break
-                
-                if not palabra_encontrada and rutina.series:
-                    for serie in rutina.series:
-                        if palabra == str(serie):
-                            palabra_encontrada = True
-                            break
-            
-            # Si alguna palabra no se encontró, esta rutina no califica
-            if not palabra_encontrada:
-                contiene_todos = False
-                break
+        # Buscar en músculos: un músculo completo va por el índice, una parte de palabra por texto
+        if palabra in musculos_validos:
+            condiciones.append(filtro_musculo(palabra))
+        else:
+            condiciones.append(func.lower(cast(Rutina.partes_musculo, Text)).contains(palabra, autoescape=True))
+        
+        # Buscar en números (solo si la palabra es numérica)
+        if palabra.isdigit():
+            condiciones.append(Rutina.repeticiones.contains([int(palabra)]))
+            condiciones.append(Rutina.series.contains([int(palabra)]))
         
-        # Si contiene todos los términos, agregar a resultados
-        if contiene_todos:
-            rutinas_filtradas.append(rutina)
+        query = query.filter(or_(*condiciones))
     
     # Aplicar paginación
-    rutinas_paginadas = rutinas_filtradas[skip:skip + limit]
+    rutinas_paginadas = query.order_by(Rutina.id_rutina).offset(skip).limit(limit).all()
     
     result = []
     for rutina in rutinas_paginadas:
@@ -1,18 +1,156 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import delete, func, insert, or_, select, update
 from sqlalchemy.orm import Session
-from app.models.rutina_ia import RutinaIA
+from app.models.rutina_ia import PlanRutinaIA, RutinaIA, RutinaIAArchivada
 from app.schemas.rutina_ia import RutinaIACreate
 
+def calcular_hash_plan(plan: Dict[str, Any]) -> str:
+    """SHA-256 del plan en JSON canónico (claves ordenadas): mismo contenido -> mismo hash"""
+    contenido = json.dumps(plan, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+def _guardar_planes(db: Session, planes: Dict[str, Dict[str, Any]]) -> int:
+    """Insertar solo los planes cuyo hash no existe todavía (sin commit); devuelve cuántos eran nuevos"""
+    if not planes:
+        return 0
+    
+    existentes = {
+        hash_plan for (hash_plan,) in
+        db.query(PlanRutinaIA.hash_plan).filter(PlanRutinaIA.hash_plan.in_(list(planes)))
+    }
+    nuevos = [{"hash_plan": h, "contenido": p} for h, p in planes.items() if h not in existentes]
+    if not nuevos:
+        return 0
+    
+    # Otro worker puede insertar el mismo hash entre el SELECT y el INSERT: ignorar el conflicto
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        db.execute(insert(PlanRutinaIA).values(nuevos).on_conflict_do_nothing(index_elements=["hash_plan"]))
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        db.execute(insert(PlanRutinaIA).values(nuevos).on_conflict_do_nothing(index_elements=["hash_plan"]))
+    else:
+        db.add_all([PlanRutinaIA(**plan) for plan in nuevos])
+    return len(nuevos)
+
+def _rutina_desde_datos(rutina_data: RutinaIACreate, hash_plan: str) -> RutinaIA:
+    datos = rutina_data.dict(exclude={"plan_semanal"}, exclude_none=True)
+    return RutinaIA(**datos, plan_hash=hash_plan)
+
 def create_rutina_ia(db: Session, rutina_data: RutinaIACreate) -> RutinaIA:
     """Crear una nueva rutina generada por IA"""
-    db_rutina = RutinaIA(**rutina_data.dict())
+    hash_plan = calcular_hash_plan(rutina_data.plan_semanal)
+    _guardar_planes(db, {hash_plan: rutina_data.plan_semanal})
+    
+    db_rutina = _rutina_desde_datos(rutina_data, hash_plan)
     db.add(db_rutina)
     db.commit()
     db.refresh(db_rutina)
     return db_rutina
 
-def get_rutinas_ia_by_user(db: Session, usuario_id: int, limit: int = 10):
-    """Obtener rutinas de IA de un usuario"""
-    return db.query(RutinaIA).filter(
+def get_rutinas_ia_by_user(db: Session, usuario_id: int, limit: int = 10, musculo: Optional[str] = None):
+    """Obtener rutinas de IA de un usuario (opcionalmente, solo las que trabajan `musculo`)"""
+    query = db.query(RutinaIA).filter(
         RutinaIA.usuario_id == usuario_id,
         RutinaIA.activa == True
-    ).order_by(RutinaIA.fecha_generacion.desc()).limit(limit).all()
\ No newline at end of file
+    )
+    
+    if musculo:
+        # Contención JSONB sobre el plan compartido (índice GIN) o el plan embebido de filas antiguas
+        patron = {"plan_detallado": [{"grupos_musculares": [musculo]}]}
+        query = query.outerjoin(PlanRutinaIA, PlanRutinaIA.hash_plan == RutinaIA.plan_hash).filter(or_(
+            PlanRutinaIA.contenido.contains(patron),
+            RutinaIA.plan_semanal.contains(patron)
+        ))
+    
+    return query.order_by(RutinaIA.fecha_generacion.desc()).limit(limit).all()
+
+def create_rutinas_ia_bulk(db: Session, rutinas_data: List[RutinaIACreate]) -> List[int]:
+    """Crear varias rutinas de IA en una sola transacción (INSERT multi-fila)"""
+    # Los planes repetidos dentro del lote (o ya guardados) se escriben una sola vez
+    hashes = [calcular_hash_plan(rutina_data.plan_semanal) for rutina_data in rutinas_data]
+    _guardar_planes(db, {h: r.plan_semanal for h, r in zip(hashes, rutinas_data)})
+    
+    db_rutinas = [_rutina_desde_datos(rutina_data, h) for rutina_data, h in zip(rutinas_data, hashes)]
+    db.add_all(db_rutinas)
+    db.flush()
+    
+    # Leer los IDs antes del commit (después quedarían expirados y costarían un SELECT cada uno)
+    ids = [rutina.id_rutina_ia for rutina in db_rutinas]
+    db.commit()
+    return ids
+
+def obtener_planes(db: Session, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Resolver varios hashes de plan con una sola consulta (hash -> contenido)"""
+    hashes = {h for h in hashes if h}
+    if not hashes:
+        return {}
+    return dict(
+        db.query(PlanRutinaIA.hash_plan, PlanRutinaIA.contenido)
+        .filter(PlanRutinaIA.hash_plan.in_(list(hashes)))
+        .all()
+    )
+
+def plan_de_rutina(rutina: RutinaIA, planes: Dict[str, Dict[str, Any]]):
+    """Plan de una rutina: por hash, o el JSON embebido en filas anteriores a plan_rutina_ia"""
+    if rutina.plan_hash:
+        return planes.get(rutina.plan_hash)
+    return rutina.plan_semanal
+
+def desactivar_rutinas_antiguas(db: Session, mantener_activas: int) -> int:
+    """Dejar activas solo las `mantener_activas` rutinas más recientes de cada usuario (un UPDATE)"""
+    posicion = func.row_number().over(
+        partition_by=RutinaIA.usuario_id,
+        order_by=(RutinaIA.fecha_generacion.desc(), RutinaIA.id_rutina_ia.desc())
+    )
+    ranking = (
+        select(RutinaIA.id_rutina_ia, posicion.label("posicion"))
+        .where(RutinaIA.activa == True)
+        .subquery()
+    )
+    sobrantes = select(ranking.c.id_rutina_ia).where(ranking.c.posicion > mantener_activas)
+    
+    resultado = db.execute(
+        update(RutinaIA)
+        .where(RutinaIA.id_rutina_ia.in_(sobrantes))
+        .values(activa=False)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return resultado.rowcount
+
+def archivar_rutinas_inactivas(db: Session, dias_retencion: int, tamano_lote: int = 1000) -> int:
+    """Mover a rutina_ia_archivo las rutinas inactivas generadas hace más de `dias_retencion` días
+    
+    Se mueve por lotes (INSERT ... SELECT + DELETE, una transacción por lote) para no bloquear
+    rutina_ia mucho tiempo.
+    """
+    limite = datetime.now(timezone.utc) - timedelta(days=dias_retencion)
+    columnas = [columna.name for columna in RutinaIAArchivada.__table__.columns if columna.name != "fecha_archivado"]
+    total = 0
+    
+    while True:
+        ids = db.execute(
+            select(RutinaIA.id_rutina_ia)
+            .where(RutinaIA.activa == False, RutinaIA.fecha_generacion < limite)
+            .order_by(RutinaIA.id_rutina_ia)
+            .limit(tamano_lote)
+        ).scalars().all()
+        if not ids:
+            return total
+        
+        db.execute(insert(RutinaIAArchivada).from_select(
+            columnas,
+            select(*[RutinaIA.__table__.c[nombre] for nombre in columnas]).where(RutinaIA.id_rutina_ia.in_(ids))
+        ))
+        db.execute(
+            delete(RutinaIA)
+            .where(RutinaIA.id_rutina_ia.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        total += len(ids)
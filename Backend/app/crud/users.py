@@ -8,6 +8,7 @@ from typing import Optional, List
 from datetime import datetime
 from sqlalchemy import or_, and_
 from app.crud.metricas_usuario import create_metrica_usuario
+from app.utils.paginacion import decodificar_cursor, despues_del_cursor
 
 def get_user_with_metrics(db: Session, user_id: int):
     return db.query(Usuario).filter(Usuario.id == user_id).first()
@@ -20,8 +21,17 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(Usuario).filter(Usuario.correo == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Usuario).offset(skip).limit(limit).all()
+def paginar_usuarios(query, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """Orden por id_usuario; con cursor se sigue desde ese id (por la PK) y se ignora skip"""
+    query = query.order_by(Usuario.id_usuario)
+    if cursor:
+        query = despues_del_cursor(query, (Usuario.id_usuario,), decodificar_cursor(cursor, int))
+    else:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return paginar_usuarios(db.query(Usuario), skip, limit, cursor).all()
 
 def create_user(db: Session, user: UserCreate):
     rol = user.rol.value if user.rol else "cliente"
@@ -98,7 +108,8 @@ def search_users(
     objetivo: Optional[str] = None,
     nivel: Optional[str] = None,  # <-- NUEVO PARÁMETRO
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Usuario]:
     query = db.query(Usuario)
     
@@ -163,7 +174,7 @@ def search_users(
     if nivel:
         query = query.filter(Usuario.nivel == nivel)
     
-    return query.offset(skip).limit(limit).all()
+    return paginar_usuarios(query, skip, limit, cursor).all()
 
 def update_user(db: Session, user_id: int, user_update: UserUpdate): 
     db_user = get_user(db, user_id)
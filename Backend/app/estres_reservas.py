@@ -0,0 +1,200 @@
+# estres_reservas.py - Prueba de concurrencia del cupo de los horarios
+#
+# Crea un horario de calistenia con cupo pequeño y N clientes de prueba, lanza N reservas a la vez
+# (create_reserva, cada una con su propia conexión) y comprueba que no se sobrevende:
+# reservas confirmadas == contador del horario <= capacidad. Después cancela cada reserva dos veces
+# en paralelo y comprueba que el contador vuelve a 0. Al final borra los datos de prueba.
+# Termina con código 1 si algo no cuadra.
+#
+# Uso (desde Backend/, con DATABASE_URL apuntando a PostgreSQL y `alembic upgrade head` aplicado):
+#   python -m app.estres_reservas
+#   python -m app.estres_reservas --peticiones 500 --capacidad 20 --hilos 50
+
+import argparse
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as hora, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.reservas import cancelar_reserva, create_reserva
+from app.database import DATABASE_URL
+from app.models.horarios import Horario
+from app.models.reservas import Reserva
+from app.models.users import Usuario
+
+
+def crear_datos(Sesion, peticiones: int, capacidad: int) -> dict:
+    """Entrenador, horario y clientes de prueba (correos únicos por corrida)"""
+    corrida = uuid.uuid4().hex[:8]
+    db = Sesion()
+    try:
+        def usuario(rol, i):
+            return Usuario(rol=rol, nombre="Estres", apellido_p=f"{rol} {i}",
+                           correo=f"estres_{corrida}_{rol}_{i}@templo.test", contrasena="x",
+                           genero="Masculino", objetivo="ganancia muscular", categoria="calistenia", activo=True)
+
+        entrenador = usuario("entrenador", 0)
+        db.add(entrenador)
+        db.flush()
+
+        horario = Horario(nombre_horario=f"Estrés {corrida}", id_entrenador=entrenador.id_usuario,
+                          tipo="calistenia", fecha=date.today() + timedelta(days=1),
+                          hora_inicio=hora(7), hora_fin=hora(8), capacidad=capacidad)
+        clientes = [usuario("cliente", i) for i in range(peticiones)]
+        db.add(horario)
+        db.add_all(clientes)
+        db.flush()
+
+        # Leer los ids antes del commit (después expiran y cada uno costaría un SELECT)
+        datos = {
+            "id_entrenador": entrenador.id_usuario,
+            "id_horario": horario.id_horario,
+            "clientes": [c.id_usuario for c in clientes],
+        }
+        db.commit()
+        return datos
+    finally:
+        db.close()
+
+
+def en_paralelo(hilos: int, tareas: list) -> list:
+    """Correr las tareas en hilos, soltándolas todas juntas para maximizar la contención"""
+    salida = threading.Event()
+
+    def esperar_y_correr(tarea):
+        salida.wait()
+        return tarea()
+
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        futuros = [executor.submit(esperar_y_correr, tarea) for tarea in tareas]
+        salida.set()
+        return [f.result() for f in futuros]
+
+
+def intentar(Sesion, operacion):
+    """Ejecutar operacion(db) con su propia sesión; devuelve "ok" o el detalle del error"""
+    db = Sesion()
+    try:
+        operacion(db)
+        return "ok"
+    except HTTPException as e:
+        return e.detail
+    finally:
+        db.close()
+
+
+def estado_horario(Sesion, id_horario: int):
+    db = Sesion()
+    try:
+        return db.execute(text("""
+            SELECT
+                h.capacidad,
+                h.reservas_confirmadas AS contador,
+                (SELECT COUNT(*) FROM reserva r
+                 WHERE r.id_horario = h.id_horario AND r.estado = 'confirmada') AS confirmadas
+            FROM horario h
+            WHERE h.id_horario = :id_horario
+        """), {"id_horario": id_horario}).one()
+    finally:
+        db.close()
+
+
+def borrar_datos(Sesion, datos: dict):
+    db = Sesion()
+    try:
+        db.query(Reserva).filter(Reserva.id_horario == datos["id_horario"]).delete(synchronize_session=False)
+        db.query(Horario).filter(Horario.id_horario == datos["id_horario"]).delete(synchronize_session=False)
+        db.query(Usuario).filter(
+            Usuario.id_usuario.in_(datos["clientes"] + [datos["id_entrenador"]])
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def mostrar(resultados: list):
+    for detalle, cantidad in Counter(resultados).most_common():
+        print(f"     {cantidad:>5} x {detalle}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprobar que las reservas simultáneas no sobrepasan el cupo")
+    parser.add_argument('--peticiones', type=int, default=500, help="Reservas simultáneas (una por cliente)")
+    parser.add_argument('--capacidad', type=int, default=20, help="Cupo del horario de prueba")
+    parser.add_argument('--hilos', type=int, default=50, help="Conexiones en paralelo")
+    args = parser.parse_args()
+
+    # Motor propio: el pool de la API (5 + 10) se quedaría corto para los hilos
+    engine = create_engine(DATABASE_URL, pool_size=args.hilos, max_overflow=0)
+    if engine.dialect.name != "postgresql":
+        print("❌ Esta prueba necesita PostgreSQL (DATABASE_URL)")
+        sys.exit(1)
+    Sesion = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    datos = crear_datos(Sesion, args.peticiones, args.capacidad)
+    fallos = []
+    try:
+        print(f"🏋️ {args.peticiones} reservas simultáneas sobre un horario de cupo {args.capacidad} "
+              f"({args.hilos} hilos)")
+        inicio = time.perf_counter()
+        resultados = en_paralelo(args.hilos, [
+            (lambda id_usuario=id_usuario: intentar(Sesion, lambda db: create_reserva(db, {
+                "id_usuario": id_usuario,
+                "id_horario": datos["id_horario"],
+            })))
+            for id_usuario in datos["clientes"]
+        ])
+        print(f"   {time.perf_counter() - inicio:.2f} s")
+        mostrar(resultados)
+
+        estado = estado_horario(Sesion, datos["id_horario"])
+        aceptadas = resultados.count("ok")
+        print(f"📊 Aceptadas: {aceptadas} | confirmadas en BD: {estado.confirmadas} | "
+              f"contador: {estado.contador} | capacidad: {estado.capacidad}")
+        if estado.confirmadas > estado.capacidad:
+            fallos.append(f"sobreventa: {estado.confirmadas} confirmadas para {estado.capacidad} lugares")
+        if not (aceptadas == estado.confirmadas == estado.contador):
+            fallos.append("aceptadas, confirmadas y contador no coinciden")
+        if args.peticiones >= args.capacidad and estado.confirmadas != estado.capacidad:
+            fallos.append(f"quedaron lugares libres con {args.peticiones} peticiones")
+
+        # Cada reserva se cancela dos veces a la vez: solo una debe liberar el lugar
+        db = Sesion()
+        ids_reserva = [r.id_reserva for r in db.query(Reserva.id_reserva).filter(
+            Reserva.id_horario == datos["id_horario"], Reserva.estado == "confirmada")]
+        db.close()
+
+        print(f"\n🔁 Cancelando {len(ids_reserva)} reservas dos veces cada una en paralelo")
+        resultados = en_paralelo(args.hilos, [
+            (lambda id_reserva=id_reserva: intentar(
+                Sesion, lambda db: cancelar_reserva(db, id_reserva, datos["id_entrenador"], es_admin=True)))
+            for id_reserva in ids_reserva * 2
+        ])
+        mostrar(resultados)
+
+        estado = estado_horario(Sesion, datos["id_horario"])
+        print(f"📊 Confirmadas en BD: {estado.confirmadas} | contador: {estado.contador}")
+        if resultados.count("ok") != len(ids_reserva):
+            fallos.append(f"{resultados.count('ok')} cancelaciones aceptadas para {len(ids_reserva)} reservas")
+        if estado.confirmadas != 0 or estado.contador != 0:
+            fallos.append("el contador no volvió a 0 después de cancelar")
+    finally:
+        borrar_datos(Sesion, datos)
+        engine.dispose()
+
+    if fallos:
+        for fallo in fallos:
+            print(f"❌ {fallo}")
+        sys.exit(1)
+    print("\n✅ Sin sobreventa: el cupo y el contador se mantienen con reservas y cancelaciones simultáneas")
+
+
+if __name__ == "__main__":
+    main()
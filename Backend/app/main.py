@@ -11,9 +11,14 @@ from app.models.reservas import Reserva
 from app.models.metricas_usuario import MetricaUsuario
 from app.routers import users, metricas_usuario, auth, equipos, horarios, reservas, ai_routines  # ✅ Agregar ai_routines
 
-# ✅ NUEVO: Importar modelo de IA
-from app.models.ai_routines import ai_model
+# ✅ NUEVO: Referencia al modelo de IA (el motor se importa en segundo plano o al primer uso)
+from app.models.modelo_activo import modelo_activo
+from app.utils.trabajos_entrenamiento import cerrar_executor
+from app.utils.ejecutor_ia import ejecutor_ia
+from app.utils.escritura_rutinas_ia import escritura_rutinas_ia
+from app.utils.paginacion import CABECERA_CURSOR
 import os
+import asyncio
 
 import logging
 from datetime import datetime
@@ -51,7 +56,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permitir todos los métodos
     allow_headers=["*"],  # Permitir todos los headers
-    expose_headers=["*"],  # Exponer todos los headers
+    # Con allow_credentials el navegador ignora "*": los headers que lee el frontend van por nombre
+    expose_headers=["*", CABECERA_CURSOR],
 )
 
 
@@ -101,18 +107,17 @@ def read_root():
         },
         "ai_endpoints": {
             "entrenar_modelo": "/ai/train-model",
+            "estado_entrenamiento": "/ai/train-jobs/{trabajo_id}",
             "estado_modelo": "/ai/model-status",
             "info_dataset": "/ai/dataset-info",
             "rutina_nueva": "/ai/predict-routine",
-            "rutina_usuario": "/ai/predict-routine-for-user/{user_id}"
+            "rutina_usuario": "/ai/predict-routine-for-user/{user_id}",
+            "rutinas_lote": "/ai/predict-routine-batch"
         }
     }
 
-# ✅ ACTUALIZADO: Evento de inicio para cargar modelo de IA automáticamente
-@app.on_event("startup")
-async def startup_event():
-    logger.info("Iniciando Templo2 Gym API con IA...")
-    
+def precargar_modelo_ia():
+    """Importar el motor de IA y cargar el modelo entrenado (se ejecuta en segundo plano)"""
     # ✅ NUEVO: Intentar cargar modelo de IA existente
     try:
         modelo_path = 'modelo_calisthenics.pkl'
@@ -120,7 +125,9 @@ async def startup_event():
         if os.path.exists(modelo_path):
             logger.info("Encontrado archivo de modelo entrenado, cargando...")
             
-            if ai_model.cargar_modelo(modelo_path):
+            ai_model = modelo_activo.cargar(modelo_path)
+            
+            if ai_model is not None:
                 logger.info("Modelo de IA cargado automáticamente al iniciar")
                 logger.info(f"Dataset disponible: {ai_model.dataset is not None}")
                 
@@ -141,10 +148,35 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Error durante inicialización de IA: {str(e)}")
         logger.info("El sistema funcionará, pero será necesario entrenar el modelo")
+
+# ✅ ACTUALIZADO: Evento de inicio; el modelo de IA se carga en segundo plano
+@app.on_event("startup")
+async def startup_event():
+    logger.info("Iniciando Templo2 Gym API con IA...")
+    
+    # pandas/scikit-learn tardan en importarse: no bloquear el arranque con eso.
+    # IA_PRECARGA=0 deja la carga para la primera petición a /ai
+    if modelo_activo.esta_importado() and modelo_activo.actual().esta_entrenado():
+        # Worker de gunicorn con preload_app: el modelo se heredó del maestro (ver gunicorn.conf.py)
+        logger.info("Modelo de IA heredado del proceso maestro, sin precarga")
+    elif os.getenv("IA_PRECARGA", "1") != "0":
+        app.state.precarga_ia = asyncio.get_running_loop().run_in_executor(None, precargar_modelo_ia)
+        logger.info("Precarga del modelo de IA iniciada en segundo plano")
+    else:
+        logger.info("Precarga de IA desactivada: el modelo se cargará en la primera petición a /ai")
     
     logger.info("Sistema de IA de rutinas disponible")
     logger.info("Documentación API: http://localhost:8000/docs")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Terminar el proceso de entrenamiento en segundo plano, si existe
+    cerrar_executor()
+    # Y los hilos del pool de generación de rutinas
+    ejecutor_ia.cerrar()
+    # Guardar las rutinas de IA que quedaron en la cola de escritura diferida
+    escritura_rutinas_ia.cerrar()
+
 # Incluir routers con prefijos
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(users.router, prefix="/users", tags=["users"])
@@ -0,0 +1,95 @@
+# migrar_planes_rutina_ia.py - Pasar rutina_ia a planes compartidos por hash (plan_rutina_ia)
+#
+# Recorre por lotes las filas que aún guardan el plan completo en plan_semanal: calcula el hash
+# del contenido, lo inserta una sola vez en plan_rutina_ia y deja plan_semanal en NULL.
+# Muestra el tamaño de las tablas antes y después (PostgreSQL).
+#
+# Uso (desde Backend/, con DATABASE_URL configurada y el esquema al día con `alembic upgrade head`):
+#   python -m app.migrar_planes_rutina_ia
+#   python -m app.migrar_planes_rutina_ia --lote 1000
+
+import argparse
+
+from sqlalchemy import text
+
+from app.crud.rutina_ia import _guardar_planes, calcular_hash_plan
+from app.database import SessionLocal
+from app.models.rutina_ia import RutinaIA
+
+
+def tamano_tablas(db) -> dict:
+    """Tamaño en MB de rutina_ia y plan_rutina_ia (incluye TOAST e índices)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return {}
+    return {
+        tabla: db.execute(text(f"SELECT pg_total_relation_size('{tabla}') / 1048576.0")).scalar()
+        for tabla in ("rutina_ia", "plan_rutina_ia")
+    }
+
+
+def separar_plan(plan_semanal: dict):
+    """Plan embebido antiguo -> (contenido compartible, semilla, modelo_usado)"""
+    metadata = plan_semanal.get("metadata") or {}
+    contenido = {
+        "plan_detallado": plan_semanal.get("plan_detallado", []),
+        "resumen": plan_semanal.get("resumen", {})
+    }
+    return contenido, metadata.get("semilla"), metadata.get("modelo_usado")
+
+
+def migrar(tamano_lote: int) -> dict:
+    db = SessionLocal()
+    filas = 0
+    planes_nuevos = 0
+    try:
+        antes = tamano_tablas(db)
+        while True:
+            lote = db.query(RutinaIA).filter(
+                RutinaIA.plan_hash.is_(None),
+                RutinaIA.plan_semanal.isnot(None)
+            ).order_by(RutinaIA.id_rutina_ia).limit(tamano_lote).all()
+            if not lote:
+                break
+
+            planes = {}
+            for rutina in lote:
+                contenido, semilla, modelo_usado = separar_plan(rutina.plan_semanal)
+                hash_plan = calcular_hash_plan(contenido)
+                planes[hash_plan] = contenido
+                rutina.plan_hash = hash_plan
+                rutina.semilla = rutina.semilla if rutina.semilla is not None else semilla
+                if modelo_usado:
+                    rutina.modelo_usado = modelo_usado
+                rutina.plan_semanal = None
+
+            planes_nuevos += _guardar_planes(db, planes)
+            db.commit()
+            filas += len(lote)
+            print(f"   ... {filas} rutinas migradas, {planes_nuevos} planes distintos")
+
+        despues = tamano_tablas(db)
+    finally:
+        db.close()
+
+    return {"filas": filas, "planes_nuevos": planes_nuevos, "antes": antes, "despues": despues}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrar rutina_ia a planes deduplicados por hash")
+    parser.add_argument('--lote', type=int, default=500, help="Filas por transacción")
+    args = parser.parse_args()
+
+    print("🔄 Migrando planes de rutina_ia a plan_rutina_ia...")
+    resultado = migrar(args.lote)
+
+    print(f"✅ {resultado['filas']} rutinas migradas -> {resultado['planes_nuevos']} planes nuevos en plan_rutina_ia")
+    if resultado['filas']:
+        print(f"   Deduplicación: {resultado['filas'] / max(resultado['planes_nuevos'], 1):.1f} rutinas por plan")
+    for tabla, antes in resultado['antes'].items():
+        print(f"💾 {tabla}: {antes:.2f} MB -> {resultado['despues'][tabla]:.2f} MB")
+    if resultado['antes']:
+        print("   (el espacio liberado en rutina_ia se recupera con VACUUM FULL rutina_ia)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,17 +11,54 @@ import pickle
 import os
 from typing import Dict, List, Tuple, Any
 import ast
-from collections import defaultdict, Counter
+from collections import Counter
 from app.crud.reservas import analizar_grupos_musculares_recientes, calcular_frecuencia_entrenamiento
+from app.utils.dataset_snapshot import cargar_snapshot, guardar_snapshot
+from app.utils.cache_rutinas import CacheRutinas
+from app.utils.semillas import crear_rng, derivar_semilla
+from app.models.predictores_nivel import (
+    PREDICTOR_POR_DEFECTO, PredictorArbolDestilado, clasificar_por_reglas, crear_predictor, destilar_arbol
+)
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
 
 class CalisthenicsAI:
+    """Modelo de rutinas: se construye con entrenar_modelo/cargar_modelo y, una vez publicado
+    en ModeloActivo (app/models/modelo_activo.py), queda congelado (solo lectura) para poder
+    compartirlo entre hilos."""
+    
     def __init__(self):
         # Modelo matemático
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.label_encoders = {}
         self.dataset = None
+        self.ruta_dataset = None  # CSV con el que se cargó/entrenó (se guarda con el modelo)
+        
+        # Backend que clasifica el nivel (bosque / reglas / arbol, ver predictores_nivel.py)
+        self.predictor = None
+        self.arbol_destilado = None
         self.ejercicios_por_perfil = {}
         
+        # Tabla larga con una fila por ejercicio (listas del CSV ya procesadas)
+        self.tabla_ejercicios = None
+        
+        # Índice (genero, objetivo, musculo) -> (inicio, fin) dentro de los arrays contiguos de abajo.
+        # Con arrays numpy en lugar de tuplas de objetos Python, los workers que hacen fork de un
+        # proceso con el modelo precargado leen estas páginas sin copiarlas (refcounts no se tocan)
+        self.indice_ejercicios = {}
+        self.ejercicios_codigos = None       # int32: posición en nombres_ejercicios
+        self.ejercicios_repeticiones = None  # int32
+        self.ejercicios_series = None        # int32
+        self.nombres_ejercicios = None       # array de str (sin objetos Python por ejercicio)
+        
+        # Particiones (genero, objetivo) -> (inicio, fin): los arrays están ordenados por partición,
+        # así cada una es un tramo contiguo que contiene los rangos de todos sus músculos
+        self.particiones = {}
+        self.filas_por_particion = {}        # (genero, objetivo) -> filas del dataset
+        
+        # Pools de rutinas diarias ya generadas por (genero, objetivo, nivel, dia)
+        self.cache_rutinas = CacheRutinas()
+        
         # CORREGIDO: Configuración específica para cada nivel
         self.config_ejercicios = {
             'principiante': {
@@ -70,80 +107,108 @@ class CalisthenicsAI:
         self.patrones_musculares = {}
         self.distribucion_dias = {}
 
-    def cargar_dataset(self, archivo_csv='dataset_rutinas_calistenia_mejorado.csv'):
-        """Cargar dataset real desde archivo CSV"""
-        try:
-            # RUTAS CORREGIDAS PARA TU ESTRUCTURA DE PROYECTO
-            possible_paths = [
-                # Ruta absoluta directa (más confiable)
-                r"C:\Users\USUARIO\Desktop\Proyecto_Grado\Backend\app\dataset\dataset_rutinas_calistenia_mejorado.csv",
-                
-                # Rutas relativas desde donde se ejecuta el código
-                "Backend/app/dataset/dataset_rutinas_calistenia_mejorado.csv",  # Desde raíz del proyecto
-                "app/dataset/dataset_rutinas_calistenia_mejorado.csv",          # Desde Backend/
-                f"dataset/{archivo_csv}",                                        # Por si está en dataset/
-                
-                # Rutas relativas desde la ubicación del archivo models/
-                os.path.join(os.path.dirname(__file__), '..', 'dataset', archivo_csv),  # Desde models/ a dataset/
-                os.path.join(os.path.dirname(__file__), '..', '..', 'Backend', 'app', 'dataset', archivo_csv),
-                
-                # Fallback con nombre solo
-                archivo_csv,
-            ]
+    def _rutas_candidatas(self, archivo_csv='dataset_rutinas_calistenia_mejorado.csv'):
+        """Rutas conocidas donde puede estar el CSV del dataset, en orden de preferencia"""
+        # RUTAS CORREGIDAS PARA TU ESTRUCTURA DE PROYECTO
+        return [
+            # La ruta tal cual (p. ej. la del trabajo de entrenamiento) tiene prioridad
+            archivo_csv,
             
-            df = None
-            ruta_encontrada = None
+            # Ruta absoluta directa (más confiable)
+            r"C:\Users\USUARIO\Desktop\Proyecto_Grado\Backend\app\dataset\dataset_rutinas_calistenia_mejorado.csv",
             
-            for path in possible_paths:
-                if os.path.exists(path):
-                    df = pd.read_csv(path)
-                    ruta_encontrada = path
-                    print(f"✅ Dataset cargado: {len(df)} registros desde {os.path.abspath(path)}")
-                    break
+            # Rutas relativas desde donde se ejecuta el código
+            "Backend/app/dataset/dataset_rutinas_calistenia_mejorado.csv",  # Desde raíz del proyecto
+            "app/dataset/dataset_rutinas_calistenia_mejorado.csv",          # Desde Backend/
+            f"dataset/{archivo_csv}",                                        # Por si está en dataset/
             
-            if df is None:
-                # Mostrar rutas intentadas para debug
-                print("❌ Dataset no encontrado en ninguna de estas rutas:")
-                print(f"📁 Directorio actual: {os.getcwd()}")
-                print(f"📁 Directorio del archivo: {os.path.dirname(__file__)}")
-                for path in possible_paths:
-                    abs_path = os.path.abspath(path)
-                    exists = "✅" if os.path.exists(path) else "❌"
-                    print(f"  {exists} {abs_path}")
-                
-                # Buscar el archivo manualmente
-                print("\n🔍 Buscando archivo manualmente...")
-                for root, dirs, files in os.walk(".."):  # Buscar en directorio padre
-                    for file in files:
-                        if file == archivo_csv:
-                            found_path = os.path.join(root, file)
-                            print(f"🔍 Encontrado en: {os.path.abspath(found_path)}")
-                            try:
-                                df = pd.read_csv(found_path)
-                                ruta_encontrada = found_path
-                                print(f"✅ Dataset cargado desde búsqueda manual: {len(df)} registros")
-                                break
-                            except Exception as ex:  
-                                print(f"❌ Error leyendo {found_path}: {ex}")
-                                continue
-                            
-                    if df is not None:
-                        break
+            # Rutas relativas desde la ubicación del archivo models/
+            os.path.join(os.path.dirname(__file__), '..', 'dataset', archivo_csv),  # Desde models/ a dataset/
+            os.path.join(os.path.dirname(__file__), '..', '..', 'Backend', 'app', 'dataset', archivo_csv),
+        ]
+
+    def _buscar_snapshot(self, archivo_csv='dataset_rutinas_calistenia_mejorado.csv'):
+        """Primer snapshot vigente junto a las rutas conocidas: (ruta_csv, (dataset, tabla)) o (None, None)"""
+        revisadas = set()
+        for ruta in self._rutas_candidatas(archivo_csv):
+            absoluta = os.path.abspath(ruta)
+            if absoluta in revisadas or not os.path.isfile(ruta):
+                continue
+            revisadas.add(absoluta)
+            
+            snapshot = cargar_snapshot(ruta)
+            if snapshot is not None:
+                return ruta, snapshot
+        
+        return None, None
+
+    def _resolver_ruta_dataset(self, archivo_csv='dataset_rutinas_calistenia_mejorado.csv'):
+        """Encontrar la ruta del CSV del dataset (sin leerlo)"""
+        possible_paths = self._rutas_candidatas(archivo_csv)
+        
+        for path in possible_paths:
+            if os.path.exists(path):
+                return path
+        
+        # Mostrar rutas intentadas para debug
+        print("❌ Dataset no encontrado en ninguna de estas rutas:")
+        print(f"📁 Directorio actual: {os.getcwd()}")
+        print(f"📁 Directorio del archivo: {os.path.dirname(__file__)}")
+        for path in possible_paths:
+            abs_path = os.path.abspath(path)
+            exists = "✅" if os.path.exists(path) else "❌"
+            print(f"  {exists} {abs_path}")
+        
+        # Buscar el archivo manualmente
+        print("\n🔍 Buscando archivo manualmente...")
+        for root, dirs, files in os.walk(".."):  # Buscar en directorio padre
+            for file in files:
+                if file == archivo_csv:
+                    found_path = os.path.join(root, file)
+                    print(f"🔍 Encontrado en: {os.path.abspath(found_path)}")
+                    return found_path
+        
+        return None
+
+    def cargar_dataset(self, archivo_csv='dataset_rutinas_calistenia_mejorado.csv'):
+        """Cargar dataset real desde archivo CSV (o desde su snapshot binario si está vigente)"""
+        try:
+            # Camino rápido: tablas ya procesadas y guardadas en binario, antes de buscar el CSV a mano
+            ruta_encontrada, snapshot = self._buscar_snapshot(archivo_csv)
+            
+            if snapshot is None:
+                ruta_encontrada = self._resolver_ruta_dataset(archivo_csv)
                 
-                if df is None:
+                if ruta_encontrada is None:
                     raise FileNotFoundError(f"No se encontró el archivo {archivo_csv} en ninguna ubicación")
+                
+                # Encontrado con la búsqueda manual: su snapshot todavía no se revisó
+                if ruta_encontrada not in self._rutas_candidatas(archivo_csv):
+                    snapshot = cargar_snapshot(ruta_encontrada)
+            
+            if snapshot is not None:
+                df, tabla_ejercicios = snapshot
+            else:
+                df = pd.read_csv(ruta_encontrada)
+                print(f"✅ Dataset cargado: {len(df)} registros desde {os.path.abspath(ruta_encontrada)}")
 
-            # Mapear nombres de columnas correctos
-            mapeo_columnas = {'TMB': 'tmb', 'día': 'dia'}
-            df = df.rename(columns=mapeo_columnas)
+                # Mapear nombres de columnas correctos
+                mapeo_columnas = {'TMB': 'tmb', 'día': 'dia'}
+                df = df.rename(columns=mapeo_columnas)
 
-            # Calcular IMC si no existe
-            if 'altura' in df.columns and 'peso' in df.columns and 'imc' not in df.columns:
-                df['imc'] = df['peso'] / (df['altura'] ** 2)
+                # Calcular IMC si no existe
+                if 'altura' in df.columns and 'peso' in df.columns and 'imc' not in df.columns:
+                    df['imc'] = df['peso'] / (df['altura'] ** 2)
 
-            # Limpiar columna parte_musculo
-            if 'parte_musculo' in df.columns:
-                df['parte_musculo'] = df['parte_musculo'].astype(str)
+                # Limpiar columna parte_musculo
+                if 'parte_musculo' in df.columns:
+                    df['parte_musculo'] = df['parte_musculo'].astype(str)
+                
+                # Procesar UNA sola vez las columnas con listas del CSV
+                tabla_ejercicios = self._explotar_dataset(df)
+                
+                # Guardar snapshot para los próximos arranques
+                guardar_snapshot(ruta_encontrada, df, tabla_ejercicios)
 
             # Mostrar información del dataset para debug
             print(f"📊 Objetivos en dataset: {df['objetivo'].unique()}")
@@ -151,10 +216,18 @@ class CalisthenicsAI:
             print(f"📊 Columnas disponibles: {list(df.columns)}")
 
             self.dataset = df
+            self.tabla_ejercicios = tabla_ejercicios
+            self.ruta_dataset = os.path.abspath(ruta_encontrada)
+            
+            # Construir índice de ejercicios por músculo (una sola vez por carga)
+            self._construir_indice_ejercicios()
             
             # Extraer patrones inteligentes del dataset
             self._extraer_patrones_inteligentes()
             
+            # Las rutinas cacheadas salieron del dataset anterior
+            self.cache_rutinas.invalidar()
+            
             return df
 
         except Exception as e:
@@ -163,32 +236,177 @@ class CalisthenicsAI:
             traceback.print_exc()
             return None
 
+    def _explotar_dataset(self, df):
+        """Expandir las columnas con listas a una tabla larga con una fila por ejercicio"""
+        columnas = ['genero', 'objetivo', 'dia', 'musculo', 'ejercicio', 'series', 'repeticiones']
+        origen = {'musculo': 'parte_musculo', 'ejercicio': 'ejercicio', 'series': 'series', 'repeticiones': 'repeticiones'}
+        
+        # 1. Partir todas las listas "['a', 'b']" de una vez (vectorizado)
+        partes = {destino: self._partir_listas(df[columna]) for destino, columna in origen.items()}
+        largos = {destino: partes[destino][1] for destino in origen}
+        
+        # Filas bien formadas: las cuatro columnas son listas no vacías del mismo largo
+        bien_formadas = np.ones(len(df), dtype=bool)
+        for destino, (_, largo_lista, es_lista) in partes.items():
+            bien_formadas &= es_lista & (largo_lista == largos['ejercicio'])
+        
+        filas_rapidas = np.flatnonzero(bien_formadas)
+        largo_rapidas = largos['ejercicio'][filas_rapidas]
+        bloques = [{
+            'fila': np.repeat(filas_rapidas, largo_rapidas),
+            'posicion': np.arange(largo_rapidas.sum()) - np.repeat(np.cumsum(largo_rapidas) - largo_rapidas, largo_rapidas),
+            **{destino: elementos[np.repeat(bien_formadas, largo_lista)] for destino, (elementos, largo_lista, _) in partes.items()}
+        }]
+        
+        # 2. Filas irregulares (largos distintos, valores sueltos): procesarlas una a una
+        filas_lentas = np.flatnonzero(~bien_formadas)
+        if len(filas_lentas):
+            lentas = {'fila': [], 'posicion': [], **{destino: [] for destino in origen}}
+            
+            for fila in filas_lentas:
+                registro = df.iloc[fila]
+                musculos_lista = self.procesar_lista_string(registro['parte_musculo'], ['pecho'])
+                ejercicios_lista = self.procesar_lista_string(registro['ejercicio'], ['flexiones'])
+                reps_lista = self.procesar_lista_numerica(registro['repeticiones'], [12])
+                series_lista = self.procesar_lista_numerica(registro['series'], [3])
+                
+                max_length = max(len(musculos_lista), len(ejercicios_lista), len(reps_lista), len(series_lista))
+                
+                for i in range(max_length):
+                    lentas['fila'].append(fila)
+                    lentas['posicion'].append(i)
+                    lentas['musculo'].append(musculos_lista[i] if i < len(musculos_lista) else musculos_lista[-1])
+                    lentas['ejercicio'].append(ejercicios_lista[i] if i < len(ejercicios_lista) else ejercicios_lista[-1])
+                    lentas['series'].append(series_lista[i] if i < len(series_lista) else series_lista[-1])
+                    lentas['repeticiones'].append(reps_lista[i] if i < len(reps_lista) else reps_lista[-1])
+            
+            bloques.append(lentas)
+        
+        largo = pd.concat([pd.DataFrame(bloque) for bloque in bloques], ignore_index=True)
+        if len(filas_lentas):
+            # Mantener el orden original del CSV (importa para quitar duplicados)
+            largo = largo.sort_values(['fila', 'posicion'], kind='stable', ignore_index=True)
+        
+        # 3. Limpiar comillas/corchetes solo sobre los valores únicos y traer genero/objetivo/dia de su fila
+        fila = largo['fila'].to_numpy()
+        tabla = pd.DataFrame({
+            'genero': pd.Categorical(df['genero']).take(fila),
+            'objetivo': pd.Categorical(df['objetivo']).take(fila),
+            'dia': pd.Categorical(df['dia'] if 'dia' in df.columns else [None] * len(df)).take(fila),
+            'musculo': self._limpiar_valores(largo['musculo']),
+            'ejercicio': self._limpiar_valores(largo['ejercicio']),
+            'series': self._limpiar_valores(largo['series'], numerico=True, defecto=3),
+            'repeticiones': self._limpiar_valores(largo['repeticiones'], numerico=True, defecto=12),
+        }, columns=columnas)
+        
+        print(f"🧾 Tabla de ejercicios: {len(tabla)} filas desde {len(df)} registros")
+        return tabla
+
+    def _partir_listas(self, serie):
+        """Partir una columna de listas en texto: (elementos aplanados, largo por fila, es_lista)"""
+        textos = serie.astype(str)
+        es_lista = (textos.str.startswith('[') & textos.str.endswith(']') & (textos.str.len() > 2)).to_numpy()
+        
+        partes = textos.str.strip('[]').str.split(', ')
+        largos = partes.str.len().to_numpy()
+        elementos = partes.explode().to_numpy(dtype=object)
+        
+        # Cada fila aporta exactamente `largo` elementos: si no, las filas quedarían desalineadas
+        if len(elementos) != largos.sum():
+            raise ValueError(f"Columna {serie.name}: {len(elementos)} elementos para {largos.sum()} posiciones")
+        
+        return elementos, largos, es_lista
+
+    def _limpiar_valores(self, valores, numerico=False, defecto=None):
+        """Quitar corchetes/comillas de los elementos y convertir a categoría o entero"""
+        codigos, unicos = pd.factorize(valores)
+        limpios = [str(valor).strip(" []'\"") for valor in unicos]
+        
+        if numerico:
+            # Tipos compactos: enteros para series/repeticiones
+            numeros = pd.to_numeric(pd.Series(limpios, dtype=object), errors='coerce').fillna(defecto)
+            return numeros.to_numpy().astype('int32')[codigos]
+        
+        # Tipos compactos: categorías para texto
+        codigos_limpios, categorias = pd.factorize(pd.Index(limpios, dtype=object))
+        return pd.Categorical.from_codes(codigos_limpios[codigos], categories=categorias)
+
+    def _construir_indice_ejercicios(self):
+        """Construir índice (genero, objetivo, musculo) -> rango de ejercicios en arrays contiguos"""
+        # Conservar la primera aparición de cada ejercicio (sin duplicados)
+        unicos = self.tabla_ejercicios.drop_duplicates(subset=['genero', 'objetivo', 'musculo', 'ejercicio'])
+        
+        # Filas agrupadas por clave, en el orden de aparición dentro de cada grupo; las claves de
+        # una misma partición (genero, objetivo) quedan juntas (sort estable: conserva ese orden)
+        grupos = unicos.groupby(['genero', 'objetivo', 'musculo'], observed=True, sort=False).indices
+        claves = sorted(grupos, key=lambda clave: (str(clave[0]), str(clave[1])))
+        orden = np.concatenate([grupos[clave] for clave in claves]) if claves else np.array([], dtype=np.intp)
+        
+        indice = {}
+        particiones = {}
+        inicio = 0
+        for clave in claves:
+            fin = inicio + len(grupos[clave])
+            indice[clave] = (inicio, fin)
+            particion = clave[:2]
+            particiones[particion] = (particiones.get(particion, (inicio, fin))[0], fin)
+            inicio = fin
+        
+        ejercicios = pd.Categorical(unicos['ejercicio'])
+        self.ejercicios_codigos = np.ascontiguousarray(ejercicios.codes[orden], dtype=np.int32)
+        self.ejercicios_repeticiones = np.ascontiguousarray(unicos['repeticiones'].to_numpy()[orden], dtype=np.int32)
+        self.ejercicios_series = np.ascontiguousarray(unicos['series'].to_numpy()[orden], dtype=np.int32)
+        self.nombres_ejercicios = np.array([str(nombre) for nombre in ejercicios.categories], dtype=str)
+        self.indice_ejercicios = indice
+        self.particiones = particiones
+        self.filas_por_particion = {
+            (genero, objetivo): int(filas)
+            for (genero, objetivo), filas in self.dataset.groupby(['genero', 'objetivo'], observed=True).size().items()
+        } if self.dataset is not None else {}
+        print(f"🗂️ Índice de ejercicios construido: {len(self.particiones)} particiones, "
+              f"{len(self.indice_ejercicios)} claves, {len(self.ejercicios_codigos)} ejercicios")
+
+    def tamanos_particiones(self):
+        """Tamaño de cada partición (genero, objetivo): filas del dataset, ejercicios y músculos"""
+        return [
+            {
+                'genero': str(genero),
+                'objetivo': str(objetivo),
+                'filas_dataset': self.filas_por_particion.get((genero, objetivo), 0),
+                'ejercicios': fin - inicio,
+                'musculos': {
+                    str(musculo): rango[1] - rango[0]
+                    for (g, o, musculo), rango in self.indice_ejercicios.items() if (g, o) == (genero, objetivo)
+                }
+            }
+            for (genero, objetivo), (inicio, fin) in self.particiones.items()
+        ]
+
     def _extraer_patrones_inteligentes(self):
         """Extraer patrones reales del dataset para generar rutinas inteligentes"""
-        if self.dataset is None:
+        if self.dataset is None or self.tabla_ejercicios is None:
             return
 
         print("🧠 Extrayendo patrones inteligentes del dataset...")
 
-        # 1. ANALIZAR DISTRIBUCIÓN DE MÚSCULOS POR DÍA
-        patrones_por_dia = defaultdict(list)
+        # 1. ANALIZAR DISTRIBUCIÓN DE MÚSCULOS POR DÍA (una sola pasada groupby)
+        patrones_por_dia = {}
 
         if 'dia' in self.dataset.columns:
-            for dia in self.dataset['dia'].unique():
-                datos_dia = self.dataset[self.dataset['dia'] == dia]
-
-                # Extraer músculos de este día
-                musculos_dia = []
-                for _, row in datos_dia.iterrows():
-                    musculos = self._procesar_campo_lista(row['parte_musculo'], [])
-                    musculos_dia.extend(musculos)
-
-                # Contar frecuencias y obtener los más comunes
-                contador = Counter(musculos_dia)
-                musculos_principales = [m for m, c in contador.most_common(4)]  # Top 4
-                patrones_por_dia[dia] = musculos_principales
+            tabla = self.tabla_ejercicios
+            
+            # Conteo por (día, músculo) en orden de primera aparición
+            conteo = tabla.groupby(['dia', 'musculo'], observed=True, sort=False).size().reset_index(name='total')
+            
+            # Top 4 por día; el orden estable desempata igual que Counter.most_common
+            conteo = conteo.sort_values('total', ascending=False, kind='stable')
+            top = conteo.groupby('dia', observed=True, sort=False).head(4)
+            musculos_por_dia = {dia: grupo['musculo'].tolist() for dia, grupo in top.groupby('dia', observed=True, sort=False)}
+            
+            for dia in tabla['dia'].dropna().unique():
+                patrones_por_dia[dia] = musculos_por_dia.get(dia, [])
 
-        self.patrones_musculares = dict(patrones_por_dia)
+        self.patrones_musculares = patrones_por_dia
 
         # 2. CREAR DISTRIBUCIONES SEGÚN NIVEL
         self._crear_distribuciones_por_nivel()
@@ -433,7 +651,8 @@ class CalisthenicsAI:
 
         df = self.dataset.copy()
 
-        perfiles = df.groupby(['genero', 'edad', 'peso', 'altura', 'objetivo', 'tmb']).agg({
+        # observed=True: desde el snapshot genero/objetivo son categorías (sin combinaciones vacías)
+        perfiles = df.groupby(['genero', 'edad', 'peso', 'altura', 'objetivo', 'tmb'], observed=True).agg({
             'ejercicio': 'count',
             'imc': 'first'
         }).reset_index()
@@ -441,25 +660,9 @@ class CalisthenicsAI:
         perfiles = perfiles.rename(columns={'ejercicio': 'num_ejercicios'})
 
         def clasificar_nivel(row):
-            tmb = row['tmb']
-            edad = row['edad']
-            imc = row['imc']
-            genero = row['genero']
-
-            if genero.lower() == 'masculino':
-                if tmb > 1800 and edad < 35 and imc < 25:
-                    return 'avanzado'
-                elif tmb > 1500 and edad < 45 and imc < 28:
-                    return 'intermedio'
-                else:
-                    return 'principiante'
-            else:  # Femenino
-                if tmb > 1400 and edad < 35 and imc < 25:
-                    return 'avanzado'
-                elif tmb > 1200 and edad < 45 and imc < 28:
-                    return 'intermedio'
-                else:
-                    return 'principiante'
+            # Umbrales en REGLAS_NIVEL (los mismos que usa el predictor de reglas)
+            genero = 'Masculino' if row['genero'].lower() == 'masculino' else 'Femenino'
+            return clasificar_por_reglas(genero, row['edad'], row['tmb'], row['imc'])
 
         perfiles['nivel'] = perfiles.apply(clasificar_nivel, axis=1)
         print(f"✅ Perfiles creados: {len(perfiles)}")
@@ -504,6 +707,11 @@ class CalisthenicsAI:
 
         # Entrenar modelo
         self.model.fit(X_train, y_train)
+        self.cache_rutinas.invalidar()
+        
+        # Árbol destilado del bosque (se guarda con el modelo) y backend de predicción
+        self.arbol_destilado = destilar_arbol(self.model, self.label_encoders)
+        self._configurar_predictor()
 
         # Evaluar modelo
         y_pred = self.model.predict(X_test)
@@ -517,6 +725,17 @@ class CalisthenicsAI:
         
         return True, accuracy
 
+    def _configurar_predictor(self, nombre=None):
+        """Elegir el backend de predicción de nivel (por defecto: variable IA_PREDICTOR)"""
+        nombre = nombre or PREDICTOR_POR_DEFECTO
+        
+        # Modelos guardados antes de existir el árbol destilado: destilarlo ahora
+        if nombre == 'arbol' and self.arbol_destilado is None and hasattr(self.model, 'feature_importances_'):
+            self.arbol_destilado = destilar_arbol(self.model, self.label_encoders)
+        
+        self.predictor = crear_predictor(nombre, self.model, self.label_encoders, self.arbol_destilado)
+        print(f"🧠 Predictor de nivel: {self.predictor.nombre}")
+
     def _analizar_plan_descanso(self):
         """Análisis detallado del plan de descanso por nivel"""
         if not hasattr(self, 'distribucion_dias'):
@@ -558,38 +777,75 @@ class CalisthenicsAI:
         tmb = round(tmb, 2)
         imc = peso / (altura ** 2)
 
-        if 'genero' not in self.label_encoders or 'objetivo' not in self.label_encoders:
+        if self.predictor is None or 'genero' not in self.label_encoders or 'objetivo' not in self.label_encoders:
             return 'intermedio', tmb, imc
 
         try:
-            genero_encoded = self.label_encoders['genero'].transform([genero_dataset])[0]
-            objetivo_encoded = self.label_encoders['objetivo'].transform([objetivo])[0]
-
-            caracteristicas = np.array([[edad, peso, altura, tmb, imc, genero_encoded, objetivo_encoded]])
-
-            nivel_encoded = self.model.predict(caracteristicas)[0]
-            nivel = self.label_encoders['nivel'].inverse_transform([nivel_encoded])[0]
-
+            nivel = self.predictor.predecir(genero_dataset, objetivo, edad, peso, altura, tmb, imc)
             return nivel, tmb, imc
 
         except ValueError as e:
             print(f"⚠️ Error en predicción: {e}")
             return 'intermedio', tmb, imc
 
+    def predecir_perfiles(self, generos, edades, pesos, alturas, objetivos):
+        """Predecir el nivel de varios usuarios a la vez (una sola llamada al predictor)"""
+        edades = np.asarray(edades, dtype=float)
+        pesos = np.asarray(pesos, dtype=float)
+        alturas = np.asarray(alturas, dtype=float)
+
+        es_hombre = np.array([g.lower() in ['hombre', 'masculino'] for g in generos], dtype=bool)
+        generos_dataset = np.where(es_hombre, 'Masculino', 'Femenino')
+        objetivos = np.asarray(objetivos, dtype=object)
+
+        # USAR FÓRMULA HARRIS BENEDICT (igual que en el dataset)
+        altura_cm = alturas * 100
+        tmb = np.where(
+            es_hombre,
+            66 + (13.7 * pesos) + (5 * altura_cm) - (6.8 * edades),
+            655 + (9.6 * pesos) + (1.8 * altura_cm) - (4.7 * edades)
+        ).round(2)
+        imc = pesos / (alturas ** 2)
+
+        niveles = np.full(len(edades), 'intermedio', dtype=object)
+
+        if self.predictor is None or 'genero' not in self.label_encoders or 'objetivo' not in self.label_encoders or len(edades) == 0:
+            return niveles.tolist(), tmb, imc
+
+        # Solo se predicen las filas con categorías conocidas por los encoders
+        conocidos = (
+            np.isin(generos_dataset, self.label_encoders['genero'].classes_) &
+            np.isin(objetivos, self.label_encoders['objetivo'].classes_)
+        )
+
+        if conocidos.any():
+            niveles[conocidos] = self.predictor.predecir_lote(
+                generos_dataset[conocidos], objetivos[conocidos], edades[conocidos],
+                pesos[conocidos], alturas[conocidos], tmb[conocidos], imc[conocidos]
+            )
+
+        if not conocidos.all():
+            print(f"⚠️ {int((~conocidos).sum())} perfiles con género/objetivo desconocido, usando 'intermedio'")
+
+        return niveles.tolist(), tmb, imc
+
     def generar_plan_inteligente(self, genero, edad, peso, altura, objetivo, nivel):
         """CORREGIDO: Generar plan de entrenamiento según el nivel específico"""
         
         # Usar la distribución específica para el nivel del usuario
         if hasattr(self, 'distribucion_dias') and nivel in self.distribucion_dias:
             print(f"🎯 Usando distribución {nivel}: {self.config_ejercicios[nivel]['tipo_entrenamiento']}")
-            return self.distribucion_dias[nivel].copy()
-        
-        # Fallback: generar según nivel
-        print(f"⚠️ Generando distribución de fallback para {nivel}")
+        else:
+            print(f"⚠️ Generando distribución de fallback para {nivel}")
+        return self._plan_semanal(nivel).copy()
+
+    def _plan_semanal(self, nivel):
+        """Grupos musculares por día para el nivel (distribución entrenada o fallback)"""
+        if hasattr(self, 'distribucion_dias') and nivel in self.distribucion_dias:
+            return self.distribucion_dias[nivel]
         if nivel == 'principiante':
             return self._generar_plan_principiante_fallback()
-        else:
-            return self._generar_plan_basico()
+        return self._generar_plan_basico()
 
     def _generar_plan_principiante_fallback(self):
         """NUEVO: Plan específico para principiantes (fallback)"""
@@ -654,75 +910,20 @@ class CalisthenicsAI:
         print(f"✅ Ejercicios generados para {nivel}: {len(ejercicios_dia)} ejercicios")
         return ejercicios_dia
 
-    def obtener_ejercicios_por_musculo(self, genero_dataset, objetivo, nivel, musculo_target, num_ejercicios=3):
-        """Obtener ejercicios específicos para un músculo"""
-        ejercicios_encontrados = []
-        
+    def obtener_ejercicios_por_musculo(self, genero_dataset, objetivo, nivel, musculo_target, num_ejercicios=3, rng=None):
+        """Obtener ejercicios específicos para un músculo desde el índice precalculado"""
+        rng = rng or random
         try:
-            # Filtrar por género y objetivo
-            filtro_base = (
-                (self.dataset['genero'] == genero_dataset) &
-                (self.dataset['objetivo'] == objetivo)
-            )
-            datos_filtrados = self.dataset[filtro_base]
-            
-            if len(datos_filtrados) == 0:
-                print(f"❌ No hay datos para {genero_dataset} - {objetivo}")
-                return self._generar_ejercicios_fallback(musculo_target, nivel, num_ejercicios)
+            rango = self.indice_ejercicios.get((genero_dataset, objetivo, musculo_target))
             
-            # Buscar ejercicios que contengan el músculo target
-            ejercicios_validos = []
-            
-            for _, registro in datos_filtrados.iterrows():
-                # Procesar parte_musculo
-                parte_musculo = registro['parte_musculo']
-                musculos_registro = self.procesar_lista_string(parte_musculo, ['pecho'])
-                
-                # Verificar si el músculo target está en este registro
-                if musculo_target in musculos_registro:
-                    # Procesar ejercicios
-                    ejercicios_data = registro['ejercicio']
-                    ejercicios_lista = self.procesar_lista_string(ejercicios_data, ['flexiones'])
-                    
-                    # Procesar repeticiones
-                    repeticiones_data = registro['repeticiones']
-                    reps_lista = self.procesar_lista_numerica(repeticiones_data, [12])
-                    
-                    # Procesar series
-                    series_data = registro['series']
-                    series_lista = self.procesar_lista_numerica(series_data, [3])
-                    
-                    # Crear ejercicio individual
-                    max_length = max(len(ejercicios_lista), len(reps_lista), len(series_lista))
-                    
-                    for i in range(max_length):
-                        ejercicio = ejercicios_lista[i] if i < len(ejercicios_lista) else ejercicios_lista[-1]
-                        rep = reps_lista[i] if i < len(reps_lista) else reps_lista[-1]
-                        serie = series_lista[i] if i < len(series_lista) else series_lista[-1]
-                        
-                        # Ajustar según nivel
-                        rep_ajustada, serie_ajustada = self.ajustar_por_nivel(rep, serie, nivel)
-                        
-                        ejercicios_validos.append({
-                            'musculo': musculo_target,
-                            'ejercicio': ejercicio,
-                            'repeticiones': rep_ajustada,
-                            'series': serie_ajustada
-                        })
-            
-            # Seleccionar ejercicios únicos aleatoriamente
-            if ejercicios_validos:
-                # Eliminar duplicados por nombre de ejercicio
-                ejercicios_unicos = {}
-                for ej in ejercicios_validos:
-                    if ej['ejercicio'] not in ejercicios_unicos:
-                        ejercicios_unicos[ej['ejercicio']] = ej
-                
-                ejercicios_lista = list(ejercicios_unicos.values())
-                
+            if rango:
                 # Seleccionar aleatoriamente el número solicitado
-                num_seleccionar = min(num_ejercicios, len(ejercicios_lista))
-                ejercicios_seleccionados = random.sample(ejercicios_lista, num_seleccionar)
+                inicio, fin = rango
+                num_seleccionar = min(num_ejercicios, fin - inicio)
+                ejercicios_seleccionados = []
+                
+                for i in rng.sample(range(inicio, fin), num_seleccionar):
+                    ejercicios_seleccionados.append(self._ejercicio_indexado(i, musculo_target, nivel))
                 
                 return ejercicios_seleccionados
             
@@ -730,10 +931,26 @@ class CalisthenicsAI:
             print(f"❌ Error obteniendo ejercicios para {musculo_target}: {e}")
         
         # Fallback si no se encuentran ejercicios
-        return self._generar_ejercicios_fallback(musculo_target, nivel, num_ejercicios)
+        return self._generar_ejercicios_fallback(musculo_target, nivel, num_ejercicios, rng)
+
+    def _ejercicio_indexado(self, posicion, musculo, nivel):
+        """Ejercicio en la posición `posicion` de los arrays del índice, ajustado según nivel"""
+        rep_ajustada, serie_ajustada = self.ajustar_por_nivel(
+            int(self.ejercicios_repeticiones[posicion]), int(self.ejercicios_series[posicion]), nivel
+        )
+        return {
+            'musculo': musculo,
+            'ejercicio': str(self.nombres_ejercicios[self.ejercicios_codigos[posicion]]),
+            'repeticiones': rep_ajustada,
+            'series': serie_ajustada
+        }
 
-    def _generar_ejercicios_fallback(self, musculo_target, nivel, num_ejercicios):
-        """Generar ejercicios de fallback cuando no hay datos en dataset"""
+    def _generar_ejercicios_fallback(self, musculo_target, nivel, num_ejercicios, rng=None, desplazamiento=0):
+        """Generar ejercicios de fallback cuando no hay datos en dataset
+        
+        `desplazamiento` rota la lista fija (generar_semana lo usa para no repetir entre días).
+        """
+        rng = rng or random
         ejercicios_base = {
             'pecho': ['Flexiones de brazos', 'Push ups', 'Flexiones diamante', 'Flexiones inclinadas'],
             'espalda': ['Remo con banda elástica', 'Superman', 'Remo invertido', 'Pull ups'],
@@ -756,12 +973,12 @@ class CalisthenicsAI:
         
         ejercicios_generados = []
         for i in range(num_ejercicios):
-            ejercicio = ejercicios[i % len(ejercicios)]  # Evitar repetir si hay pocos ejercicios
+            ejercicio = ejercicios[(desplazamiento + i) % len(ejercicios)]  # Evitar repetir si hay pocos ejercicios
             ejercicios_generados.append({
                 'musculo': musculo_target,
                 'ejercicio': ejercicio,
-                'repeticiones': random.randint(*config_nivel['reps']),
-                'series': random.randint(*config_nivel['series'])
+                'repeticiones': rng.randint(*config_nivel['reps']),
+                'series': rng.randint(*config_nivel['series'])
             })
         
         return ejercicios_generados
@@ -771,7 +988,7 @@ class CalisthenicsAI:
         if isinstance(data, str) and data.startswith('['):
             try:
                 return ast.literal_eval(data)
-            except:
+            except (ValueError, SyntaxError):
                 return default
         elif isinstance(data, list):
             return data
@@ -783,14 +1000,14 @@ class CalisthenicsAI:
         if isinstance(data, str) and data.startswith('['):
             try:
                 return ast.literal_eval(data)
-            except:
+            except (ValueError, SyntaxError):
                 return default
         elif isinstance(data, list):
             return data
         else:
             try:
                 return [int(data)] if pd.notna(data) else default
-            except:
+            except (ValueError, TypeError):
                 return default
 
     def ajustar_por_nivel(self, rep, serie, nivel):
@@ -820,7 +1037,9 @@ class CalisthenicsAI:
             'musculos_pequenos': self.musculos_pequenos,
             'config_ejercicios': self.config_ejercicios,
             'distribucion_dias': getattr(self, 'distribucion_dias', {}),
-            'patrones_musculares': getattr(self, 'patrones_musculares', {})
+            'patrones_musculares': getattr(self, 'patrones_musculares', {}),
+            'arbol_destilado': self.arbol_destilado.a_dict() if self.arbol_destilado else None,
+            'ruta_dataset': self.ruta_dataset
         }
         
         try:
@@ -832,8 +1051,12 @@ class CalisthenicsAI:
             print(f"❌ Error guardando modelo: {e}")
             return False
 
-    def cargar_modelo(self, ruta: str = 'modelo_calisthenics.pkl'):
-        """Cargar modelo previamente entrenado Y dataset"""
+    def cargar_modelo(self, ruta: str = 'modelo_calisthenics.pkl', archivo_csv: str = None):
+        """Cargar modelo previamente entrenado Y dataset
+
+        Sin `archivo_csv` se usa el dataset con el que se entrenó el modelo (si sigue existiendo)
+        y, si no, el dataset por defecto.
+        """
         try:
             # Cargar modelo desde pickle
             with open(ruta, 'rb') as f:
@@ -851,11 +1074,20 @@ class CalisthenicsAI:
             self.config_ejercicios = modelo_data.get('config_ejercicios', self.config_ejercicios)
             self.distribucion_dias = modelo_data.get('distribucion_dias', {})
             self.patrones_musculares = modelo_data.get('patrones_musculares', {})
+            self.cache_rutinas.invalidar()
+            
+            arbol = modelo_data.get('arbol_destilado')
+            self.arbol_destilado = PredictorArbolDestilado.desde_dict(arbol) if arbol else None
+            self._configurar_predictor()
             
             print(f"✅ Modelo cargado desde: {ruta}")
             
-            # También cargar el dataset
-            dataset_cargado = self.cargar_dataset()
+            # También cargar el dataset (el mismo con el que se entrenó)
+            if archivo_csv is None:
+                ruta_entrenamiento = modelo_data.get('ruta_dataset')
+                if ruta_entrenamiento and os.path.isfile(ruta_entrenamiento):
+                    archivo_csv = ruta_entrenamiento
+            dataset_cargado = self.cargar_dataset(archivo_csv) if archivo_csv else self.cargar_dataset()
             
             if dataset_cargado is not None:
                 print(f"Dataset también cargado: {len(dataset_cargado)} registros")
@@ -868,7 +1100,113 @@ class CalisthenicsAI:
             print(f"Error cargando modelo: {e}")
             return False
 
-    def generar_rutina_inteligente(self, genero, objetivo, nivel, dia_semana):
+    def congelar(self):
+        """Marcar la instancia como publicada: a partir de aquí no se puede modificar"""
+        object.__setattr__(self, '_congelado', True)
+        return self
+
+    def __setattr__(self, nombre, valor):
+        if getattr(self, '_congelado', False):
+            raise AttributeError(
+                f"CalisthenicsAI publicado es inmutable (se intentó cambiar '{nombre}'); "
+                "construye una instancia nueva y publícala con modelo_activo.publicar()"
+            )
+        object.__setattr__(self, nombre, valor)
+
+    def esta_entrenado(self):
+        """True si hay modelo entrenado y dataset cargado"""
+        return hasattr(self.model, 'feature_importances_') and self.dataset is not None
+
+    def generar_rutina_inteligente(self, genero, objetivo, nivel, dia_semana, rng=None):
+        """Servir una rutina del día desde el cache (se genera un pool de candidatas si no existe)
+        
+        `rng` puede ser una semilla, un random.Random o un numpy Generator; con la misma
+        semilla se obtiene la misma rutina. Sin `rng` se usa el generador global.
+        """
+        genero_dataset = 'Masculino' if genero.lower() in ['hombre', 'masculino'] else 'Femenino'
+        clave = (genero_dataset, objetivo, nivel, dia_semana)
+        
+        # Cada candidata del pool usa su propia semilla derivada de la clave, así el pool
+        # es el mismo en todos los workers y después de reiniciar el proceso (mientras no cambie el dataset)
+        return self.cache_rutinas.obtener(
+            clave,
+            lambda indice: self._generar_rutina_dia(
+                genero_dataset, objetivo, nivel, dia_semana, crear_rng(derivar_semilla(*clave, indice))
+            ),
+            crear_rng(rng) if rng is not None else None
+        )
+
+    def generar_semana(self, genero, objetivo, nivel, rng=None):
+        """Rutinas de los 7 días en una sola pasada: {dia: ejercicios} ([] en días de descanso)
+        
+        Los candidatos de cada músculo se filtran una vez para toda la semana y un ejercicio no
+        se repite en otro día mientras queden alternativas sin usar. Igual que en
+        generar_rutina_inteligente, con la misma semilla se obtiene la misma semana.
+        """
+        genero_dataset = 'Masculino' if genero.lower() in ['hombre', 'masculino'] else 'Femenino'
+        clave = ('semana', genero_dataset, objetivo, nivel)
+        
+        return self.cache_rutinas.obtener(
+            clave,
+            lambda indice: self._generar_semana(
+                genero_dataset, objetivo, nivel, crear_rng(derivar_semilla(*clave, indice))
+            ),
+            crear_rng(rng) if rng is not None else None
+        )
+
+    def _generar_semana(self, genero_dataset, objetivo, nivel, rng):
+        """Llenar todos los días de entrenamiento desde un único pool de candidatos por músculo"""
+        plan = self._plan_semanal(nivel)
+        config = self.config_ejercicios.get(nivel, self.config_ejercicios['intermedio'])
+        
+        if config['tipo_entrenamiento'] == 'full_body' and nivel == 'principiante':
+            por_grupo = 1  # PRINCIPIANTES: 1 ejercicio por grupo
+        else:
+            por_grupo = config['por_grupo'][1]
+        
+        # Filtrar por genero/objetivo/músculo una sola vez para toda la semana
+        musculos = {musculo for grupos in plan.values() for musculo in grupos}
+        rangos = {musculo: self.indice_ejercicios.get((genero_dataset, objetivo, musculo)) for musculo in musculos}
+        usados = {musculo: set() for musculo in musculos}
+        usos_fallback = Counter()  # Sin datos en el dataset: rotar la lista fija de ejercicios
+        
+        semana = {}
+        for dia in DIAS_SEMANA:
+            rutina_dia = []
+            for grupo in plan.get(dia, []):
+                if not rangos[grupo]:
+                    rutina_dia.extend(self._generar_ejercicios_fallback(
+                        grupo, nivel, por_grupo, rng, desplazamiento=usos_fallback[grupo]
+                    ))
+                    usos_fallback[grupo] += por_grupo
+                    continue
+                for posicion in self._elegir_sin_repetir(rangos[grupo], usados[grupo], por_grupo, rng):
+                    rutina_dia.append(self._ejercicio_indexado(posicion, grupo, nivel))
+            semana[dia] = rutina_dia
+        
+        print(f"✅ Semana {nivel} generada: {sum(len(r) for r in semana.values())} ejercicios "
+              f"en {sum(1 for r in semana.values() if r)} días")
+        return semana
+
+    @staticmethod
+    def _elegir_sin_repetir(rango, usados, cantidad, rng):
+        """Elegir posiciones del rango priorizando las que no se usaron en la semana"""
+        inicio, fin = rango
+        libres = [i for i in range(inicio, fin) if i not in usados]
+        
+        if len(libres) >= cantidad:
+            elegidas = rng.sample(libres, cantidad)
+        else:
+            # Pool agotado: se usan las que quedan y se vuelve a empezar (sin repetir en el mismo día)
+            elegidas = rng.sample(libres, len(libres))
+            usados.clear()
+            resto = [i for i in range(inicio, fin) if i not in elegidas]
+            elegidas += rng.sample(resto, min(cantidad - len(elegidas), len(resto)))
+        
+        usados.update(elegidas)
+        return elegidas
+
+    def _generar_rutina_dia(self, genero, objetivo, nivel, dia_semana, rng=None):
         """CORREGIDO: Generar rutina inteligente según nivel y día"""
         
         # 1. Obtener grupos musculares para el día según nivel
@@ -906,7 +1244,7 @@ class CalisthenicsAI:
             
             for grupo in grupos_dia:
                 ejercicios_grupo = self.obtener_ejercicios_por_musculo(
-                    genero_dataset, objetivo, nivel, grupo, num_ejercicios=1
+                    genero_dataset, objetivo, nivel, grupo, num_ejercicios=1, rng=rng
                 )
                 rutina_dia.extend(ejercicios_grupo)
         else:
@@ -915,7 +1253,7 @@ class CalisthenicsAI:
             
             for grupo in grupos_dia:
                 ejercicios_grupo = self.obtener_ejercicios_por_musculo(
-                    genero_dataset, objetivo, nivel, grupo, num_ejercicios=max_ejercicios_por_grupo
+                    genero_dataset, objetivo, nivel, grupo, num_ejercicios=max_ejercicios_por_grupo, rng=rng
                 )
                 rutina_dia.extend(ejercicios_grupo)
         
@@ -933,82 +1271,129 @@ class CalisthenicsAI:
             "config_ejercicios": self.config_ejercicios
         }
     
-    def generar_rutina_considerando_historial(self, genero, objetivo, nivel, dia_semana, historial_reciente):
-    
+    def generar_rutina_considerando_historial(self, genero, objetivo, nivel, dia_semana, historial_reciente, rng=None):
+        """Rutina del día ajustada según el historial, en una sola generación
+        
+        Devuelve {'base': rutina sin ajustar, 'ajustada': rutina final, 'ajustes': [ajuste, ...]}
+        (ver _ajustar_rutina_por_historial para el formato de cada ajuste).
+        """
+        rutina_base = self.generar_rutina_inteligente(genero, objetivo, nivel, dia_semana, rng=rng)
+        semana = self._ajustar_semana({dia_semana: rutina_base}, historial_reciente, nivel)
+        return {
+            'base': rutina_base,
+            'ajustada': semana['ajustada'][dia_semana],
+            'ajustes': semana['ajustes'][dia_semana]
+        }
+
+    def generar_semana_considerando_historial(self, genero, objetivo, nivel, historial_reciente, rng=None):
+        """Semana completa (generar_semana) y la misma semana ajustada según el historial
+        
+        Devuelve {'base': {dia: rutina}, 'ajustada': {dia: rutina}, 'ajustes': {dia: [ajuste, ...]}}.
+        La semana se genera una sola vez y el historial se analiza una sola vez.
+        """
+        semana_base = self.generar_semana(genero, objetivo, nivel, rng=rng)
+        return self._ajustar_semana(semana_base, historial_reciente, nivel)
+
+    def _ajustar_semana(self, semana_base, historial_reciente, nivel):
+        """Aplicar los ajustes por historial a cada día de `semana_base`"""
+        if not historial_reciente:
+            print("   No hay historial, usando rutina estándar")
+            return {
+                'base': semana_base,
+                'ajustada': {dia: [ejercicio.copy() for ejercicio in rutina] for dia, rutina in semana_base.items()},
+                'ajustes': {dia: [] for dia in semana_base}
+            }
+        
         # Analizar qué grupos musculares trabajó recientemente
         grupos_trabajados_recientes = analizar_grupos_musculares_recientes(historial_reciente, dias_limite=2)
         frecuencia_stats = calcular_frecuencia_entrenamiento(historial_reciente)
         
-        print(f"🔍 Analizando historial para {dia_semana}:")
+        print(f"🔍 Analizando historial ({len(historial_reciente)} entrenamientos, nivel {nivel}):")
         print(f"   Grupos trabajados recientemente: {grupos_trabajados_recientes}")
         print(f"   Estadísticas: {frecuencia_stats}")
         
-        # Generar rutina base según el método normal
-        rutina_base = self.generar_rutina_inteligente(genero, objetivo, nivel, dia_semana)
-        
-        if not historial_reciente:
-            print("   No hay historial, usando rutina estándar")
-            return rutina_base
-        
-        # Ajustar rutina según historial
-        rutina_ajustada = self._ajustar_rutina_por_historial(
-            rutina_base, 
-            grupos_trabajados_recientes, 
-            frecuencia_stats,
-            nivel
-        )
+        ajustada, ajustes = {}, {}
+        for dia, rutina in semana_base.items():
+            ajustada[dia], ajustes[dia] = self._ajustar_rutina_por_historial(
+                rutina, grupos_trabajados_recientes, frecuencia_stats, nivel
+            )
         
-        return rutina_ajustada
+        return {'base': semana_base, 'ajustada': ajustada, 'ajustes': ajustes}
 
     def _ajustar_rutina_por_historial(self, rutina_base, grupos_recientes, frecuencia_stats, nivel):
         """
         Ajustar intensidad y selección de ejercicios basándose en el historial
+        
+        Devuelve (rutina_ajustada, ajustes). Cada ajuste registra un cambio real:
+        {'indice', 'musculo', 'ejercicio', 'campo', 'antes', 'despues', 'regla', 'motivo'}
         """
         rutina_ajustada = []
+        ajustes = []
         
-        for ejercicio in rutina_base:
+        for indice, ejercicio in enumerate(rutina_base):
             ejercicio_ajustado = ejercicio.copy()
             musculo = ejercicio['musculo']
             
+            def ajustar(campo, valor, regla, motivo):
+                # Registrar solo si la regla cambió el valor (los topes pueden dejarlo igual)
+                if valor != ejercicio_ajustado[campo]:
+                    ajustes.append({
+                        'indice': indice,
+                        'musculo': musculo,
+                        'ejercicio': ejercicio['ejercicio'],
+                        'campo': campo,
+                        'antes': ejercicio_ajustado[campo],
+                        'despues': valor,
+                        'regla': regla,
+                        'motivo': motivo
+                    })
+                    ejercicio_ajustado[campo] = valor
+            
             # REGLA 1: Reducir intensidad si trabajó este músculo recientemente
             if musculo in grupos_recientes:
                 dias_desde = grupos_recientes[musculo]
                 
                 if dias_desde == 0:  # Trabajó hoy mismo
                     print(f"   ⚠️ {musculo} trabajado hoy, reduciendo intensidad significativamente")
-                    ejercicio_ajustado['series'] = max(1, ejercicio_ajustado['series'] - 2)
-                    ejercicio_ajustado['repeticiones'] = max(6, int(ejercicio_ajustado['repeticiones'] * 0.6))
+                    motivo = f"{musculo} trabajado hoy"
+                    ajustar('series', max(1, ejercicio_ajustado['series'] - 2), 'musculo_reciente', motivo)
+                    ajustar('repeticiones', max(6, int(ejercicio_ajustado['repeticiones'] * 0.6)), 'musculo_reciente', motivo)
                     
                 elif dias_desde == 1:  # Trabajó ayer
                     print(f"   ⚠️ {musculo} trabajado ayer, reduciendo intensidad moderadamente")
-                    ejercicio_ajustado['series'] = max(1, ejercicio_ajustado['series'] - 1)
-                    ejercicio_ajustado['repeticiones'] = max(8, int(ejercicio_ajustado['repeticiones'] * 0.8))
+                    motivo = f"{musculo} trabajado ayer"
+                    ajustar('series', max(1, ejercicio_ajustado['series'] - 1), 'musculo_reciente', motivo)
+                    ajustar('repeticiones', max(8, int(ejercicio_ajustado['repeticiones'] * 0.8)), 'musculo_reciente', motivo)
                     
                 elif dias_desde == 2:  # Trabajó hace 2 días
                     print(f"   ⚠️ {musculo} trabajado hace 2 días, reducción leve")
-                    ejercicio_ajustado['repeticiones'] = max(10, int(ejercicio_ajustado['repeticiones'] * 0.9))
+                    ajustar('repeticiones', max(10, int(ejercicio_ajustado['repeticiones'] * 0.9)),
+                            'musculo_reciente', f"{musculo} trabajado hace 2 días")
             
             # REGLA 2: Ajustar según frecuencia general de entrenamiento
             if frecuencia_stats['entrenamientos_por_semana'] >= 5:
                 # Usuario muy activo, reducir intensidad general
-                ejercicio_ajustado['series'] = max(1, ejercicio_ajustado['series'] - 1)
+                ajustar('series', max(1, ejercicio_ajustado['series'] - 1), 'frecuencia_alta',
+                        f"{frecuencia_stats['entrenamientos_por_semana']} entrenamientos/semana")
                 print(f"   📊 Usuario muy activo ({frecuencia_stats['entrenamientos_por_semana']} entrenamientos/semana), reduciendo volumen")
                 
             elif frecuencia_stats['entrenamientos_por_semana'] <= 2:
                 # Usuario poco activo, puede manejar más intensidad
                 if nivel in ['intermedio', 'avanzado']:
-                    ejercicio_ajustado['series'] = min(5, ejercicio_ajustado['series'] + 1)
+                    ajustar('series', min(5, ejercicio_ajustado['series'] + 1), 'frecuencia_baja',
+                            f"{frecuencia_stats['entrenamientos_por_semana']} entrenamientos/semana")
                     print(f"   📊 Usuario poco activo ({frecuencia_stats['entrenamientos_por_semana']} entrenamientos/semana), aumentando volumen")
             
             # REGLA 3: Ajustar según asistencia promedio
             if frecuencia_stats['asistencia_promedio'] < 70:
                 # Baja asistencia, rutina más conservadora
-                ejercicio_ajustado['repeticiones'] = max(8, int(ejercicio_ajustado['repeticiones'] * 0.9))
+                ajustar('repeticiones', max(8, int(ejercicio_ajustado['repeticiones'] * 0.9)), 'asistencia_baja',
+                        f"asistencia promedio {frecuencia_stats['asistencia_promedio']}%")
                 print(f"   📊 Asistencia baja ({frecuencia_stats['asistencia_promedio']}%), rutina más conservadora")
             
             rutina_ajustada.append(ejercicio_ajustado)
         
-        return rutina_ajustada
+        return rutina_ajustada, ajustes
 
     def generar_recomendaciones_basadas_en_historial(self, historial_reciente):
         """
@@ -1049,7 +1434,3 @@ class CalisthenicsAI:
             recomendaciones.append("💪 No olvides trabajar el core/abdomen regularmente.")
         
         return recomendaciones
-
-
-# Instancia global del modelo de IA
-ai_model = CalisthenicsAI()
\ No newline at end of file
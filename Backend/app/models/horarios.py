@@ -1,5 +1,5 @@
 from enum import Enum
-from sqlalchemy import Column, Integer, String, Date, Time, Text, ForeignKey, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Integer, String, Date, Time, Text, ForeignKey, Enum as SQLAlchemyEnum, Index, CheckConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
@@ -31,10 +31,23 @@ class Horario(Base):
     hora_inicio = Column(Time, nullable=False)
     hora_fin = Column(Time, nullable=False)
     capacidad = Column(Integer, nullable=False)
+    # Reservas confirmadas: se mantiene en la misma transacción que crea o cancela la reserva
+    reservas_confirmadas = Column(Integer, nullable=False, default=0, server_default="0")
     estado = Column(SQLAlchemyEnum(EstadoHorario), nullable=False, server_default="activo")
     descripcion = Column(Text)
     id_rutina = Column(Integer, ForeignKey('rutina.id_rutina'), nullable=True)
     nivel = Column(SQLAlchemyEnum(NivelHorario), nullable=False, server_default="principiante")
     
     entrenador = relationship("Usuario", back_populates="horarios")
-    rutina = relationship("Rutina", back_populates="horarios")
\ No newline at end of file
+    rutina = relationship("Rutina", back_populates="horarios")
+    
+    __table_args__ = (
+        # Listados por rango de fechas ordenados por fecha y hora (get_horarios, get_horarios_cliente);
+        # id_horario completa la clave del cursor de get_horarios
+        Index("ix_horario_fecha_hora_id", fecha, hora_inicio, id_horario),
+        # Horarios de un entrenador
+        Index("ix_horario_entrenador_fecha", id_entrenador, fecha, hora_inicio),
+        CheckConstraint("reservas_confirmadas >= 0", name="ck_horario_reservas_confirmadas"),
+        # Bajar la capacidad no puede dejar reservas confirmadas fuera del cupo
+        CheckConstraint("reservas_confirmadas <= capacidad", name="ck_horario_capacidad_reservas"),
+    )
@@ -0,0 +1,138 @@
+# app/models/modelo_activo.py - Referencia al modelo de IA publicado
+#
+# Este módulo NO importa pandas/numpy/scikit-learn: el motor (app.models.ai_routines) se importa
+# recién al primer uso de /ai o en la precarga en segundo plano, así arrancar la API es rápido.
+
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from app.models.ai_routines import CalisthenicsAI
+
+
+class ModeloActivo:
+    """Referencia al CalisthenicsAI publicado
+
+    Los handlers toman el snapshot una vez (actual() / obtener_listo()) y lo usan durante toda
+    la petición: modelo, label_encoders, índices y configuración siempre son coherentes entre sí.
+    Un modelo nuevo se construye aparte y se publica con un único cambio de referencia, así
+    que las lecturas no necesitan locks; el lock solo evita cargar dos veces el mismo archivo.
+
+    Con varios workers (gunicorn.conf.py) el entrenamiento corre en uno solo y reemplaza el
+    .pkl; obtener_listo compara el mtime del archivo con el del modelo publicado y los demás
+    workers recargan el archivo nuevo en su siguiente petición.
+    """
+
+    RUTA_MODELO = 'modelo_calisthenics.pkl'
+    REINTENTO_SEGUNDOS = 30  # Tras una carga fallida, no volver a probar el mismo archivo antes de esto
+
+    def __init__(self):
+        self._actual = None
+        self._lock_carga = threading.Lock()
+        # Última carga fallida: (ruta, firma del archivo, instante); sin modelo en disco, cada
+        # petición a /ai no debe volver a tomar el lock y a intentar la carga
+        self._fallo = None
+        self._firma_publicada = None  # mtime del archivo del que salió el modelo publicado
+
+    def actual(self) -> 'CalisthenicsAI':
+        """Snapshot publicado en este momento (puede no estar entrenado)"""
+        actual = self._actual
+        if actual is None:
+            # Primer uso: importar el motor y publicar una instancia vacía
+            from app.models.ai_routines import CalisthenicsAI
+            with self._lock_carga:
+                if self._actual is None:
+                    self._actual = CalisthenicsAI().congelar()
+                actual = self._actual
+        return actual
+
+    def esta_importado(self) -> bool:
+        """True si el motor de IA ya se importó (hay algún snapshot publicado)"""
+        return self._actual is not None
+
+    def publicar(self, nuevo: 'CalisthenicsAI', ruta: Optional[str] = None) -> 'CalisthenicsAI':
+        """Congelar y activar una instancia ya construida (`ruta`: archivo del que sale, si lo hay)"""
+        return self._publicar(nuevo, self._firma(ruta) if ruta else None)
+
+    def _publicar(self, nuevo: 'CalisthenicsAI', firma: Optional[int]) -> 'CalisthenicsAI':
+        nuevo.congelar()
+        self._actual = nuevo
+        self._firma_publicada = firma
+        return nuevo
+
+    def cargar(self, ruta: str = RUTA_MODELO) -> Optional['CalisthenicsAI']:
+        """Cargar el modelo guardado en una instancia nueva y publicarla"""
+        with self._lock_carga:
+            return self._cargar(ruta)
+
+    def obtener_listo(self, ruta: str = RUTA_MODELO) -> Optional['CalisthenicsAI']:
+        """Snapshot entrenado; si todavía no lo hay intenta cargarlo del disco (None si no se pudo)"""
+        actual = self._actual
+        if actual is not None and actual.esta_entrenado():
+            if self._firma_publicada is None or self._firma(ruta) in (None, self._firma_publicada):
+                return actual
+            return self._recargar(ruta, actual)
+
+        if self._fallo_vigente(ruta):
+            return None
+
+        with self._lock_carga:
+            # Otro hilo pudo haberlo cargado (o fallado) mientras esperábamos el lock
+            actual = self._actual
+            if actual is not None and actual.esta_entrenado():
+                return actual
+            if self._fallo_vigente(ruta):
+                return None
+            return self._cargar(ruta)
+
+    def _recargar(self, ruta: str, actual: 'CalisthenicsAI') -> 'CalisthenicsAI':
+        """Otro worker reemplazó el archivo: cargarlo sin frenar al resto de las peticiones"""
+        # Si otro hilo ya está cargando, seguir con el modelo actual hasta que lo publique
+        if not self._lock_carga.acquire(blocking=False):
+            return actual
+        try:
+            if self._firma(ruta) != self._firma_publicada and not self._fallo_vigente(ruta):
+                print(f"🔄 {ruta} cambió en disco, recargando el modelo")
+                self._cargar(ruta)
+            # Si la carga falló se mantiene el modelo anterior
+            return self._actual
+        finally:
+            self._lock_carga.release()
+
+    @staticmethod
+    def _firma(ruta: str) -> Optional[int]:
+        """mtime del archivo del modelo (None si no existe)"""
+        try:
+            return os.stat(ruta).st_mtime_ns
+        except OSError:
+            return None
+
+    def _fallo_vigente(self, ruta: str) -> bool:
+        """True si ya falló la carga de este mismo archivo hace menos de REINTENTO_SEGUNDOS"""
+        fallo = self._fallo
+        if fallo is None:
+            return False
+        ruta_fallida, firma, instante = fallo
+        return (ruta_fallida == ruta and firma == self._firma(ruta)
+                and time.monotonic() - instante < self.REINTENTO_SEGUNDOS)
+
+    def _cargar(self, ruta: str) -> Optional['CalisthenicsAI']:
+        firma = self._firma(ruta)
+        if firma is None:
+            self._fallo = (ruta, None, time.monotonic())
+            return None
+
+        from app.models.ai_routines import CalisthenicsAI
+
+        nuevo = CalisthenicsAI()
+        if not nuevo.cargar_modelo(ruta):
+            self._fallo = (ruta, firma, time.monotonic())
+            return None
+        self._fallo = None
+        return self._publicar(nuevo, firma)
+
+
+# Referencia global al modelo de IA publicado
+modelo_activo = ModeloActivo()
@@ -0,0 +1,243 @@
+# app/models/predictores_nivel.py - Backends intercambiables para predecir el nivel del usuario
+#
+#   bosque -> RandomForest entrenado (el modelo original)
+#   reglas -> los mismos umbrales con los que se etiquetó el dataset, compilados a Python
+#   arbol  -> árbol de decisión poco profundo destilado del bosque, exportado a if/else de Python
+#
+# Se elige con la variable de entorno IA_PREDICTOR (por defecto: bosque). `reglas` y `arbol` son
+# opcionales: antes de activarlos en producción, comprobar su concordancia con el bosque en
+# app/benchmark_predictores.py.
+
+import os
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+PREDICTORES_DISPONIBLES = ['bosque', 'reglas', 'arbol']
+PREDICTOR_POR_DEFECTO = os.getenv('IA_PREDICTOR', 'bosque')
+
+# Umbrales con los que crear_perfiles_usuario etiqueta el dataset:
+# por género, (tmb mayor a, edad menor a, imc menor a, nivel) en orden de prioridad
+REGLAS_NIVEL = {
+    'Masculino': [(1800, 35, 25, 'avanzado'), (1500, 45, 28, 'intermedio')],
+    'Femenino': [(1400, 35, 25, 'avanzado'), (1200, 45, 28, 'intermedio')],
+}
+NIVEL_POR_DEFECTO = 'principiante'
+
+
+def clasificar_por_reglas(genero_dataset: str, edad: float, tmb: float, imc: float) -> str:
+    """Nivel según los umbrales de REGLAS_NIVEL (versión interpretada, para etiquetar el dataset)"""
+    for tmb_min, edad_max, imc_max, nivel in REGLAS_NIVEL[genero_dataset]:
+        if tmb > tmb_min and edad < edad_max and imc < imc_max:
+            return nivel
+    return NIVEL_POR_DEFECTO
+
+
+def _compilar_funcion(fuente: str, nombre: str) -> Callable:
+    """Compilar código Python generado y devolver la función `nombre`"""
+    espacio = {}
+    exec(compile(fuente, f"<{nombre}>", "exec"), espacio)
+    return espacio[nombre]
+
+
+class PredictorNivel(ABC):
+    """Interfaz común: nivel a partir del perfil ya calculado (tmb e imc incluidos)"""
+
+    nombre = None
+    descripcion = None  # Lo que se guarda como "modelo_usado" en las rutinas generadas
+
+    @abstractmethod
+    def predecir(self, genero: str, objetivo: str, edad: float, peso: float, altura: float,
+                 tmb: float, imc: float) -> str:
+        """Nivel de un perfil; ValueError si el género/objetivo no se conoce"""
+
+    def predecir_lote(self, generos, objetivos, edades, pesos, alturas, tmb, imc) -> np.ndarray:
+        """Niveles de varios perfiles (arrays alineados); por defecto, uno por uno"""
+        return np.array([
+            self.predecir(*fila) for fila in zip(generos, objetivos, edades, pesos, alturas, tmb, imc)
+        ], dtype=object)
+
+
+class PredictorBosque(PredictorNivel):
+    """RandomForest entrenado + LabelEncoders"""
+
+    nombre = 'bosque'
+    descripcion = 'random_forest'
+
+    def __init__(self, model, label_encoders: Dict):
+        self.model = model
+        self.label_encoders = label_encoders
+
+    def _caracteristicas(self, generos, objetivos, edades, pesos, alturas, tmb, imc) -> np.ndarray:
+        genero_encoded = self.label_encoders['genero'].transform(generos)
+        objetivo_encoded = self.label_encoders['objetivo'].transform(objetivos)
+        return np.column_stack([edades, pesos, alturas, tmb, imc, genero_encoded, objetivo_encoded])
+
+    def predecir(self, genero, objetivo, edad, peso, altura, tmb, imc):
+        return self.predecir_lote([genero], [objetivo], [edad], [peso], [altura], [tmb], [imc])[0]
+
+    def predecir_lote(self, generos, objetivos, edades, pesos, alturas, tmb, imc):
+        caracteristicas = self._caracteristicas(generos, objetivos, edades, pesos, alturas, tmb, imc)
+        niveles_encoded = self.model.predict(caracteristicas)
+        return self.label_encoders['nivel'].inverse_transform(niveles_encoded).astype(object)
+
+
+class PredictorReglas(PredictorNivel):
+    """Umbrales de REGLAS_NIVEL compilados a una función Python por género"""
+
+    nombre = 'reglas'
+    descripcion = 'reglas_compiladas'
+
+    def __init__(self, reglas: Dict[str, List[tuple]] = REGLAS_NIVEL, objetivos: Optional[List[str]] = None):
+        self.reglas = reglas
+        # Las reglas no dependen del objetivo, pero uno desconocido se rechaza igual que en el bosque
+        self.objetivos = frozenset(objetivos) if objetivos is not None else None
+        self._funciones = {genero: self._compilar(reglas_genero) for genero, reglas_genero in reglas.items()}
+
+    @staticmethod
+    def _compilar(reglas_genero: List[tuple]) -> Callable:
+        lineas = ["def clasificar(edad, tmb, imc):"]
+        for tmb_min, edad_max, imc_max, nivel in reglas_genero:
+            lineas.append(f"    if tmb > {tmb_min!r} and edad < {edad_max!r} and imc < {imc_max!r}:")
+            lineas.append(f"        return {nivel!r}")
+        lineas.append(f"    return {NIVEL_POR_DEFECTO!r}")
+        return _compilar_funcion("\n".join(lineas), "clasificar")
+
+    def predecir(self, genero, objetivo, edad, peso, altura, tmb, imc):
+        funcion = self._funciones.get(genero)
+        if funcion is None:
+            raise ValueError(f"Género desconocido: {genero}")
+        if self.objetivos is not None and objetivo not in self.objetivos:
+            raise ValueError(f"Objetivo desconocido: {objetivo}")
+        return funcion(edad, tmb, imc)
+
+    def predecir_lote(self, generos, objetivos, edades, pesos, alturas, tmb, imc):
+        generos = np.asarray(generos, dtype=object)
+        desconocidos = ~np.isin(generos, list(self.reglas))
+        if desconocidos.any():
+            raise ValueError(f"Género desconocido: {generos[desconocidos][0]}")
+        if self.objetivos is not None:
+            objetivos = np.asarray(objetivos, dtype=object)
+            desconocidos = ~np.isin(objetivos, list(self.objetivos))
+            if desconocidos.any():
+                raise ValueError(f"Objetivo desconocido: {objetivos[desconocidos][0]}")
+
+        edades, tmb, imc = np.asarray(edades), np.asarray(tmb), np.asarray(imc)
+        niveles = np.full(len(generos), NIVEL_POR_DEFECTO, dtype=object)
+
+        for genero, reglas_genero in self.reglas.items():
+            del_genero = generos == genero
+            # Se aplican de la menos a la más prioritaria: la última que cumple es la que queda
+            for tmb_min, edad_max, imc_max, nivel in reversed(reglas_genero):
+                niveles[del_genero & (tmb > tmb_min) & (edades < edad_max) & (imc < imc_max)] = nivel
+
+        return niveles
+
+
+class PredictorArbolDestilado(PredictorNivel):
+    """Árbol de decisión poco profundo exportado a if/else de Python (sin numpy ni sklearn al predecir)"""
+
+    nombre = 'arbol'
+    descripcion = 'arbol_destilado'
+
+    def __init__(self, fuente: str, codigos_genero: Dict[str, int], codigos_objetivo: Dict[str, int]):
+        self.fuente = fuente
+        self.codigos_genero = codigos_genero
+        self.codigos_objetivo = codigos_objetivo
+        self._funcion = _compilar_funcion(fuente, "predecir")
+
+    def predecir(self, genero, objetivo, edad, peso, altura, tmb, imc):
+        try:
+            genero_codigo = self.codigos_genero[genero]
+            objetivo_codigo = self.codigos_objetivo[objetivo]
+        except KeyError as e:
+            raise ValueError(f"Categoría desconocida: {e}")
+        return self._funcion(edad, peso, altura, tmb, imc, genero_codigo, objetivo_codigo)
+
+    def a_dict(self) -> dict:
+        """Datos para guardar en el pickle del modelo"""
+        return {
+            'fuente': self.fuente,
+            'codigos_genero': self.codigos_genero,
+            'codigos_objetivo': self.codigos_objetivo
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> 'PredictorArbolDestilado':
+        return cls(datos['fuente'], datos['codigos_genero'], datos['codigos_objetivo'])
+
+
+def exportar_arbol(arbol, nombres: List[str], clases: List[str]) -> str:
+    """Código Python (if/else anidados) equivalente a un DecisionTreeClassifier entrenado"""
+    t = arbol.tree_
+    lineas = [f"def predecir({', '.join(nombres)}):"]
+
+    def nodo(i, profundidad):
+        sangria = "    " * profundidad
+        if t.children_left[i] == -1:  # Hoja
+            lineas.append(f"{sangria}return {clases[int(t.value[i][0].argmax())]!r}")
+            return
+        lineas.append(f"{sangria}if {nombres[t.feature[i]]} <= {float(t.threshold[i])!r}:")
+        nodo(t.children_left[i], profundidad + 1)
+        lineas.append(f"{sangria}else:")
+        nodo(t.children_right[i], profundidad + 1)
+
+    nodo(0, 1)
+    return "\n".join(lineas) + "\n"
+
+
+def destilar_arbol(model, label_encoders: Dict, profundidad: int = 8, muestras: int = 50000,
+                   semilla: int = 42) -> PredictorArbolDestilado:
+    """Entrenar un árbol poco profundo que imite al bosque sobre perfiles sintéticos"""
+    from sklearn.tree import DecisionTreeClassifier
+
+    rng = np.random.default_rng(semilla)
+    generos = label_encoders['genero'].classes_
+    objetivos = label_encoders['objetivo'].classes_
+
+    # Rangos que aceptan los endpoints (edad 16-80, peso 30-200 kg, altura 1.2-2.2 m)
+    edades = rng.integers(16, 81, size=muestras).astype(float)
+    pesos = rng.uniform(30, 200, size=muestras)
+    alturas = rng.uniform(1.2, 2.2, size=muestras)
+    genero_codigos = rng.integers(0, len(generos), size=muestras)
+    objetivo_codigos = rng.integers(0, len(objetivos), size=muestras)
+
+    es_hombre = generos[genero_codigos] == 'Masculino'
+    tmb = np.where(
+        es_hombre,
+        66 + (13.7 * pesos) + (5 * alturas * 100) - (6.8 * edades),
+        655 + (9.6 * pesos) + (1.8 * alturas * 100) - (4.7 * edades)
+    ).round(2)
+    imc = pesos / (alturas ** 2)
+
+    X = np.column_stack([edades, pesos, alturas, tmb, imc, genero_codigos, objetivo_codigos])
+    y = model.predict(X)
+
+    arbol = DecisionTreeClassifier(max_depth=profundidad, random_state=semilla)
+    arbol.fit(X, y)
+
+    nombres = ['edad', 'peso', 'altura', 'tmb', 'imc', 'genero', 'objetivo']
+    clases = [str(c) for c in label_encoders['nivel'].inverse_transform(arbol.classes_)]
+    fuente = exportar_arbol(arbol, nombres, clases)
+
+    return PredictorArbolDestilado(
+        fuente,
+        {str(g): i for i, g in enumerate(generos)},
+        {str(o): i for i, o in enumerate(objetivos)}
+    )
+
+
+def crear_predictor(nombre: str, model, label_encoders: Dict,
+                    arbol: Optional[PredictorArbolDestilado] = None) -> PredictorNivel:
+    """Instanciar el backend pedido (con vuelta al bosque si el árbol no está disponible)"""
+    if nombre == 'reglas':
+        objetivos = label_encoders.get('objetivo')
+        return PredictorReglas(objetivos=[str(o) for o in objetivos.classes_] if objetivos is not None else None)
+    if nombre == 'arbol':
+        if arbol is not None:
+            return arbol
+        print("⚠️ Árbol destilado no disponible, usando el bosque")
+    elif nombre != 'bosque':
+        print(f"⚠️ Predictor '{nombre}' desconocido (opciones: {PREDICTORES_DISPONIBLES}), usando el bosque")
+    return PredictorBosque(model, label_encoders)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum as SQLEnum, Text, Index, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, TSRANGE
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -19,7 +20,24 @@ class Reserva(Base):
     fecha_reserva = Column(DateTime(timezone=True), server_default=func.now())
     asistencia = Column(Integer)
     comentarios = Column(Text)
+    # Copia de fecha + hora_inicio/hora_fin del horario como rango [inicio, fin): la usa la exclusión de equipos
+    periodo = Column(TSRANGE)
     usuario = relationship("Usuario", back_populates="reservas")
     horario = relationship("Horario")
     equipo = relationship("EquipoPowerplate")
-    rutina = relationship("Rutina")
\ No newline at end of file
+    rutina = relationship("Rutina")
+    
+    __table_args__ = (
+        # Cupo y reserva duplicada (validar_reserva): solo importan las confirmadas
+        Index("ix_reserva_horario_usuario_confirmada", id_horario, id_usuario,
+              postgresql_where=text("estado = 'confirmada'")),
+        # Historial del usuario (obtener_rutinas_realizadas_usuario, reservas por usuario)
+        Index("ix_reserva_usuario_estado_fecha", id_usuario, estado, fecha_reserva.desc()),
+        # Listado general paginado por cursor (fecha_reserva, id_reserva), recorrido hacia atrás
+        Index("ix_reserva_fecha_id", fecha_reserva, id_reserva),
+        # Un equipo powerplate no puede tener dos reservas confirmadas que se crucen en el tiempo
+        # (índice GiST; requiere la extensión btree_gist para comparar id_equipo con =)
+        ExcludeConstraint((id_equipo, "="), (periodo, "&&"),
+                          name="ex_reserva_equipo_periodo", using="gist",
+                          where=text("estado = 'confirmada' AND id_equipo IS NOT NULL")),
+    )
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, ForeignKey
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy import Column, Integer, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from app.database import Base
 from sqlalchemy.orm import relationship
 from typing import List
@@ -8,10 +8,18 @@ class Rutina(Base):
     __tablename__ = "rutina"
 
     id_rutina = Column(Integer, primary_key=True, index=True)
-    nombre_ejercicio = Column(JSON, nullable=False)  # Array JSON de strings
-    partes_musculo = Column(JSON, nullable=False)    # Array JSON de strings
-    repeticiones = Column(JSON, nullable=False)      # Array JSON de integers
-    series = Column(JSON, nullable=False)           # Array JSON de integers
+    nombre_ejercicio = Column(JSONB, nullable=False)  # Array JSON de strings
+    partes_musculo = Column(JSONB, nullable=False)    # Array JSON de strings
+    repeticiones = Column(JSONB, nullable=False)      # Array JSON de integers
+    series = Column(JSONB, nullable=False)           # Array JSON de integers
     id_usuario = Column(Integer, ForeignKey('usuario.id_usuario'), nullable=False)
     
-    horarios = relationship("Horario", back_populates="rutina")
\ No newline at end of file
+    horarios = relationship("Horario", back_populates="rutina")
+    
+    __table_args__ = (
+        # Búsquedas por contención (partes_musculo @> '["espalda"]') resueltas con el índice
+        Index("ix_rutina_partes_musculo_gin", partes_musculo, postgresql_using="gin",
+              postgresql_ops={"partes_musculo": "jsonb_path_ops"}),
+        Index("ix_rutina_nombre_ejercicio_gin", nombre_ejercicio, postgresql_using="gin",
+              postgresql_ops={"nombre_ejercicio": "jsonb_path_ops"}),
+    )
@@ -1,8 +1,23 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, DECIMAL, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, DECIMAL, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+class PlanRutinaIA(Base):
+    """Contenido de un plan semanal, guardado una sola vez y direccionado por su hash SHA-256"""
+    __tablename__ = "plan_rutina_ia"
+    
+    hash_plan = Column(String(64), primary_key=True)
+    contenido = Column(JSONB, nullable=False)  # {"plan_detallado": [...], "resumen": {...}}
+    fecha_creacion = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Filtro por músculo: contenido @> '{"plan_detallado": [{"grupos_musculares": ["espalda"]}]}'
+        Index("ix_plan_rutina_ia_contenido_gin", contenido, postgresql_using="gin",
+              postgresql_ops={"contenido": "jsonb_path_ops"}),
+    )
+
 class RutinaIA(Base):
     __tablename__ = "rutina_ia"
     
@@ -12,8 +27,12 @@ class RutinaIA(Base):
     precision_modelo = Column(DECIMAL(5,3), default=0.995)
     fecha_generacion = Column(DateTime(timezone=True), server_default=func.now())
     
-    # Rutina completa en JSON
-    plan_semanal = Column(JSON, nullable=False)
+    # Plan compartido (plan_rutina_ia); varias rutinas con el mismo contenido apuntan al mismo hash
+    plan_hash = Column(String(64), ForeignKey("plan_rutina_ia.hash_plan"), index=True)
+    semilla = Column(DECIMAL(20,0))  # Semilla de generación (hasta 64 bits)
+    
+    # Rutina completa en JSON (solo filas anteriores a plan_rutina_ia; las nuevas usan plan_hash)
+    plan_semanal = Column(JSONB, nullable=True)
     
     # Metadatos del usuario al momento de generación
     nivel_usuario = Column(String(20))
@@ -32,4 +51,36 @@ class RutinaIA(Base):
     fecha_actualizacion = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relación con Usuario
-    usuario = relationship("Usuario", back_populates="rutinas_ia")
\ No newline at end of file
+    usuario = relationship("Usuario", back_populates="rutinas_ia")
+    plan = relationship("PlanRutinaIA")
+    
+    __table_args__ = (
+        # Historial por usuario (get_rutinas_ia_by_user): lectura por rango de índice, sin ordenar
+        Index("ix_rutina_ia_usuario_activa_fecha", usuario_id, activa, fecha_generacion.desc()),
+        Index("ix_rutina_ia_plan_semanal_gin", plan_semanal, postgresql_using="gin",
+              postgresql_ops={"plan_semanal": "jsonb_path_ops"},
+              postgresql_where=plan_semanal.isnot(None)),
+    )
+
+class RutinaIAArchivada(Base):
+    """Rutinas de IA inactivas y vencidas, movidas fuera de rutina_ia por la compactación"""
+    __tablename__ = "rutina_ia_archivo"
+    
+    id_rutina_ia = Column(Integer, primary_key=True, autoincrement=False)  # Mismo id que tenía en rutina_ia
+    usuario_id = Column(Integer, nullable=False, index=True)
+    modelo_usado = Column(String(50))
+    precision_modelo = Column(DECIMAL(5,3))
+    fecha_generacion = Column(DateTime(timezone=True))
+    plan_hash = Column(String(64))
+    semilla = Column(DECIMAL(20,0))
+    plan_semanal = Column(JSONB)
+    nivel_usuario = Column(String(20))
+    edad_usuario = Column(Integer)
+    peso_usuario = Column(DECIMAL(5,2))
+    altura_usuario = Column(DECIMAL(5,2))
+    objetivo_usuario = Column(String(50))
+    genero_usuario = Column(String(20))
+    tmb_usuario = Column(DECIMAL(7,2))
+    imc_usuario = Column(DECIMAL(5,2))
+    fecha_actualizacion = Column(DateTime(timezone=True))
+    fecha_archivado = Column(DateTime(timezone=True), server_default=func.now())
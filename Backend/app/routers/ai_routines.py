@@ -1,18 +1,26 @@
 # app/routers/ai_routines.py - Router CORREGIDO para manejar principiantes correctamente
-from datetime import datetime
-from app.crud.rutina_ia import create_rutina_ia
+import asyncio
+from app.crud.rutina_ia import create_rutinas_ia_bulk
 from app.schemas.rutina_ia import RutinaIACreate
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from pydantic import BaseModel
 
-# Importar el modelo de IA mejorado
-from app.models.ai_routines import ai_model
+# Referencia al modelo de IA (el motor con pandas/scikit-learn se importa al primer uso)
+from app.models.modelo_activo import modelo_activo
+from app.utils.semillas import semilla_usuario
+from app.utils.trabajos_entrenamiento import iniciar_entrenamiento, obtener_trabajo, trabajo_activo
+from app.utils.ejecutor_ia import con_sesion_propia, ejecutor_ia
+from app.utils.escritura_rutinas_ia import escritura_rutinas_ia
 from app.models.users import Usuario
 from app.database import get_db
+from app.enums import ParteMusculo
 from app.crud.reservas import obtener_rutinas_realizadas_usuario, calcular_frecuencia_entrenamiento
 
+if TYPE_CHECKING:
+    from app.models.ai_routines import CalisthenicsAI
+
 router = APIRouter(tags=["AI Routines"])
 
 
@@ -32,6 +40,16 @@ class HistorialUsuarioResponse(BaseModel):
     total_entrenamientos: int
     ultimo_entrenamiento: Optional[str] = None
 
+class AjusteHistorialResponse(BaseModel):
+    indice: int  # Posición del ejercicio en `ejercicios`
+    musculo: str
+    ejercicio: str
+    campo: str  # 'series' o 'repeticiones'
+    antes: int
+    despues: int
+    regla: str  # musculo_reciente / frecuencia_alta / frecuencia_baja / asistencia_baja
+    motivo: str
+
 class RutinaConHistorialResponse(BaseModel):
     dia: str
     grupos_musculares: List[str]
@@ -39,6 +57,7 @@ class RutinaConHistorialResponse(BaseModel):
     es_dia_descanso: bool
     ajustes_aplicados: List[str]  # Qué ajustes se hicieron por el historial
     intensidad_modificada: bool
+    ajustes_detalle: List[AjusteHistorialResponse] = []  # Cada cambio, con valor anterior y regla
 
 class RoutineWithHistoryResponse(BaseModel):
     usuario_id: int
@@ -79,6 +98,31 @@ class RoutinePredictionResponse(BaseModel):
     resumen: ResumenRutinaResponse  # NUEVO: resumen de la rutina
     mensaje: str
 
+class PerfilLoteRequest(BaseModel):
+    genero: str
+    edad: int
+    peso: float
+    altura: float
+    objetivo: str
+    nivel: Optional[str] = None
+
+class RoutineBatchRequest(BaseModel):
+    user_ids: List[int] = []
+    perfiles: List[PerfilLoteRequest] = []
+    guardar: bool = True  # Guardar en rutina_ia las rutinas de usuarios existentes
+
+class ErrorLoteResponse(BaseModel):
+    usuario_id: Optional[int] = None
+    indice_perfil: Optional[int] = None
+    detalle: str
+
+class RoutineBatchResponse(BaseModel):
+    rutinas: List[RoutinePredictionResponse]
+    errores: List[ErrorLoteResponse]
+    total_generadas: int
+    total_guardadas: int
+    mensaje: str
+
 class DescansoInfoResponse(BaseModel):
     reglas_descanso: Dict[str, int]
     musculos_grandes: List[str]
@@ -159,91 +203,142 @@ def crear_resumen_rutina(plan_detallado: List[DiaRutinaResponse], nivel: str) ->
         mensaje_nivel=mensaje_nivel
     )
 
-@router.post("/train-model")
+def generar_plan_detallado(ai_model: 'CalisthenicsAI', genero: str, edad: int, peso: float, altura: float,
+                           objetivo: str, nivel: str, semilla: Optional[int] = None) -> List[DiaRutinaResponse]:
+    """Generar el plan de los 7 días en formato de respuesta (reproducible si se pasa `semilla`)"""
+    config_nivel = ai_model.config_ejercicios.get(nivel, ai_model.config_ejercicios['intermedio'])
+    plan_muscular = ai_model.generar_plan_inteligente(genero, edad, peso, altura, objetivo, nivel)
+    
+    # Toda la semana en una pasada (sin repetir ejercicios entre días mientras haya alternativas)
+    semana = ai_model.generar_semana(genero, objetivo, nivel, rng=semilla)
+    
+    plan_detallado = []
+    dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+    
+    for dia in dias_semana:
+        musculos_dia = plan_muscular.get(dia, [])
+        es_dia_descanso = len(musculos_dia) == 0
+        
+        if not es_dia_descanso:
+            ejercicios_dia_raw = semana.get(dia, [])
+            ejercicios_response = [
+                EjercicioResponse(
+                    musculo=ej['musculo'],
+                    ejercicio=ej['ejercicio'],
+                    repeticiones=ej['repeticiones'],
+                    series=ej['series']
+                )
+                for ej in ejercicios_dia_raw
+            ]
+        else:
+            ejercicios_response = []
+        
+        plan_detallado.append(DiaRutinaResponse(
+            dia=dia,
+            grupos_musculares=musculos_dia,
+            ejercicios=ejercicios_response,
+            tipo_entrenamiento=config_nivel['tipo_entrenamiento'],
+            es_dia_descanso=es_dia_descanso,
+            total_ejercicios=len(ejercicios_response)
+        ))
+    
+    return plan_detallado
+
+def crear_rutina_ia_data(usuario, plan_detallado: List[DiaRutinaResponse], resumen: ResumenRutinaResponse,
+                         perfil: PerfilUsuarioResponse, altura_metros: float,
+                         semilla: Optional[int] = None, modelo_usado: str = "random_forest") -> RutinaIACreate:
+    """Armar los datos a guardar en rutina_ia para una rutina generada"""
+    return RutinaIACreate(
+        usuario_id=usuario.id_usuario,
+        # Solo el contenido del plan: se guarda una vez por hash y lo comparten todas las rutinas iguales.
+        # El perfil y los metadatos de la generación van en las columnas de rutina_ia.
+        plan_semanal={
+            "plan_detallado": [dia.dict() for dia in plan_detallado],
+            "resumen": resumen.dict()
+        },
+        modelo_usado=modelo_usado,
+        semilla=semilla,
+        nivel_usuario=perfil.nivel,
+        edad_usuario=usuario.edad,
+        peso_usuario=float(usuario.peso),
+        altura_usuario=float(altura_metros),
+        objetivo_usuario=usuario.objetivo,
+        genero_usuario=usuario.genero,
+        tmb_usuario=float(perfil.tmb),
+        imc_usuario=float(perfil.imc)
+    )
+
+def _buscar_dataset() -> Optional[str]:
+    """Ruta del CSV para entrenar, con la misma búsqueda que usa el modelo al cargar el dataset"""
+    return modelo_activo.actual()._resolver_ruta_dataset()
+
+@router.post("/train-model", status_code=202)
 async def train_model():
-    """Entrenar el modelo de IA con el dataset real"""
+    """Lanzar el entrenamiento del modelo de IA con el dataset real (en segundo plano)"""
+    en_curso = await asyncio.to_thread(trabajo_activo)
+    if en_curso:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Ya hay un entrenamiento en curso: /ai/train-jobs/{en_curso['trabajo_id']}"
+        )
+    
     try:
-        # Buscar archivo del dataset
-        dataset_path = None
-        possible_paths = [
-            "app/dataset/dataset_rutinas_calistenia_mejorado.csv",
-            "dataset_rutinas_calistenia_mejorado.csv",
-            "app/data/dataset_rutinas_calistenia_mejorado.csv",
-            "data/dataset_rutinas_calistenia_mejorado.csv"
-        ]
-
-        import os
-        for path in possible_paths:
-            if os.path.exists(path):
-                dataset_path = path
-                break
+        # Buscar archivo del dataset (acceso a disco: en el pool de IA, no en el event loop)
+        dataset_path = await ejecutor_ia.ejecutar(_buscar_dataset)
         
         if not dataset_path:
-            current_dir = os.getcwd()
-            print(f"Directorio actual: {current_dir}")
-            
-            # Buscar archivo manualmente
-            for root, dirs, files in os.walk(".."):
-                for file in files:
-                    if file == "dataset_rutinas_calistenia_mejorado.csv":
-                        dataset_path = os.path.join(root, file)
-                        break
-                if dataset_path:
-                    break
-            
-            if not dataset_path:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Dataset no encontrado. Colócalo en app/dataset/ o en la raíz del proyecto."
-                )
-        
-        # Entrenar modelo
-        exito, precision = ai_model.entrenar_modelo(dataset_path)
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Dataset no encontrado. Colócalo en app/dataset/ o en la raíz del proyecto."
+            )
         
-        if exito:
-            ai_model.guardar_modelo()
-            info_descanso = ai_model.obtener_info_descanso()
-            
-            return {
-                "modelo_entrenado": True,
-                "precision": precision,
-                "total_registros": len(ai_model.dataset) if ai_model.dataset is not None else 0,
-                "mensaje": f"Modelo entrenado exitosamente con precisión del {precision:.2%}",
-                "dataset_usado": dataset_path,
-                "objetivos_disponibles": list(ai_model.dataset['objetivo'].unique()) if ai_model.dataset is not None else [],
-                "generos_disponibles": list(ai_model.dataset['genero'].unique()) if ai_model.dataset is not None else [],
-                "sistema_descanso": {
-                    "implementado": True,
-                    "reglas_aplicadas": info_descanso["reglas_descanso"],
-                    "distribucion_generada": info_descanso["distribucion_actual"],
-                    "configuracion_niveles": info_descanso["config_ejercicios"],
-                    "tipos_entrenamiento": {
-                        "principiante": "full_body",
-                        "intermedio": "split",
-                        "avanzado": "split"
-                    }
-                }
-            }
-        else:
+        # Entrenar en un proceso aparte: el event loop sigue atendiendo otras peticiones.
+        # El lock de entrenamiento es compartido por todos los workers (uno a la vez)
+        trabajo = iniciar_entrenamiento(dataset_path)
+        if trabajo is None:
+            en_curso = await asyncio.to_thread(trabajo_activo)
             raise HTTPException(
-                status_code=500,
-                detail="Error al entrenar el modelo. Verifica que el dataset esté correctamente formateado."
+                status_code=409,
+                detail=f"Ya hay un entrenamiento en curso: /ai/train-jobs/{en_curso['trabajo_id']}"
+                if en_curso else "Ya hay un entrenamiento en curso"
             )
-            
+        
+        return {
+            "trabajo_id": trabajo["trabajo_id"],
+            "estado": trabajo["estado"],
+            "dataset_usado": dataset_path,
+            "estado_url": f"/ai/train-jobs/{trabajo['trabajo_id']}",
+            "mensaje": "Entrenamiento iniciado en segundo plano. Consulta el estado en estado_url."
+        }
+    
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error interno: {str(e)}"
         )
 
+@router.get("/train-jobs/{trabajo_id}")
+async def get_train_job(trabajo_id: str):
+    """Consultar el estado y las métricas de un entrenamiento en segundo plano (de cualquier worker)"""
+    trabajo = await asyncio.to_thread(obtener_trabajo, trabajo_id)
+    
+    if not trabajo:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Trabajo de entrenamiento {trabajo_id} no encontrado"
+        )
+    
+    return trabajo
+
 @router.get("/model-status")
-async def get_model_status():
+def get_model_status():
     """Obtener estado del modelo de IA"""
     # Intentar cargar modelo existente si no está entrenado
-    if not hasattr(ai_model.model, 'feature_importances_'):
-        ai_model.cargar_modelo()
+    ai_model = modelo_activo.obtener_listo() or modelo_activo.actual()
     
-    model_trained = hasattr(ai_model.model, 'feature_importances_') and ai_model.dataset is not None
+    model_trained = ai_model.esta_entrenado()
     info_descanso = ai_model.obtener_info_descanso() if model_trained else {}
     
     return {
@@ -256,19 +351,24 @@ async def get_model_status():
         "sistema_descanso_activo": bool(info_descanso.get("distribucion_actual")),
         "grupos_musculares_disponibles": ai_model.grupos_musculares,
         "niveles_configurados": list(ai_model.config_ejercicios.keys()) if model_trained else [],
-        "configuracion_niveles": info_descanso.get("config_ejercicios", {})
+        "configuracion_niveles": info_descanso.get("config_ejercicios", {}),
+        "predictor_nivel": ai_model.predictor.nombre if ai_model.predictor else None,
+        "cache_rutinas": ai_model.cache_rutinas.estadisticas(),
+        "ejecutor_ia": ejecutor_ia.estadisticas(),
+        "escritura_rutinas_ia": escritura_rutinas_ia.estadisticas()
     }
 
 @router.get("/descanso-info", response_model=DescansoInfoResponse)
-async def get_descanso_info():
+def get_descanso_info():
     """Obtener información detallada del sistema de descanso muscular"""
     
-    if not hasattr(ai_model.model, 'feature_importances_') or ai_model.dataset is None:
-        if not ai_model.cargar_modelo():
-            raise HTTPException(
-                status_code=503,
-                detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
-            )
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
     
     try:
         info_descanso = ai_model.obtener_info_descanso()
@@ -289,8 +389,17 @@ async def get_descanso_info():
         )
 
 @router.post("/predict-routine-for-user/{user_id}", response_model=RoutinePredictionResponse)
-async def predict_routine_for_user(user_id: int, db: Session = Depends(get_db)):
-    """CORREGIDO: Generar rutina personalizada para un usuario existente con soporte completo para principiantes"""
+async def predict_routine_for_user(user_id: int, semilla: Optional[int] = None):
+    """CORREGIDO: Generar rutina personalizada para un usuario existente con soporte completo para principiantes
+    
+    Sin `semilla` se usa la del usuario para la semana ISO actual: mismo usuario y semana -> mismo plan.
+    """
+    # La generación (con sus consultas a la BD, en una sesión propia del hilo) corre en el pool de IA
+    return await ejecutor_ia.ejecutar(_predict_routine_for_user, user_id, semilla)
+
+@con_sesion_propia
+def _predict_routine_for_user(user_id: int, semilla: Optional[int], db: Session) -> RoutinePredictionResponse:
+    """Parte síncrona de /predict-routine-for-user (se ejecuta en ejecutor_ia)"""
     
     # Buscar usuario en la base de datos
     usuario = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
@@ -312,12 +421,13 @@ async def predict_routine_for_user(user_id: int, db: Session = Depends(get_db)):
         )
     
     # Verificar que el modelo esté entrenado
-    if not hasattr(ai_model.model, 'feature_importances_') or ai_model.dataset is None:
-        if not ai_model.cargar_modelo():
-            raise HTTPException(
-                status_code=503,
-                detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
-            )
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
     
     try:
         # Convertir altura si está en cm
@@ -354,56 +464,20 @@ async def predict_routine_for_user(user_id: int, db: Session = Depends(get_db)):
         )
         
         # CORREGIDO: Generar plan según el nivel específico
-        plan_muscular = ai_model.generar_plan_inteligente(
+        if semilla is None:
+            semilla = semilla_usuario(user_id)
+        
+        plan_detallado = generar_plan_detallado(
+            ai_model,
             genero_input,
             usuario.edad,
             usuario.peso,
             altura_metros,
             usuario.objetivo,
-            nivel_final
+            nivel_final,
+            semilla
         )
         
-        # Generar rutina detallada para cada día
-        plan_detallado = []
-        dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-        
-        for dia in dias_semana:
-            musculos_dia = plan_muscular.get(dia, [])
-            es_dia_descanso = len(musculos_dia) == 0
-            
-            if not es_dia_descanso:
-                # Usar función que respeta límites por nivel y tipo de entrenamiento
-                ejercicios_dia_raw = ai_model.generar_rutina_inteligente(
-                    genero_input,
-                    usuario.objetivo,
-                    nivel_final,
-                    dia
-                )
-                
-                # Convertir a formato de respuesta
-                ejercicios_response = [
-                    EjercicioResponse(
-                        musculo=ej['musculo'],
-                        ejercicio=ej['ejercicio'],
-                        repeticiones=ej['repeticiones'],
-                        series=ej['series']
-                    )
-                    for ej in ejercicios_dia_raw
-                ]
-            else:
-                ejercicios_response = []
-            
-            dia_rutina = DiaRutinaResponse(
-                dia=dia,
-                grupos_musculares=musculos_dia,
-                ejercicios=ejercicios_response,
-                tipo_entrenamiento=config_nivel['tipo_entrenamiento'],
-                es_dia_descanso=es_dia_descanso,
-                total_ejercicios=len(ejercicios_response)
-            )
-            
-            plan_detallado.append(dia_rutina)
-        
         # NUEVO: Crear resumen de la rutina
         resumen = crear_resumen_rutina(plan_detallado, nivel_final)
         
@@ -414,31 +488,14 @@ async def predict_routine_for_user(user_id: int, db: Session = Depends(get_db)):
             mensaje_nivel = f"Rutina generada para nivel {nivel_final} (predicho por IA)"
         
         # NUEVO: Guardar automáticamente la rutina generada por IA
+        # Escritura diferida: se inserta por lotes en segundo plano, la respuesta no espera a la BD
         try:
-            rutina_ia_data = RutinaIACreate(
-                usuario_id=user_id,
-                plan_semanal={
-                    "plan_detallado": [dia.dict() for dia in plan_detallado],
-                    "resumen": resumen.dict(),
-                    "perfil": perfil.dict(),
-                    "metadata": {
-                        "modelo_usado": "random_forest",
-                        "precision": 0.995,
-                        "fecha_generacion": datetime.now().isoformat()
-                    }
-                },
-                nivel_usuario=nivel_final,
-                edad_usuario=usuario.edad,
-                peso_usuario=float(usuario.peso),
-                altura_usuario=float(altura_metros),
-                objetivo_usuario=usuario.objetivo,
-                genero_usuario=usuario.genero,
-                tmb_usuario=float(tmb),
-                imc_usuario=float(imc)
+            rutina_ia_data = crear_rutina_ia_data(
+                usuario, plan_detallado, resumen, perfil, altura_metros, semilla, ai_model.predictor.descripcion
             )
             
-            rutina_guardada = create_rutina_ia(db, rutina_ia_data)
-            print(f"✅ Rutina IA guardada con ID: {rutina_guardada.id_rutina_ia}")
+            if not escritura_rutinas_ia.encolar(rutina_ia_data):
+                print(f"⚠️ Warning: Cola de rutinas IA llena, no se guardará la rutina del usuario {user_id}")
             
         except Exception as e:
             print(f"⚠️ Warning: No se pudo guardar rutina IA: {e}")
@@ -469,14 +526,21 @@ async def predict_routine(
     nivel: str = None  # Parámetro opcional para nivel seleccionado por el usuario
 ):
     """CORREGIDO: Generar rutina personalizada para datos nuevos con soporte completo para principiantes"""
+    # La predicción y la generación corren en el pool de IA: no bloquean el event loop
+    return await ejecutor_ia.ejecutar(_predict_routine, genero, edad, peso, altura, objetivo, nivel)
+
+def _predict_routine(genero: str, edad: int, peso: float, altura: float, objetivo: str,
+                     nivel: Optional[str]) -> RoutinePredictionResponse:
+    """Parte síncrona de /predict-routine (se ejecuta en ejecutor_ia)"""
     
     # Verificar que el modelo esté entrenado
-    if not hasattr(ai_model.model, 'feature_importances_') or ai_model.dataset is None:
-        if not ai_model.cargar_modelo():
-            raise HTTPException(
-                status_code=503,
-                detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
-            )
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
     
     # Validar parámetros de entrada
     if genero.lower() not in ['masculino', 'femenino', 'hombre', 'mujer']:
@@ -551,57 +615,11 @@ async def predict_routine(
             frecuencia_semanal=config_nivel['frecuencia_semanal']
         )
         
-        # CORREGIDO: Generar plan según el nivel específico
-        plan_muscular = ai_model.generar_plan_inteligente(
-            genero_input,
-            edad,
-            peso,
-            altura,
-            objetivo,
-            nivel_final
+        # CORREGIDO: Generar plan según el nivel específico (toda la semana en una pasada)
+        plan_detallado = generar_plan_detallado(
+            ai_model, genero_input, edad, peso, altura, objetivo, nivel_final
         )
         
-        # Generar rutina detallada para cada día
-        plan_detallado = []
-        dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-        
-        for dia in dias_semana:
-            musculos_dia = plan_muscular.get(dia, [])
-            es_dia_descanso = len(musculos_dia) == 0
-            
-            if not es_dia_descanso:
-                # Usar función que respeta límites por nivel y tipo de entrenamiento
-                ejercicios_dia_raw = ai_model.generar_rutina_inteligente(
-                    genero_input,
-                    objetivo,
-                    nivel_final,
-                    dia
-                )
-                
-                # Convertir a formato de respuesta
-                ejercicios_response = [
-                    EjercicioResponse(
-                        musculo=ej['musculo'],
-                        ejercicio=ej['ejercicio'],
-                        repeticiones=ej['repeticiones'],
-                        series=ej['series']
-                    )
-                    for ej in ejercicios_dia_raw
-                ]
-            else:
-                ejercicios_response = []
-            
-            dia_rutina = DiaRutinaResponse(
-                dia=dia,
-                grupos_musculares=musculos_dia,
-                ejercicios=ejercicios_response,
-                tipo_entrenamiento=config_nivel['tipo_entrenamiento'],
-                es_dia_descanso=es_dia_descanso,
-                total_ejercicios=len(ejercicios_response)
-            )
-            
-            plan_detallado.append(dia_rutina)
-        
         # NUEVO: Crear resumen de la rutina
         resumen = crear_resumen_rutina(plan_detallado, nivel_final)
         
@@ -625,9 +643,164 @@ async def predict_routine(
             detail=f"Error generando rutina: {str(e)}"
         )
 
+@router.post("/predict-routine-batch", response_model=RoutineBatchResponse)
+async def predict_routine_batch(lote: RoutineBatchRequest):
+    """Generar rutinas para muchos usuarios/perfiles a la vez (una consulta y una predicción para todo el lote)"""
+    # La generación (con sus consultas a la BD, en una sesión propia del hilo) corre en el pool de IA
+    return await ejecutor_ia.ejecutar(_predict_routine_batch, lote)
+
+@con_sesion_propia
+def _predict_routine_batch(lote: RoutineBatchRequest, db: Session) -> RoutineBatchResponse:
+    """Parte síncrona de /predict-routine-batch (se ejecuta en ejecutor_ia)"""
+    
+    # Verificar que el modelo esté entrenado
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
+    
+    if not lote.user_ids and not lote.perfiles:
+        raise HTTPException(
+            status_code=400,
+            detail="Debes enviar al menos un user_id o un perfil"
+        )
+    
+    if len(lote.user_ids) + len(lote.perfiles) > 500:
+        raise HTTPException(
+            status_code=400,
+            detail="Máximo 500 rutinas por lote"
+        )
+    
+    errores = []
+    entradas = []  # (usuario o None, genero, edad, peso, altura, objetivo, nivel_preferido)
+    
+    # PASO 1: Cargar todos los usuarios en una sola consulta
+    user_ids = list(dict.fromkeys(lote.user_ids))
+    usuarios = db.query(Usuario).filter(Usuario.id_usuario.in_(user_ids)).all() if user_ids else []
+    usuarios_por_id = {usuario.id_usuario: usuario for usuario in usuarios}
+    
+    for user_id in user_ids:
+        usuario = usuarios_por_id.get(user_id)
+        if not usuario:
+            errores.append(ErrorLoteResponse(usuario_id=user_id, detalle=f"Usuario con ID {user_id} no encontrado"))
+            continue
+        
+        errores_usuario, nivel_usuario = validar_datos_usuario(usuario)
+        if errores_usuario:
+            errores.append(ErrorLoteResponse(
+                usuario_id=user_id,
+                detalle=f"El usuario no tiene datos completos. Faltan o son inválidos: {', '.join(errores_usuario)}"
+            ))
+            continue
+        
+        altura_metros = usuario.altura if usuario.altura < 10 else usuario.altura / 100
+        # Igual que /predict-routine-for-user: 'intermedio' en BD deja decidir a la IA
+        nivel_preferido = nivel_usuario if nivel_usuario != 'intermedio' else None
+        entradas.append((usuario, usuario.genero, usuario.edad, usuario.peso, altura_metros, usuario.objetivo, nivel_preferido))
+    
+    # PASO 2: Validar perfiles anónimos
+    for indice, perfil_req in enumerate(lote.perfiles):
+        if perfil_req.genero.lower() not in ['masculino', 'femenino', 'hombre', 'mujer']:
+            errores.append(ErrorLoteResponse(indice_perfil=indice, detalle="Género debe ser 'Masculino', 'Femenino', 'Hombre' o 'Mujer'"))
+            continue
+        if perfil_req.objetivo not in ['aumento de peso', 'perdida de peso']:
+            errores.append(ErrorLoteResponse(indice_perfil=indice, detalle="Objetivo debe ser 'aumento de peso' o 'perdida de peso'"))
+            continue
+        if perfil_req.nivel and perfil_req.nivel not in ['principiante', 'intermedio', 'avanzado']:
+            errores.append(ErrorLoteResponse(indice_perfil=indice, detalle="Nivel debe ser 'principiante', 'intermedio' o 'avanzado'"))
+            continue
+        
+        altura = perfil_req.altura / 100 if perfil_req.altura > 100 else perfil_req.altura
+        if not (16 <= perfil_req.edad <= 80) or not (1.2 <= altura <= 2.2) or not (30 <= perfil_req.peso <= 200):
+            errores.append(ErrorLoteResponse(indice_perfil=indice, detalle="Edad, altura o peso fuera de rango"))
+            continue
+        
+        genero_input = 'Masculino' if perfil_req.genero.lower() in ['masculino', 'hombre'] else 'Femenino'
+        entradas.append((None, genero_input, perfil_req.edad, perfil_req.peso, altura, perfil_req.objetivo, perfil_req.nivel))
+    
+    if not entradas:
+        return RoutineBatchResponse(
+            rutinas=[],
+            errores=errores,
+            total_generadas=0,
+            total_guardadas=0,
+            mensaje="Ninguna entrada válida en el lote"
+        )
+    
+    try:
+        # PASO 3: TMB/IMC con numpy y una sola predicción para todo el lote
+        _, generos, edades, pesos, alturas, objetivos, _ = zip(*entradas)
+        niveles_ia, tmbs, imcs = ai_model.predecir_perfiles(generos, edades, pesos, alturas, objetivos)
+        
+        # PASO 4: Generar el plan de cada entrada
+        rutinas = []
+        rutinas_a_guardar = []
+        
+        for (usuario, genero, edad, peso, altura, objetivo, nivel_preferido), nivel_ia, tmb, imc in zip(entradas, niveles_ia, tmbs, imcs):
+            nivel_final = nivel_preferido or nivel_ia
+            config_nivel = ai_model.config_ejercicios.get(nivel_final, ai_model.config_ejercicios['intermedio'])
+            
+            perfil = PerfilUsuarioResponse(
+                nivel=nivel_final,
+                tmb=float(tmb),
+                imc=float(imc),
+                rango_imc=calcular_rango_imc(float(imc)),
+                tipo_entrenamiento=config_nivel['tipo_entrenamiento'],
+                frecuencia_semanal=config_nivel['frecuencia_semanal']
+            )
+            
+            # Usuarios: semilla de la semana (mismo plan que /predict-routine-for-user); perfiles: aleatorio
+            semilla = semilla_usuario(usuario.id_usuario) if usuario else None
+            plan_detallado = generar_plan_detallado(ai_model, genero, edad, peso, altura, objetivo, nivel_final, semilla)
+            resumen = crear_resumen_rutina(plan_detallado, nivel_final)
+            
+            origen_nivel = "predicho por IA" if not nivel_preferido else "nivel del usuario"
+            rutinas.append(RoutinePredictionResponse(
+                usuario_id=usuario.id_usuario if usuario else None,
+                usuario_nombre=f"{usuario.nombre} {usuario.apellido_p}" if usuario else None,
+                perfil=perfil,
+                plan_semanal=plan_detallado,
+                resumen=resumen,
+                mensaje=f"Rutina generada para nivel {nivel_final} ({origen_nivel}) - {config_nivel['tipo_entrenamiento'].upper()} con descanso muscular inteligente"
+            ))
+            
+            if usuario and lote.guardar:
+                rutinas_a_guardar.append(crear_rutina_ia_data(
+                    usuario, plan_detallado, resumen, perfil, altura, semilla, ai_model.predictor.descripcion
+                ))
+        
+        # PASO 5: Insertar todas las rutinas de usuarios en una sola transacción
+        total_guardadas = 0
+        if rutinas_a_guardar:
+            try:
+                total_guardadas = len(create_rutinas_ia_bulk(db, rutinas_a_guardar))
+                print(f"✅ {total_guardadas} rutinas IA guardadas en lote")
+            except Exception as e:
+                db.rollback()
+                print(f"⚠️ Warning: No se pudieron guardar las rutinas IA del lote: {e}")
+        
+        return RoutineBatchResponse(
+            rutinas=rutinas,
+            errores=errores,
+            total_generadas=len(rutinas),
+            total_guardadas=total_guardadas,
+            mensaje=f"Lote procesado: {len(rutinas)} rutinas generadas, {len(errores)} con errores"
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando rutinas en lote: {str(e)}"
+        )
+
 @router.get("/dataset-info")
-async def get_dataset_info():
+def get_dataset_info():
     """Obtener información del dataset cargado"""
+    # Cargar el modelo guardado si todavía no se cargó (precarga pendiente o IA_PRECARGA=0)
+    ai_model = modelo_activo.obtener_listo() or modelo_activo.actual()
     if ai_model.dataset is None:
         raise HTTPException(
             status_code=404,
@@ -651,6 +824,8 @@ async def get_dataset_info():
             "ejercicios_unicos": len(df['ejercicio'].unique()) if 'ejercicio' in df.columns else 0,
             "distribucion_por_genero": df['genero'].value_counts().to_dict(),
             "distribucion_por_objetivo": df['objetivo'].value_counts().to_dict(),
+            # Tramos contiguos (genero, objetivo) del índice de ejercicios
+            "particiones": ai_model.tamanos_particiones(),
             "sistema_descanso": {
                 "reglas_implementadas": ai_model.reglas_descanso,
                 "grupos_musculares": ai_model.grupos_musculares,
@@ -667,15 +842,16 @@ async def get_dataset_info():
         )
 
 @router.get("/validar-descanso")
-async def validar_descanso():
+def validar_descanso():
     """Validar que la distribución actual respete las reglas de descanso"""
     
-    if not hasattr(ai_model.model, 'feature_importances_') or ai_model.dataset is None:
-        if not ai_model.cargar_modelo():
-            raise HTTPException(
-                status_code=503,
-                detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
-            )
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
     
     try:
         if not hasattr(ai_model, 'distribucion_dias') or not ai_model.distribucion_dias:
@@ -736,7 +912,7 @@ async def validar_descanso():
         )
 
 @router.get("/verificar-usuario/{user_id}")
-async def verificar_usuario_completo(user_id: int, db: Session = Depends(get_db)):
+def verificar_usuario_completo(user_id: int, db: Session = Depends(get_db)):
     """Verificar si un usuario tiene todos los datos necesarios para generar rutina"""
     
     usuario = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
@@ -816,20 +992,28 @@ async def obtener_ejemplo_principiante():
 async def predict_routine_with_history(
     user_id: int,
     dias_historial: int = 14,  # Últimas 2 semanas por defecto
-    db: Session = Depends(get_db)
+    semilla: Optional[int] = None  # Por defecto: usuario + semana ISO
 ):
     """
     Generar rutina personalizada considerando el historial REAL de entrenamientos
     basado en las reservas con asistencia registrada
     """
+    # La generación (con sus consultas a la BD, en una sesión propia del hilo) corre en el pool de IA
+    return await ejecutor_ia.ejecutar(_predict_routine_with_history, user_id, dias_historial, semilla)
+
+@con_sesion_propia
+def _predict_routine_with_history(user_id: int, dias_historial: int, semilla: Optional[int],
+                                  db: Session) -> RoutineWithHistoryResponse:
+    """Parte síncrona de /predict-routine-with-history (se ejecuta en ejecutor_ia)"""
     
     # Verificar que el modelo esté entrenado
-    if not hasattr(ai_model.model, 'feature_importances_') or ai_model.dataset is None:
-        if not ai_model.cargar_modelo():
-            raise HTTPException(
-                status_code=503,
-                detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
-            )
+    # Tomar una sola vez el modelo publicado y usarlo durante toda la petición
+    ai_model = modelo_activo.obtener_listo()
+    if ai_model is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modelo no entrenado. Ejecuta /ai/train-model primero."
+        )
     
     # Buscar usuario
     usuario = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
@@ -863,52 +1047,43 @@ async def predict_routine_with_history(
         # PASO 3: Preparar datos del usuario
         altura_metros = usuario.altura if usuario.altura < 10 else usuario.altura / 100
         genero_input = usuario.genero
+        if semilla is None:
+            semilla = semilla_usuario(user_id)
         
         # PASO 4: Generar plan semanal considerando historial
+        plan_muscular = ai_model.generar_plan_inteligente(
+            genero_input, usuario.edad, usuario.peso, altura_metros, 
+            usuario.objetivo, nivel_usuario
+        )
+        
+        # Una sola generación: semana base, semana ajustada y la lista de ajustes aplicados
+        semana = ai_model.generar_semana_considerando_historial(
+            genero_input, usuario.objetivo, nivel_usuario, historial_entrenamientos, rng=semilla
+        )
+        
         plan_semanal = []
         dias_semana = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
         
         for dia in dias_semana:
             print(f"\n🗓️ Procesando {dia}...")
             
-            # Obtener distribución muscular para el día
-            plan_muscular = ai_model.generar_plan_inteligente(
-                genero_input, usuario.edad, usuario.peso, altura_metros, 
-                usuario.objetivo, nivel_usuario
-            )
-            
             grupos_dia = plan_muscular.get(dia, [])
             es_dia_descanso = len(grupos_dia) == 0
             
             ajustes_aplicados = []
-            intensidad_modificada = False
+            ajustes_dia = semana['ajustes'].get(dia, [])
+            intensidad_modificada = bool(ajustes_dia)
             
             if not es_dia_descanso:
-                # Generar rutina considerando historial
+                ejercicios_raw = semana['ajustada'].get(dia, [])
+                
                 if historial_entrenamientos:
-                    ejercicios_raw = ai_model.generar_rutina_considerando_historial(
-                        genero_input, usuario.objetivo, nivel_usuario, dia, historial_entrenamientos
-                    )
-                    
-                    # Detectar ajustes aplicados
-                    rutina_normal = ai_model.generar_rutina_inteligente(
-                        genero_input, usuario.objetivo, nivel_usuario, dia
-                    )
-                    
-                    # Comparar para ver qué se ajustó
-                    for i, (ej_normal, ej_ajustado) in enumerate(zip(rutina_normal, ejercicios_raw)):
-                        if ej_normal['series'] != ej_ajustado['series']:
-                            ajustes_aplicados.append(f"Series de {ej_ajustado['musculo']} ajustadas por historial")
-                            intensidad_modificada = True
-                        if ej_normal['repeticiones'] != ej_ajustado['repeticiones']:
-                            ajustes_aplicados.append(f"Repeticiones de {ej_ajustado['musculo']} ajustadas por historial")
-                            intensidad_modificada = True
-                    
+                    # Un mensaje por campo y músculo ajustado (el detalle va en ajustes_detalle)
+                    ajustes_aplicados = list(dict.fromkeys(
+                        f"{ajuste['campo'].capitalize()} de {ajuste['musculo']} ajustadas por historial ({ajuste['motivo']})"
+                        for ajuste in ajustes_dia
+                    ))
                 else:
-                    # Sin historial, usar rutina normal
-                    ejercicios_raw = ai_model.generar_rutina_inteligente(
-                        genero_input, usuario.objetivo, nivel_usuario, dia
-                    )
                     ajustes_aplicados.append("Rutina estándar (sin historial disponible)")
                 
                 # Convertir a formato de respuesta
@@ -931,7 +1106,8 @@ async def predict_routine_with_history(
                 ejercicios=ejercicios_response,
                 es_dia_descanso=es_dia_descanso,
                 ajustes_aplicados=ajustes_aplicados,
-                intensidad_modificada=intensidad_modificada
+                intensidad_modificada=intensidad_modificada,
+                ajustes_detalle=[AjusteHistorialResponse(**ajuste) for ajuste in ajustes_dia]
             )
             
             plan_semanal.append(dia_rutina)
@@ -971,7 +1147,7 @@ async def predict_routine_with_history(
         )
 
 @router.get("/historial-usuario/{user_id}")
-async def obtener_historial_usuario(
+def obtener_historial_usuario(
     user_id: int,
     dias_atras: int = 30,
     db: Session = Depends(get_db)
@@ -999,15 +1175,17 @@ async def obtener_historial_usuario(
     }
 
 @router.get("/user-ai-routines/{user_id}")
-async def get_user_ai_routines(user_id: int, db: Session = Depends(get_db)):
-    """Obtener rutinas de IA generadas para un usuario específico"""
-    from app.crud.rutina_ia import get_rutinas_ia_by_user
+def get_user_ai_routines(user_id: int, musculo: Optional[ParteMusculo] = None, db: Session = Depends(get_db)):
+    """Obtener rutinas de IA generadas para un usuario específico (`?musculo=espalda` para filtrar)"""
+    from app.crud.rutina_ia import get_rutinas_ia_by_user, obtener_planes, plan_de_rutina
     
     usuario = db.query(Usuario).filter(Usuario.id_usuario == user_id).first()
     if not usuario:
         raise HTTPException(404, detail="Usuario no encontrado")
     
-    rutinas_ia = get_rutinas_ia_by_user(db, user_id)
+    rutinas_ia = get_rutinas_ia_by_user(db, user_id, musculo=musculo.value if musculo else None)
+    # Todos los planes referenciados en una sola consulta
+    planes = obtener_planes(db, (r.plan_hash for r in rutinas_ia))
     
     return {
         "usuario_id": user_id,
@@ -1021,7 +1199,9 @@ async def get_user_ai_routines(user_id: int, db: Session = Depends(get_db)):
                 "modelo_usado": r.modelo_usado,
                 "activa": r.activa,
                 "tmb": float(r.tmb_usuario) if r.tmb_usuario else None,
-                "imc": float(r.imc_usuario) if r.imc_usuario else None
+                "imc": float(r.imc_usuario) if r.imc_usuario else None,
+                "plan_hash": r.plan_hash,
+                "plan_semanal": plan_de_rutina(r, planes)
             }
             for r in rutinas_ia
         ],
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import date
 
 from app.database import get_db
@@ -16,6 +16,7 @@ from app.crud.horarios import (
     update_horario,
     delete_horario
 )
+from app.utils.paginacion import CABECERA_CURSOR, siguiente_cursor
 from app.utils.security import get_current_active_user, get_current_user
 from app.models.users import Usuario
 router = APIRouter()
@@ -30,9 +31,11 @@ def crear_horario(
 
 @router.get("/", response_model=List[HorarioOut])
 def listar_horarios(
+    response: Response,
     vista_semanal: bool = False,  # Nuevo parámetro para elegir vista
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,  # Paginación por cursor (cabecera X-Next-Cursor de la página anterior)
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
@@ -51,13 +54,18 @@ def listar_horarios(
                 status_code=403,
                 detail="Los clientes deben usar vista_semanal=true"
             )
-        return get_horarios(
+        horarios = get_horarios(
             db=db,
             user_rol=current_user.rol.value,
             user_id=current_user.id_usuario,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
+        next_cursor = siguiente_cursor(horarios, limit, lambda h: (h["fecha"], h["hora_inicio"], h["id_horario"]))
+        if next_cursor:
+            response.headers[CABECERA_CURSOR] = next_cursor
+        return horarios
 
 @router.post("/buscar/", response_model=List[HorarioOut])
 def buscar_horarios(
@@ -2,14 +2,16 @@ from enum import Enum
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import and_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.crud.reservas import cancelar_reserva as cancelar_reserva_db, registrar_asistencia, parse_json_field
 from app.models.users import Usuario
 from app.utils.security import get_current_active_user
 from app.models.reservas import Reserva
+from app.utils.paginacion import siguiente_cursor
 from app.database import get_db
 from app.schemas.reservas import AsistenciaUpdate, ListaReservasDetalladas, ReservaConAsistencia, ReservaCreate, ReservaCreateResponse, ReservaDetallada, ReservaInDB, ReservaUpdate, ReservaWithDetails
 from app.crud.reservas import (
+    contar_reservas,
     get_reservas_detalladas,
     create_reserva,
     get_reservas_con_detalles,
@@ -37,42 +39,21 @@ def crear_reserva(
             detail="Solo puedes crear reservas para ti mismo"
         )
     
-    # Verificar que el usuario existe y tiene categoría
-    usuario = db.execute(
-        "SELECT categoria FROM usuario WHERE id_usuario = :id",
-        {"id": reserva.id_usuario}
-    ).first()
-    
-    if not usuario:
-        raise HTTPException(400, detail="Usuario no existe")
-    
-    # Obtener tipo de horario
-    horario = db.execute(
-        "SELECT tipo FROM horario WHERE id_horario = :id",
-        {"id": reserva.id_horario}
-    ).first()
-    
-    if not horario:
-        raise HTTPException(400, detail="Horario no existe")
-    
-    # Validar coincidencia categoría usuario - tipo horario
-    if usuario.categoria != horario.tipo:
-        raise HTTPException(
-            400,
-            detail=f"Usuario de categoría {usuario.categoria} no puede reservar horario de tipo {horario.tipo}"
-        )
+    # Usuario, horario, categoría, equipo, cupo y duplicado se validan en una sola consulta
+    # dentro de create_reserva (crud.reservas.validar_reserva)
     
     # Convertir a dict y añadir estado por defecto
     reserva_data = reserva.dict()
     reserva_data["estado"] = "confirmada"
     
     # Crear reserva con validaciones
-    return create_reserva(db=db, reserva=reserva_data, user_roles=[current_user.rol])
+    return create_reserva(db=db, reserva=reserva_data)
 
 @router.get("/admin/todas", response_model=ListaReservasDetalladas)
 def obtener_todas_reservas_detalladas(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_user)
 ):
@@ -82,31 +63,36 @@ def obtener_todas_reservas_detalladas(
             detail="Solo administradores pueden ver todas las reservas"
         )
     
-    reservas = get_reservas_detalladas(db)[skip:skip + limit]
-    total = len(get_reservas_detalladas(db))
+    # La página se pide a la BD (skip o cursor) y el total es un COUNT
+    reservas = get_reservas_detalladas(db, skip=skip, limit=limit, cursor=cursor)
+    total = contar_reservas(db)
     
     return {
         "reservas": reservas,
         "total": total,
-        "pagina": (skip // limit) + 1,
-        "por_pagina": limit
+        "pagina": None if cursor else (skip // limit) + 1,  # Con cursor no hay número de página
+        "por_pagina": limit,
+        "next_cursor": siguiente_cursor(reservas, limit, lambda r: (r["fecha_reserva"], r["id_reserva"]))
     }
 
 @router.get("/mis-reservas/", response_model=ListaReservasDetalladas)
 def obtener_mis_reservas_detalladas(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_active_user)
 ):
-    reservas = get_reservas_detalladas(db, usuario_id=current_user.id_usuario)[skip:skip + limit]
-    total = len(get_reservas_detalladas(db, usuario_id=current_user.id_usuario))
+    # La página se pide a la BD (skip o cursor) y el total es un COUNT
+    reservas = get_reservas_detalladas(db, usuario_id=current_user.id_usuario, skip=skip, limit=limit, cursor=cursor)
+    total = contar_reservas(db, usuario_id=current_user.id_usuario)
     
     return {
         "reservas": reservas,
         "total": total,
-        "pagina": (skip // limit) + 1,
-        "por_pagina": limit
+        "pagina": None if cursor else (skip // limit) + 1,  # Con cursor no hay número de página
+        "por_pagina": limit,
+        "next_cursor": siguiente_cursor(reservas, limit, lambda r: (r["fecha_reserva"], r["id_reserva"]))
     }
 
 @router.put("/{reserva_id}/cancelar", response_model=ReservaDetallada)
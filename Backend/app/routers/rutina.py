@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 from app.database import get_db
+from app.enums import ParteMusculo
 from app.schemas.rutina import (
     Rutina, RutinaCreate, RutinaResponse, RutinaUpdate  # Asegúrate de usar los schemas actualizados
 )
@@ -75,11 +76,13 @@ def crear_rutina(
 def leer_rutinas(
     skip: int = 0, 
     limit: int = 100,
+    musculo: Optional[ParteMusculo] = None,
     db: Session = Depends(get_db),
     current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user)
 ):
     """
     Lista rutinas con diferentes privilegios.
+    Con `?musculo=espalda` solo devuelve las rutinas que trabajan ese músculo.
     
     Respuesta ejemplo:
     [
@@ -95,25 +98,33 @@ def leer_rutinas(
     ]
     """
     user_dict = get_user_dict(current_user)
-    return list_rutinas(db=db, current_user=user_dict, skip=skip, limit=limit)
+    return list_rutinas(
+        db=db,
+        current_user=user_dict,
+        skip=skip,
+        limit=limit,
+        musculo=musculo.value if musculo else None
+    )
 
 @router.get("/buscar/", response_model=List[Dict[str, Any]])
 def buscar_rutinas(
     termino: str = "",  # Hacer opcional con valor por defecto
     skip: int = 0,
     limit: int = 100,
+    musculo: Optional[ParteMusculo] = None,
     db: Session = Depends(get_db),
     current_user: Union[User, Dict[str, Any]] = Depends(get_current_active_user)
 ):
     """
     Busca rutinas según privilegios.
     Permite buscar por nombre de ejercicio, parte muscular o entrenador.
+    Con `?musculo=espalda` se restringe a rutinas que trabajan ese músculo.
     """
     try:
         user_dict = get_user_dict(current_user)
         
-        # Si no hay término, devolver rutinas vacías o todas
-        if not termino.strip():
+        # Si no hay término ni músculo, devolver rutinas vacías
+        if not termino.strip() and not musculo:
             return []
         
         return search_rutinas(
@@ -121,7 +132,8 @@ def buscar_rutinas(
             current_user=user_dict,
             search_term=termino,
             skip=skip,
-            limit=limit
+            limit=limit,
+            musculo=musculo.value if musculo else None
         )
     except Exception as e:
         raise HTTPException(
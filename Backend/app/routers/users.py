@@ -1,5 +1,5 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -14,6 +14,7 @@ from app.crud.users import (
     activate_user, get_user, get_user_with_metrics, get_users, create_user, search_users,
     update_user, deactivate_user, get_user_by_email
 )
+from app.utils.paginacion import CABECERA_CURSOR, siguiente_cursor
 from app.utils.security import get_current_active_user
 
 router = APIRouter()
@@ -57,13 +58,18 @@ from app.schemas.users import UserWithMetrics
 
 @router.get("/", response_model=List[UserWithMetrics])
 def read_users(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,  # Paginación por cursor (cabecera X-Next-Cursor de la página anterior)
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     if current_user.rol == UserRole.administrador:
-        db_users = get_users(db, skip=skip, limit=limit)
+        db_users = get_users(db, skip=skip, limit=limit, cursor=cursor)
+        next_cursor = siguiente_cursor(db_users, limit, lambda u: (u.id_usuario,))
+        if next_cursor:
+            response.headers[CABECERA_CURSOR] = next_cursor
     else:
         user = get_user(db, current_user.id_usuario)
         if not user:
@@ -89,6 +95,7 @@ Permite filtrar usuarios por:
 - Nivel de experiencia
 """)
 def advanced_user_search(
+    response: Response,
     rol: Optional[UserRole] = Query(None, description="Filtrar por rol de usuario"),
     nombre: Optional[str] = Query(None, description="Búsqueda por nombre (contiene texto)"),
     apellido_p: Optional[str] = Query(None, description="Búsqueda por apellido paterno (contiene texto)"),
@@ -106,6 +113,7 @@ def advanced_user_search(
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (cabecera X-Next-Cursor); reemplaza a skip"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
@@ -143,10 +151,14 @@ def advanced_user_search(
         "nivel": nivel,  # <-- NUEVO PARÁMETRO
         "activo": activo,
         "skip": skip,
-        "limit": limit
+        "limit": limit,
+        "cursor": cursor
     }
 
     db_users = search_users(db, **search_params)
+    next_cursor = siguiente_cursor(db_users, limit, lambda u: (u.id_usuario,))
+    if next_cursor:
+        response.headers[CABECERA_CURSOR] = next_cursor
     
     return [User.from_orm(user) for user in db_users]
 
@@ -155,8 +155,9 @@ class ReservaDetallada(BaseModel):
 class ListaReservasDetalladas(BaseModel):
     reservas: List[ReservaDetallada]
     total: int
-    pagina: int = 1
+    pagina: Optional[int] = 1  # None al paginar con cursor
     por_pagina: int = 10
+    next_cursor: Optional[str] = None  # Pasarlo como ?cursor= para pedir la página siguiente
 
 class AsistenciaUpdate(BaseModel):
     asistencia: int = Field(..., ge=0, le=100, description="Porcentaje de asistencia (0-100)")
@@ -5,7 +5,9 @@ from decimal import Decimal
 
 class RutinaIACreate(BaseModel):
     usuario_id: int
-    plan_semanal: Dict[str, Any]
+    plan_semanal: Dict[str, Any]  # Contenido del plan; se guarda una vez en plan_rutina_ia por hash
+    modelo_usado: Optional[str] = None
+    semilla: Optional[int] = None
     nivel_usuario: Optional[str] = None
     edad_usuario: Optional[int] = None
     peso_usuario: Optional[Decimal] = None
@@ -0,0 +1,102 @@
+import random
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Union
+
+# Valores por defecto del cache de rutinas diarias
+MAX_CLAVES = 256          # (genero, objetivo, nivel, dia) posibles: 2 x 2 x 3 x 7 = 84, más 12 semanas
+TAMANO_POOL = 8           # Rutinas candidatas precalculadas por clave
+
+
+class CacheRutinas:
+    """Cache LRU que guarda un pool de rutinas candidatas por clave
+
+    Sin expiración por tiempo: las candidatas salen de semillas derivadas de la clave, así que
+    regenerarlas daría las mismas. El pool queda fijo mientras no cambie el modelo (cargar o
+    entrenar llama a invalidar()); la variedad entre usuarios viene de elegir con su semilla.
+    """
+
+    def __init__(self, max_claves: int = MAX_CLAVES, tamano_pool: int = TAMANO_POOL):
+        self.max_claves = max_claves
+        self.tamano_pool = tamano_pool
+        self._entradas = OrderedDict()  # clave -> [rutina, ...]
+        self._en_curso: Dict[Hashable, threading.Event] = {}  # clave -> pool que se está generando
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.esperas = 0
+        self.evictions = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave: Hashable, generar: Callable[[int], Union[List[dict], Dict[str, List[dict]]]],
+                rng: Optional[random.Random] = None) -> Union[List[dict], Dict[str, List[dict]]]:
+        """Servir una rutina (o semana) del pool de la clave; si no hay pool se genera con `generar(indice)`"""
+        rng = rng or random
+
+        while True:
+            with self._lock:
+                pool = self._entradas.get(clave)
+                if pool is not None:
+                    self._entradas.move_to_end(clave)
+                    self.hits += 1
+                    return self._copiar(rng.choice(pool))
+
+                evento = self._en_curso.get(clave)
+                if evento is None:
+                    # Este hilo genera el pool; los demás esperan su resultado
+                    evento = self._en_curso[clave] = threading.Event()
+                    self.misses += 1
+                    break
+                self.esperas += 1
+
+            # Si la generación falla no queda pool: la siguiente vuelta lo intenta este hilo
+            evento.wait()
+
+        try:
+            # Generar fuera del lock: la generación es lenta y solo lee el modelo
+            pool = [generar(indice) for indice in range(self.tamano_pool)]
+
+            with self._lock:
+                self._entradas[clave] = pool
+                self._entradas.move_to_end(clave)
+                while len(self._entradas) > self.max_claves:
+                    self._entradas.popitem(last=False)
+                    self.evictions += 1
+        finally:
+            with self._lock:
+                self._en_curso.pop(clave, None)
+            evento.set()
+
+        return self._copiar(rng.choice(pool))
+
+    def invalidar(self) -> None:
+        """Vaciar el cache completo (p.ej. al entrenar o cargar un modelo nuevo)"""
+        with self._lock:
+            if self._entradas:
+                print(f"🧹 Cache de rutinas invalidado ({len(self._entradas)} claves)")
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Contadores del cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "claves": len(self._entradas),
+                "max_claves": self.max_claves,
+                "tamano_pool": self.tamano_pool,
+                "hits": self.hits,
+                "misses": self.misses,
+                "tasa_aciertos": round(self.hits / total, 4) if total else 0.0,
+                "esperas": self.esperas,
+                "evictions": self.evictions,
+                "invalidaciones": self.invalidaciones
+            }
+
+    @staticmethod
+    def _copiar(rutina):
+        # Copia por ejercicio: quien llama puede modificar la rutina sin tocar el pool.
+        # Las semanas (generar_semana) son {dia: rutina} y se copian día por día
+        if isinstance(rutina, dict):
+            return {dia: [ejercicio.copy() for ejercicio in ejercicios] for dia, ejercicios in rutina.items()}
+        return [ejercicio.copy() for ejercicio in rutina]
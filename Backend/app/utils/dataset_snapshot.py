@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Subir este número cuando cambie el formato de las tablas guardadas
+SNAPSHOT_VERSION = 2
+# Fuera de app/ (el código puede estar en un volumen de solo lectura); IA_SNAPSHOT_DIR lo cambia
+SNAPSHOT_DIR = os.getenv(
+    "IA_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(__file__), '..', '..', '.cache', 'snapshot_dataset')
+)
+
+
+def directorio_snapshot(ruta_csv: str) -> str:
+    """Directorio donde vive el snapshot de un CSV (uno por ruta absoluta del CSV)"""
+    ruta = os.path.abspath(ruta_csv)
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    huella = hashlib.sha256(ruta.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(os.path.abspath(SNAPSHOT_DIR), f"{nombre}-{huella}")
+
+
+def hash_contenido(ruta_csv: str) -> str:
+    """SHA-256 del contenido del CSV"""
+    sha = hashlib.sha256()
+    with open(ruta_csv, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _guardar_npy(ruta: str, arreglo: np.ndarray) -> None:
+    """Escribir un .npy de forma atómica (archivo temporal + os.replace)"""
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, arreglo)
+    os.replace(tmp, ruta)
+
+
+def _guardar_json(ruta: str, datos: dict) -> None:
+    """Escribir un JSON de forma atómica (archivo temporal + os.replace)"""
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def _guardar_tabla(directorio: str, prefijo: str, nombre: str, df: pd.DataFrame) -> Dict[str, dict]:
+    """Guardar cada columna como .npy (códigos + categorías para las categóricas y el texto)"""
+    columnas = {}
+    for columna in df.columns:
+        serie = df[columna]
+        archivo = f"{prefijo}_{nombre}_{len(columnas)}"
+
+        if serie.dtype == object:
+            # Texto como categoría (códigos + vocabulario): un array de str no se puede usar
+            # memory-mapped sin copiarlo a objetos Python, los códigos sí
+            serie = serie.astype(str).astype('category')
+
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos = serie.cat.codes.to_numpy()
+            categorias = np.asarray(serie.cat.categories.astype(str), dtype=str)
+            _guardar_npy(os.path.join(directorio, f"{archivo}_codigos.npy"), codigos)
+            _guardar_npy(os.path.join(directorio, f"{archivo}_categorias.npy"), categorias)
+            columnas[columna] = {'tipo': 'categoria', 'archivo': archivo}
+        else:
+            valores = serie.to_numpy()
+            _guardar_npy(os.path.join(directorio, f"{archivo}.npy"), valores)
+            columnas[columna] = {'tipo': 'numerico', 'archivo': archivo}
+
+    return columnas
+
+
+def _cargar_tabla(directorio: str, columnas: Dict[str, dict]) -> pd.DataFrame:
+    """Reconstruir un DataFrame a partir de los .npy (memory-mapped)
+
+    El texto vuelve como categoría sobre los códigos mapeados: solo las categorías se copian a memoria.
+    """
+    datos = {}
+    for columna, info in columnas.items():
+        base = os.path.join(directorio, info['archivo'])
+
+        if info['tipo'] == 'categoria':
+            codigos = np.load(f"{base}_codigos.npy", mmap_mode='r')
+            categorias = np.load(f"{base}_categorias.npy", mmap_mode='r')
+            datos[columna] = pd.Categorical.from_codes(codigos, categories=categorias.tolist())
+        else:
+            datos[columna] = np.load(f"{base}.npy", mmap_mode='r')
+
+    # copy=False: sin esto pandas copia cada columna y se pierde el memory-map
+    return pd.DataFrame(datos, columns=list(columnas.keys()), copy=False)
+
+
+def guardar_snapshot(ruta_csv: str, dataset: pd.DataFrame, tabla_ejercicios: pd.DataFrame) -> bool:
+    """Guardar las tablas ya procesadas del CSV en formato binario"""
+    try:
+        directorio = directorio_snapshot(ruta_csv)
+        os.makedirs(directorio, exist_ok=True)
+
+        stat = os.stat(ruta_csv)
+        sha256 = hash_contenido(ruta_csv)
+        prefijo = sha256[:16]
+
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'csv': os.path.basename(ruta_csv),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256,
+            'tablas': {
+                'dataset': _guardar_tabla(directorio, prefijo, 'dataset', dataset),
+                'tabla_ejercicios': _guardar_tabla(directorio, prefijo, 'tabla_ejercicios', tabla_ejercicios),
+            }
+        }
+
+        # meta.json se escribe al final: un lector nunca ve un snapshot a medias
+        _guardar_json(os.path.join(directorio, 'meta.json'), meta)
+
+        # Limpiar archivos de snapshots anteriores
+        for archivo in os.listdir(directorio):
+            if archivo.endswith('.npy') and not archivo.startswith(prefijo):
+                try:
+                    os.remove(os.path.join(directorio, archivo))
+                except OSError:
+                    pass
+
+        print(f"💾 Snapshot del dataset guardado en: {directorio}")
+        return True
+
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el snapshot del dataset: {e}")
+        return False
+
+
+def cargar_snapshot(ruta_csv: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Cargar (dataset, tabla_ejercicios) si el snapshot corresponde al CSV actual"""
+    directorio = directorio_snapshot(ruta_csv)
+    ruta_meta = os.path.join(directorio, 'meta.json')
+
+    if not os.path.exists(ruta_meta):
+        return None
+
+    try:
+        with open(ruta_meta, encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if meta.get('version') != SNAPSHOT_VERSION:
+            print("♻️ Snapshot del dataset con versión antigua, se regenerará")
+            return None
+
+        stat = os.stat(ruta_csv)
+        if stat.st_size != meta['size']:
+            print("♻️ Snapshot del dataset desactualizado (tamaño distinto)")
+            return None
+
+        # Mismo tamaño pero distinta fecha: confirmar con el hash del contenido. Los lectores no
+        # escriben meta.json (varios workers cargan a la vez); solo guardar_snapshot lo hace
+        if stat.st_mtime_ns != meta['mtime_ns'] and hash_contenido(ruta_csv) != meta['sha256']:
+            print("♻️ Snapshot del dataset desactualizado (contenido distinto)")
+            return None
+
+        dataset = _cargar_tabla(directorio, meta['tablas']['dataset'])
+        tabla_ejercicios = _cargar_tabla(directorio, meta['tablas']['tabla_ejercicios'])
+
+        print(f"⚡ Dataset cargado desde snapshot: {len(dataset)} registros")
+        return dataset, tabla_ejercicios
+
+    except Exception as e:
+        print(f"⚠️ Snapshot del dataset inválido, se usará el CSV: {e}")
+        return None
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+# Configuración por variables de entorno
+MAX_CONCURRENCIA = int(os.getenv("IA_MAX_CONCURRENCIA", os.cpu_count() or 4))  # Generaciones en paralelo
+MAX_COLA = int(os.getenv("IA_MAX_COLA", "64"))                                  # Esperando turno; más -> 503
+TIMEOUT_SEGUNDOS = float(os.getenv("IA_TIMEOUT_SEGUNDOS", "30"))                # Plazo por petición; vencido -> 504
+
+
+class EjecutorIA:
+    """Pool acotado de hilos para el trabajo síncrono de /ai (pandas, predicción, SQLAlchemy)
+
+    Los handlers async ceden la generación a este pool y esperan el resultado sin bloquear el
+    event loop. La cola tiene límite (lo que no entra se rechaza con 503) y cada petición tiene
+    un plazo (504 si se vence). Para usar más núcleos se levantan más workers de gunicorn
+    (ver gunicorn.conf.py); dentro de un worker, el pool evita que una rutina lenta frene al resto.
+    """
+
+    def __init__(self, max_concurrencia: int = MAX_CONCURRENCIA, max_cola: int = MAX_COLA,
+                 timeout_segundos: float = TIMEOUT_SEGUNDOS):
+        self.max_concurrencia = max_concurrencia
+        self.max_cola = max_cola
+        self.timeout_segundos = timeout_segundos
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.en_cola = 0
+        self.en_ejecucion = 0
+        self.max_cola_observada = 0
+        self.completadas = 0
+        self.errores = 0
+        self.rechazadas = 0
+        self.vencidas = 0
+        self._espera_total = 0.0
+        self._ejecucion_total = 0.0
+
+    def _obtener_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrencia, thread_name_prefix="ia")
+            return self._executor
+
+    async def ejecutar(self, funcion: Callable, *args, timeout_segundos: Optional[float] = None, **kwargs) -> Any:
+        """Ejecutar `funcion(*args, **kwargs)` en el pool y esperar su resultado"""
+        with self._lock:
+            if self.en_cola >= self.max_cola:
+                self.rechazadas += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor ocupado generando rutinas, intenta de nuevo en unos segundos",
+                    headers={"Retry-After": "1"}
+                )
+            self.en_cola += 1
+            self.max_cola_observada = max(self.max_cola_observada, self.en_cola)
+
+        encolada = time.perf_counter()
+
+        def tarea():
+            inicio = time.perf_counter()
+            with self._lock:
+                self.en_cola -= 1
+                self.en_ejecucion += 1
+                self._espera_total += inicio - encolada
+            try:
+                resultado = funcion(*args, **kwargs)
+                exito = True
+                return resultado
+            except BaseException:
+                exito = False
+                raise
+            finally:
+                with self._lock:
+                    self.en_ejecucion -= 1
+                    self._ejecucion_total += time.perf_counter() - inicio
+                    if exito:
+                        self.completadas += 1
+                    else:
+                        self.errores += 1
+
+        futuro = self._obtener_executor().submit(tarea)
+        plazo = timeout_segundos if timeout_segundos is not None else self.timeout_segundos
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(futuro), timeout=plazo)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.vencidas += 1
+                # Si todavía esperaba turno se descarta; si ya corría, termina en segundo plano
+                if futuro.cancel():
+                    self.en_cola -= 1
+            raise HTTPException(
+                status_code=504,
+                detail=f"La generación superó el plazo de {plazo:g} segundos"
+            )
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Métricas del pool (profundidad de cola, tiempos promedio, rechazos)"""
+        with self._lock:
+            terminadas = self.completadas + self.errores
+            return {
+                "max_concurrencia": self.max_concurrencia,
+                "max_cola": self.max_cola,
+                "timeout_segundos": self.timeout_segundos,
+                "en_cola": self.en_cola,
+                "en_ejecucion": self.en_ejecucion,
+                "max_cola_observada": self.max_cola_observada,
+                "completadas": self.completadas,
+                "errores": self.errores,
+                "rechazadas": self.rechazadas,
+                "vencidas": self.vencidas,
+                "espera_promedio_ms": round(self._espera_total / terminadas * 1000, 2) if terminadas else 0.0,
+                "ejecucion_promedio_ms": round(self._ejecucion_total / terminadas * 1000, 2) if terminadas else 0.0
+            }
+
+    def cerrar(self) -> None:
+        """Liberar los hilos del pool (al apagar la API)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def con_sesion_propia(funcion: Callable) -> Callable:
+    """Dar a `funcion` una sesión de BD abierta y cerrada en el hilo del pool (argumento `db`)
+
+    La sesión de la petición (get_db) no se pasa al pool: si vence el plazo, la tarea puede
+    seguir corriendo mientras get_db cierra esa sesión en otro hilo, y Session no es thread-safe.
+    """
+    @functools.wraps(funcion)
+    def con_sesion(*args, **kwargs):
+        # Importación diferida, como en escritura_rutinas_ia
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return funcion(*args, db=db, **kwargs)
+        finally:
+            db.close()
+    return con_sesion
+
+
+# Pool compartido por los handlers de /ai
+ejecutor_ia = EjecutorIA()
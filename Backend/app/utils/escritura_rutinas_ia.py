@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.schemas.rutina_ia import RutinaIACreate
+
+# Configuración por variables de entorno
+MAX_PENDIENTES = int(os.getenv("IA_ESCRITURA_MAX_PENDIENTES", "1000"))  # Memoria acotada: más -> se descarta
+TAMANO_LOTE = int(os.getenv("IA_ESCRITURA_LOTE", "100"))                 # Filas por INSERT multi-fila
+INTERVALO_SEGUNDOS = float(os.getenv("IA_ESCRITURA_INTERVALO", "0.5"))   # Espera máxima antes de escribir
+
+
+class EscrituraRutinasIA:
+    """Cola de escritura diferida (write-behind) para las rutinas de IA generadas
+
+    Los handlers encolan la rutina y responden sin esperar a la BD. Un hilo en segundo plano
+    junta lo pendiente y lo inserta por lotes con create_rutinas_ia_bulk (una transacción por
+    lote). Si la cola está llena la rutina se descarta y se cuenta; al apagar la API se vacía.
+    """
+
+    def __init__(self, max_pendientes: int = MAX_PENDIENTES, tamano_lote: int = TAMANO_LOTE,
+                 intervalo_segundos: float = INTERVALO_SEGUNDOS):
+        self.max_pendientes = max_pendientes
+        self.tamano_lote = tamano_lote
+        self.intervalo_segundos = intervalo_segundos
+        self._pendientes = deque()
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self._cerrando = False
+        self.encoladas = 0
+        self.escritas = 0
+        self.descartadas = 0
+        self.fallidas = 0
+        self.lotes = 0
+        self.max_pendientes_observado = 0
+
+    def encolar(self, rutina_data: RutinaIACreate) -> bool:
+        """Agregar una rutina a la cola; False si se descartó (cola llena o cerrando)"""
+        with self._condicion:
+            if self._cerrando or len(self._pendientes) >= self.max_pendientes:
+                self.descartadas += 1
+                return False
+
+            self._pendientes.append(rutina_data)
+            self.encoladas += 1
+            self.max_pendientes_observado = max(self.max_pendientes_observado, len(self._pendientes))
+
+            # El hilo se crea al primer uso (en el worker, no en el maestro de gunicorn)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escribir_en_segundo_plano,
+                                              name="escritura-rutinas-ia", daemon=True)
+                self._hilo.start()
+
+            if len(self._pendientes) >= self.tamano_lote:
+                self._condicion.notify()
+        return True
+
+    def _escribir_en_segundo_plano(self):
+        while True:
+            with self._condicion:
+                if len(self._pendientes) < self.tamano_lote and not self._cerrando:
+                    # Juntar más filas, salvo que el lote se llene antes del intervalo
+                    self._condicion.wait(timeout=self.intervalo_segundos)
+                if not self._pendientes and self._cerrando:
+                    return
+                lote = [self._pendientes.popleft() for _ in range(min(self.tamano_lote, len(self._pendientes)))]
+
+            if lote:
+                self._escribir_lote(lote)
+
+    def _escribir_lote(self, lote: List[RutinaIACreate]):
+        # Importación diferida: la BD solo se toca desde este hilo
+        from app.crud.rutina_ia import create_rutinas_ia_bulk
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            ids = create_rutinas_ia_bulk(db, lote)
+            with self._condicion:
+                self.escritas += len(ids)
+                self.lotes += 1
+        except Exception as e:
+            db.rollback()
+            with self._condicion:
+                self.fallidas += len(lote)
+            print(f"⚠️ Warning: No se pudieron guardar {len(lote)} rutinas IA: {e}")
+        finally:
+            db.close()
+
+    def vaciar(self, timeout_segundos: float = 10.0) -> bool:
+        """Esperar a que se escriba todo lo pendiente; False si no terminó a tiempo"""
+        limite = time.monotonic() + timeout_segundos
+        with self._condicion:
+            self._condicion.notify()
+        while time.monotonic() < limite:
+            with self._condicion:
+                if not self._pendientes and self.escritas + self.fallidas >= self.encoladas:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def cerrar(self, timeout_segundos: float = 10.0) -> None:
+        """Escribir lo pendiente y detener el hilo (al apagar la API)"""
+        with self._condicion:
+            self._cerrando = True
+            self._condicion.notify()
+            hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout_segundos)
+        with self._condicion:
+            if self._pendientes:
+                print(f"⚠️ Warning: {len(self._pendientes)} rutinas IA sin guardar al apagar")
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Contadores de la cola"""
+        with self._condicion:
+            return {
+                "pendientes": len(self._pendientes),
+                "max_pendientes": self.max_pendientes,
+                "max_pendientes_observado": self.max_pendientes_observado,
+                "tamano_lote": self.tamano_lote,
+                "encoladas": self.encoladas,
+                "escritas": self.escritas,
+                "lotes": self.lotes,
+                "descartadas": self.descartadas,
+                "fallidas": self.fallidas
+            }
+
+
+# Cola compartida por los handlers de /ai
+escritura_rutinas_ia = EscrituraRutinasIA()
@@ -0,0 +1,47 @@
+import gc
+from typing import Dict, Optional
+
+
+def memoria_proceso(pid: Optional[int] = None) -> Dict[str, float]:
+    """RSS, PSS y USS (MB) de un proceso según /proc/<pid>/smaps_rollup (solo Linux)
+
+    - rss: páginas residentes, contando completas las compartidas con otros procesos
+    - pss: las compartidas se reparten entre los procesos que las usan (sumable entre workers)
+    - uss: solo las privadas del proceso (lo que se libera si el worker muere)
+    """
+    ruta = f"/proc/{pid or 'self'}/smaps_rollup"
+    campos = {}
+    try:
+        with open(ruta) as archivo:
+            for linea in archivo:
+                partes = linea.split()
+                if len(partes) >= 2 and partes[0].endswith(':') and partes[1].isdigit():
+                    campos[partes[0][:-1]] = int(partes[1])  # kB
+    except OSError:
+        return {}
+
+    uss = campos.get('Private_Clean', 0) + campos.get('Private_Dirty', 0)
+    return {
+        'rss_mb': round(campos.get('Rss', 0) / 1024, 1),
+        'pss_mb': round(campos.get('Pss', 0) / 1024, 1),
+        'uss_mb': round(uss / 1024, 1),
+    }
+
+
+def resumen_memoria(pid: Optional[int] = None) -> str:
+    """Línea corta para los logs"""
+    datos = memoria_proceso(pid)
+    if not datos:
+        return "memoria no disponible (se necesita /proc/<pid>/smaps_rollup)"
+    return f"RSS {datos['rss_mb']} MB, PSS {datos['pss_mb']} MB, USS {datos['uss_mb']} MB"
+
+
+def preparar_fork():
+    """Llamar en el proceso padre después de precargar el modelo y antes de crear los workers
+
+    gc.freeze() mueve todos los objetos vivos a la generación permanente: el recolector de los
+    hijos ya no los recorre ni escribe en sus cabeceras, así las páginas del modelo siguen
+    compartidas (copy-on-write) en lugar de copiarse en cada worker.
+    """
+    gc.collect()
+    gc.freeze()
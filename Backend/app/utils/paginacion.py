@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from typing import Any, Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+# Cabecera con el cursor de la página siguiente en los listados que devuelven una lista simple
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(*valores) -> str:
+    """Cursor opaco con la clave de orden de la última fila de una página"""
+    clave = [v.isoformat() if isinstance(v, (date, time)) else v for v in valores]
+    texto = json.dumps(clave, separators=(",", ":"))
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _convertir(valor, tipo):
+    if tipo in (date, time, datetime):
+        return tipo.fromisoformat(valor)
+    return tipo(valor)
+
+
+def decodificar_cursor(cursor: str, *tipos) -> tuple:
+    """Cursor -> valores de la clave convertidos a `tipos` (int, date, time, datetime); 400 si no es válido"""
+    try:
+        clave = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(clave, list) or len(clave) != len(tipos):
+            raise ValueError("longitud de clave incorrecta")
+        return tuple(_convertir(valor, tipo) for valor, tipo in zip(clave, tipos))
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+
+def despues_del_cursor(query, columnas: Sequence, valores: Sequence, descendente: bool = False):
+    """Filtrar las filas que van después de la clave del cursor (keyset)
+
+    Compara la tupla de columnas completa, (c1, c2, id) > (v1, v2, id), así PostgreSQL arranca
+    directo en el índice en lugar de leer y descartar las filas de las páginas anteriores.
+    """
+    clave = tuple_(*columnas)
+    limite = tuple_(*valores)
+    return query.filter(clave < limite if descendente else clave > limite)
+
+
+def siguiente_cursor(filas: List[Any], limit: Optional[int], clave: Callable[[Any], Sequence]) -> Optional[str]:
+    """Cursor de la página siguiente, o None si esta página no se llenó (no hay más filas)"""
+    if not filas or limit is None or len(filas) < limit:
+        return None
+    return codificar_cursor(*clave(filas[-1]))
@@ -0,0 +1,33 @@
+import hashlib
+import random
+import sys
+from datetime import date
+from typing import Any, Optional, Union
+
+# Semilla o generador aceptado por las funciones de generación de rutinas
+# (int, random.Random o numpy.random.Generator; numpy no se importa aquí para no frenar el arranque)
+FuenteAleatoria = Union[None, int, random.Random, Any]
+
+
+def derivar_semilla(*partes) -> int:
+    """Semilla estable (entre procesos y reinicios) a partir de cualquier combinación de valores"""
+    texto = "|".join(str(parte) for parte in partes)
+    return int.from_bytes(hashlib.sha256(texto.encode('utf-8')).digest()[:8], 'big')
+
+
+def semilla_usuario(user_id: int, fecha: Optional[date] = None) -> int:
+    """Semilla por defecto: mismo usuario y misma semana ISO -> mismo plan"""
+    anio, semana, _ = (fecha or date.today()).isocalendar()
+    return derivar_semilla('usuario', user_id, anio, semana)
+
+
+def crear_rng(fuente: FuenteAleatoria = None) -> random.Random:
+    """Normalizar una semilla, random.Random o numpy Generator a un random.Random propio"""
+    if isinstance(fuente, random.Random):
+        return fuente
+    # Si numpy no está importado, `fuente` no puede ser un Generator
+    np = sys.modules.get('numpy')
+    if np is not None and isinstance(fuente, np.random.Generator):
+        return random.Random(int(fuente.integers(0, 2**63)))
+    # None -> semilla del sistema (no reproducible)
+    return random.Random(fuente)
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, Dict, Optional
+
+from app.models.modelo_activo import ModeloActivo, modelo_activo
+
+if TYPE_CHECKING:
+    from app.models.ai_routines import CalisthenicsAI
+
+RUTA_MODELO = ModeloActivo.RUTA_MODELO
+MAX_TRABAJOS_GUARDADOS = 50  # Historial de trabajos que se conserva en disco
+
+# Estado compartido por todos los workers de gunicorn, junto al .pkl: un JSON por trabajo,
+# un lock de archivo que tiene el worker que entrena y el id del trabajo que lo tiene
+DIRECTORIO_TRABAJOS = os.path.join(os.path.dirname(RUTA_MODELO), '.trabajos_entrenamiento')
+RUTA_LOCK = os.path.join(DIRECTORIO_TRABAJOS, 'entrenamiento.lock')
+RUTA_ACTIVO = os.path.join(DIRECTORIO_TRABAJOS, 'activo')
+
+# Estados: pendiente -> entrenando -> activando -> completado | error
+ESTADOS_ACTIVOS = ('pendiente', 'entrenando', 'activando')
+
+_executor: Optional[ProcessPoolExecutor] = None
+_tareas: Dict[str, asyncio.Task] = {}
+_archivo_lock: Optional[IO] = None  # Abierto (y bloqueado) mientras este worker entrena
+
+
+def _obtener_executor() -> ProcessPoolExecutor:
+    """Pool de un solo proceso para entrenar (creado al primer uso)"""
+    global _executor
+    if _executor is None:
+        # spawn: no heredar hilos ni conexiones abiertas del proceso del servidor
+        _executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+    return _executor
+
+
+def cerrar_executor() -> None:
+    """Liberar el proceso de entrenamiento (al apagar la API)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _bloquear(archivo: IO) -> bool:
+    """Lock exclusivo sin espera sobre `archivo`; el sistema lo libera si el proceso muere"""
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _desbloquear(archivo: IO) -> None:
+    """Soltar el lock de `archivo` y cerrarlo"""
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            archivo.seek(0)
+            msvcrt.locking(archivo.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+    finally:
+        archivo.close()
+
+
+def _lock_tomado() -> bool:
+    """True si algún worker (incluido este) tiene el lock de entrenamiento"""
+    if _archivo_lock is not None:
+        return True
+    os.makedirs(DIRECTORIO_TRABAJOS, exist_ok=True)
+    sonda = open(RUTA_LOCK, 'a+b')
+    if _bloquear(sonda):
+        _desbloquear(sonda)
+        return False
+    sonda.close()
+    return True
+
+
+def _leer_activo() -> Optional[str]:
+    try:
+        with open(RUTA_ACTIVO, encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _ruta_trabajo(trabajo_id: str) -> str:
+    return os.path.join(DIRECTORIO_TRABAJOS, f"{trabajo_id}.json")
+
+
+def _guardar_trabajo(trabajo: dict) -> None:
+    """Escribir el estado del trabajo de forma atómica (archivo temporal + os.replace)"""
+    ruta = _ruta_trabajo(trabajo['trabajo_id'])
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(trabajo, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+
+
+def _descartar_antiguos() -> None:
+    """Borrar los JSON de los trabajos más antiguos (solo lo hace el worker con el lock)"""
+    archivos = [
+        os.path.join(DIRECTORIO_TRABAJOS, nombre)
+        for nombre in os.listdir(DIRECTORIO_TRABAJOS) if nombre.endswith('.json')
+    ]
+    archivos.sort(key=os.path.getmtime)
+    for ruta in archivos[:max(0, len(archivos) - MAX_TRABAJOS_GUARDADOS)]:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def _entrenar_en_proceso(dataset_path: str, ruta_salida: str) -> dict:
+    """Se ejecuta en el proceso hijo: entrenar una instancia nueva y guardarla en `ruta_salida`"""
+    from app.models.ai_routines import CalisthenicsAI
+
+    ai = CalisthenicsAI()
+    exito, precision = ai.entrenar_modelo(dataset_path)
+
+    if not exito:
+        raise RuntimeError("Error al entrenar el modelo. Verifica que el dataset esté correctamente formateado.")
+    if not ai.guardar_modelo(ruta_salida):
+        raise RuntimeError("No se pudo guardar el modelo entrenado")
+
+    info_descanso = ai.obtener_info_descanso()
+    return {
+        "precision": float(precision),
+        "total_registros": len(ai.dataset),
+        "objetivos_disponibles": [str(o) for o in ai.dataset['objetivo'].unique()],
+        "generos_disponibles": [str(g) for g in ai.dataset['genero'].unique()],
+        "sistema_descanso": {
+            "implementado": True,
+            "reglas_aplicadas": info_descanso["reglas_descanso"],
+            "distribucion_generada": info_descanso["distribucion_actual"],
+            "configuracion_niveles": info_descanso["config_ejercicios"]
+        }
+    }
+
+
+def _cargar_instancia(ruta_modelo: str, dataset_path: str) -> 'CalisthenicsAI':
+    """Cargar el modelo recién entrenado en una instancia aparte (sin tocar la publicada)
+
+    Con el mismo `dataset_path` del entrenamiento: el índice de ejercicios tiene que salir del
+    dataset con el que se ajustó el modelo, no del dataset por defecto.
+    """
+    from app.models.ai_routines import CalisthenicsAI
+
+    nuevo = CalisthenicsAI()
+    if not nuevo.cargar_modelo(ruta_modelo, dataset_path):
+        raise RuntimeError(f"No se pudo cargar el modelo entrenado desde {ruta_modelo}")
+    if not nuevo.esta_entrenado():
+        raise RuntimeError("El modelo entrenado está incompleto (sin modelo o sin dataset)")
+    return nuevo
+
+
+async def _ejecutar_trabajo(trabajo: dict, dataset_path: str) -> None:
+    trabajo_id = trabajo['trabajo_id']
+    ruta_tmp = f"{RUTA_MODELO}.{trabajo_id}.tmp"
+    loop = asyncio.get_running_loop()
+    inicio = time.perf_counter()
+
+    try:
+        trabajo.update(estado='entrenando', iniciado=datetime.now().isoformat())
+        await asyncio.to_thread(_guardar_trabajo, trabajo)
+        metricas = await loop.run_in_executor(_obtener_executor(), _entrenar_en_proceso, dataset_path, ruta_tmp)
+
+        trabajo['estado'] = 'activando'
+        await asyncio.to_thread(_guardar_trabajo, trabajo)
+        nuevo = await asyncio.to_thread(_cargar_instancia, ruta_tmp, dataset_path)
+
+        # Publicar el archivo y activar el modelo nuevo con un único cambio de referencia;
+        # los demás workers ven el mtime nuevo del .pkl y lo recargan (ModeloActivo.obtener_listo)
+        os.replace(ruta_tmp, RUTA_MODELO)
+        modelo_activo.publicar(nuevo, RUTA_MODELO)
+
+        trabajo.update(
+            estado='completado',
+            metricas=metricas,
+            mensaje=f"Modelo entrenado exitosamente con precisión del {metricas['precision']:.2%}"
+        )
+        print(f"✅ Entrenamiento {trabajo_id} completado y modelo activado")
+
+    except Exception as e:
+        trabajo.update(estado='error', error=str(e), mensaje="El entrenamiento falló; se mantiene el modelo anterior")
+        print(f"❌ Entrenamiento {trabajo_id} falló: {e}")
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+
+    finally:
+        trabajo.update(
+            finalizado=datetime.now().isoformat(),
+            duracion_segundos=round(time.perf_counter() - inicio, 2)
+        )
+        await asyncio.to_thread(_liberar, trabajo)
+        _tareas.pop(trabajo_id, None)
+
+
+def _liberar(trabajo: dict) -> None:
+    """Guardar el estado final y soltar el lock para el próximo entrenamiento"""
+    global _archivo_lock
+    try:
+        _guardar_trabajo(trabajo)
+        if os.path.exists(RUTA_ACTIVO):
+            os.remove(RUTA_ACTIVO)
+    finally:
+        if _archivo_lock is not None:
+            _desbloquear(_archivo_lock)
+            _archivo_lock = None
+
+
+def trabajo_activo() -> Optional[dict]:
+    """Trabajo de entrenamiento aún en curso en cualquier worker, si lo hay"""
+    if not _lock_tomado():
+        return None
+    trabajo_id = _leer_activo()
+    return obtener_trabajo(trabajo_id) if trabajo_id else None
+
+
+def iniciar_entrenamiento(dataset_path: str) -> Optional[dict]:
+    """Registrar un trabajo de entrenamiento y lanzarlo en segundo plano
+
+    Devuelve None si otro entrenamiento (en este o en otro worker) tiene el lock.
+    """
+    global _archivo_lock
+    if _archivo_lock is not None:
+        return None
+
+    os.makedirs(DIRECTORIO_TRABAJOS, exist_ok=True)
+    archivo = open(RUTA_LOCK, 'a+b')
+    if not _bloquear(archivo):
+        archivo.close()
+        return None
+    _archivo_lock = archivo
+
+    trabajo_id = uuid.uuid4().hex
+    trabajo = {
+        "trabajo_id": trabajo_id,
+        "estado": "pendiente",
+        "dataset_usado": dataset_path,
+        "creado": datetime.now().isoformat(),
+        "iniciado": None,
+        "finalizado": None,
+        "duracion_segundos": None,
+        "metricas": None,
+        "error": None,
+        "mensaje": "Entrenamiento en cola"
+    }
+
+    try:
+        # Primero el id activo y después el JSON: quien lea un trabajo activo encuentra su lock
+        with open(RUTA_ACTIVO, 'w', encoding='utf-8') as f:
+            f.write(trabajo_id)
+        _guardar_trabajo(trabajo)
+        _descartar_antiguos()
+    except Exception:
+        _desbloquear(_archivo_lock)
+        _archivo_lock = None
+        raise
+
+    _tareas[trabajo_id] = asyncio.create_task(_ejecutar_trabajo(trabajo, dataset_path))
+    return trabajo
+
+
+def _leer_trabajo(trabajo_id: str) -> Optional[dict]:
+    try:
+        with open(_ruta_trabajo(trabajo_id), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def obtener_trabajo(trabajo_id: str) -> Optional[dict]:
+    """Estado de un trabajo, lo haya lanzado este worker u otro"""
+    if not re.fullmatch(r'[0-9a-f]{32}', trabajo_id):
+        return None
+    trabajo = _leer_trabajo(trabajo_id)
+    if trabajo is None or trabajo['estado'] not in ESTADOS_ACTIVOS:
+        return trabajo
+
+    if _leer_activo() != trabajo_id or not _lock_tomado():
+        # Pudo terminar justo ahora (el estado final se escribe antes de soltar el lock)
+        trabajo = _leer_trabajo(trabajo_id) or trabajo
+        if trabajo['estado'] in ESTADOS_ACTIVOS:
+            # El worker que entrenaba murió sin terminar: ya nadie tiene el lock de este trabajo
+            trabajo.update(
+                estado='error',
+                error="El proceso que entrenaba se detuvo antes de terminar",
+                mensaje="El entrenamiento se interrumpió; se mantiene el modelo anterior"
+            )
+    return trabajo
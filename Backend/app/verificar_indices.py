@@ -0,0 +1,142 @@
+# verificar_indices.py - Comprobar con EXPLAIN que las consultas más usadas van por índice
+#
+# Ejecuta las funciones reales (validar_reserva, get_horarios_cliente y
+# obtener_rutinas_realizadas_usuario) dentro de una transacción que se revierte, captura el SQL
+# que emiten y corre EXPLAIN (FORMAT JSON) sobre cada sentencia. Termina con código 1 si alguna
+# lee reserva u horario con Seq Scan.
+#
+# Con pocas filas PostgreSQL prefiere el Seq Scan aunque exista el índice, así que por defecto se
+# desactiva (enable_seqscan = off) para comprobar que el índice se PUEDE usar. Con --sin-forzar
+# decide el planificador (útil contra una copia de producción con datos reales).
+#
+# Uso (desde Backend/, con DATABASE_URL apuntando a PostgreSQL y `alembic upgrade head` aplicado):
+#   python -m app.verificar_indices
+#   python -m app.verificar_indices --sin-forzar
+
+import argparse
+import sys
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.crud.horarios import get_horarios_cliente
+from app.crud.reservas import obtener_rutinas_realizadas_usuario, validar_reserva
+from app.database import SessionLocal
+from app.models.equipos import EquipoPowerplate
+from app.models.horarios import Horario
+from app.models.users import Usuario
+
+TABLAS_VIGILADAS = {"reserva", "horario"}
+
+
+@contextmanager
+def capturar_sql(db):
+    """Registrar las consultas SELECT que se emiten en la conexión de la sesión"""
+    sentencias = []
+    conexion = db.connection()
+
+    def registrar(conn, cursor, sentencia, parametros, contexto, executemany):
+        if sentencia.lstrip().upper().startswith(("SELECT", "WITH")):
+            sentencias.append((sentencia, parametros))
+
+    event.listen(conexion, "before_cursor_execute", registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(conexion, "before_cursor_execute", registrar)
+
+
+def accesos_del_plan(nodo: dict) -> list:
+    """Recorrer el plan y devolver (tipo de nodo, tabla, índice) de cada lectura de tabla"""
+    accesos = []
+    if "Relation Name" in nodo:
+        accesos.append((nodo["Node Type"], nodo["Relation Name"], nodo.get("Index Name")))
+    for hijo in nodo.get("Plans", []):
+        accesos.extend(accesos_del_plan(hijo))
+    return accesos
+
+
+def explicar(db, sentencias) -> list:
+    accesos = []
+    for sentencia, parametros in sentencias:
+        plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + sentencia, parametros).scalar()
+        accesos.extend(accesos_del_plan(plan[0]["Plan"]))
+    return accesos
+
+
+def datos_de_ejemplo(db) -> dict:
+    """Ids reales si existen (un horario powerplate cubre también la validación de equipo)"""
+    horario = (db.query(Horario).filter(Horario.tipo == "powerplate").first()
+               or db.query(Horario).first())
+    usuario = db.query(Usuario).filter(Usuario.rol == "cliente").first() or db.query(Usuario).first()
+    equipo = db.query(EquipoPowerplate).first()
+    return {
+        "id_horario": horario.id_horario if horario else 1,
+        "id_usuario": usuario.id_usuario if usuario else 1,
+        "id_equipo": equipo.id_equipo if equipo else None,
+        "categoria": horario.tipo.value if horario else "calistenia",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificar con EXPLAIN que las consultas usan índices")
+    parser.add_argument('--sin-forzar', action='store_true', help="No desactivar enable_seqscan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        print("❌ Esta verificación necesita PostgreSQL (DATABASE_URL)")
+        sys.exit(1)
+
+    datos = datos_de_ejemplo(db)
+    consultas = {
+        "validar_reserva": lambda: validar_reserva(db, {
+            "id_horario": datos["id_horario"],
+            "id_usuario": datos["id_usuario"],
+            "id_equipo": datos["id_equipo"],
+        }),
+        "get_horarios_cliente": lambda: get_horarios_cliente(
+            db, "cliente", datos["id_usuario"], datos["categoria"]
+        ),
+        "obtener_rutinas_realizadas_usuario": lambda: obtener_rutinas_realizadas_usuario(
+            db, datos["id_usuario"], 30
+        ),
+    }
+
+    fallos = 0
+    try:
+        if not args.sin_forzar:
+            db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+        for nombre, consulta in consultas.items():
+            with capturar_sql(db) as sentencias:
+                try:
+                    consulta()
+                except HTTPException as e:
+                    # Una validación que rechaza la reserva igual deja sus consultas capturadas
+                    if e.status_code >= 500:
+                        raise
+
+            accesos = [a for a in explicar(db, sentencias) if a[1] in TABLAS_VIGILADAS]
+            secuenciales = [a for a in accesos if a[0] == "Seq Scan"]
+            fallos += len(secuenciales)
+
+            estado = "❌" if secuenciales else "✅"
+            print(f"{estado} {nombre}: {len(sentencias)} consultas")
+            for tipo, tabla, indice in accesos:
+                print(f"     {tabla:<8} {tipo:<18} {indice or ''}")
+            if not sentencias:
+                print("     ⚠️ No se emitió ninguna consulta")
+    finally:
+        db.rollback()
+        db.close()
+
+    if fallos:
+        print(f"\n❌ {fallos} lecturas secuenciales sobre {', '.join(sorted(TABLAS_VIGILADAS))}")
+        sys.exit(1)
+    print("\n✅ Todas las lecturas de reserva y horario usan índices")
+
+
+if __name__ == "__main__":
+    main()
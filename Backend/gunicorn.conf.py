@@ -0,0 +1,51 @@
+# gunicorn.conf.py - Producción con varios workers compartiendo el modelo de IA
+#
+# Uso (desde Backend/):
+#   gunicorn app.main:app -c gunicorn.conf.py
+#
+# Con preload_app el maestro importa la API y carga el modelo UNA vez; los workers se crean con
+# fork y heredan sus páginas (copy-on-write) en lugar de cargar cada uno su propia copia.
+# Para desarrollo sigue sirviendo `uvicorn app.main:app --reload` (cada proceso carga el suyo).
+#
+# Estado por worker después del fork:
+#   - Entrenamiento (POST /ai/train-model): corre en el worker que recibe la petición. El estado
+#     de los trabajos y el lock de "uno a la vez" están en .trabajos_entrenamiento/ junto al .pkl,
+#     así que cualquier worker responde /ai/train-jobs/{id} (app/utils/trabajos_entrenamiento.py).
+#   - Modelo (ModeloActivo): el worker que entrena publica el modelo nuevo y reemplaza el .pkl;
+#     los demás ven el mtime nuevo y lo recargan en su siguiente petición a /ai. Desde ese momento
+#     cada worker tiene su propia copia del modelo (ya no son páginas compartidas con el maestro)
+#     hasta que se reinicien los workers.
+#   - Cache de rutinas (CacheRutinas): es de cada worker y vive en la instancia del modelo; se
+#     vacía cuando ese worker carga el modelo nuevo.
+
+import logging
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+# Importar la app (y el modelo, ver when_ready) en el maestro antes del fork
+preload_app = True
+
+logger = logging.getLogger("gunicorn.error")
+
+
+def when_ready(server):
+    """Maestro listo, antes de crear los workers: cargar el modelo y congelar el heap"""
+    from app.main import precargar_modelo_ia
+    from app.utils.memoria import preparar_fork, resumen_memoria
+
+    if os.getenv("IA_PRECARGA", "1") != "0":
+        precargar_modelo_ia()
+    preparar_fork()
+    logger.info(f"🧠 Maestro con modelo precargado: {resumen_memoria()}")
+
+
+def post_worker_init(worker):
+    """Memoria de cada worker recién creado (las páginas del modelo aún son compartidas)"""
+    from app.utils.memoria import resumen_memoria
+
+    logger.info(f"👷 Worker {worker.pid} iniciado: {resumen_memoria()}")